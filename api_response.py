@@ -0,0 +1,130 @@
+"""
+HoloCrypt API Responses
+Fast JSON serialization, negotiated response compression and binary ciphertext responses
+"""
+
+import gzip
+import os
+
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/octet-stream', 'text/', 'application/javascript',
+                      'image/svg+xml')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson when it is installed, the stdlib otherwise.
+
+    Used for both ``jsonify`` responses and ``request.get_json()``. The
+    backend can be forced with the JSON_BACKEND config/env value ('orjson' or
+    'json'). Keys are not sorted: orjson writes dicts in insertion order,
+    which is what the API handlers already build.
+    """
+
+    sort_keys = False
+
+    def __init__(self, app, backend: str = 'orjson'):
+        super().__init__(app)
+        self.backend = 'orjson' if backend == 'orjson' and orjson is not None else 'json'
+
+    def dumps(self, obj, **kwargs) -> str:
+        if self.backend != 'orjson' or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        if self.backend != 'orjson' or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        if self.backend != 'orjson' or self._app.debug:
+            return super().response(*args, **kwargs)  # debug keeps indented output
+        obj = self._prepare_response_obj(args, kwargs)
+        # Skip the bytes -> str -> bytes round trip of the default provider
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _choose_encoding() -> str:
+    """The available encoding with the highest q-value; ties prefer br over gzip."""
+    accepted = request.accept_encodings
+    available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    ranked = sorted(available, key=lambda encoding: -accepted.quality(encoding))
+    for encoding in ranked:
+        if accepted.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def compress_response(response: Response, min_size: int) -> Response:
+    """Compress an API response body if the client accepts it and it is worth it."""
+    if (response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300
+            or not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)):
+        return response
+
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        encoded = brotli.compress(body, quality=4)
+    else:
+        encoded = gzip.compress(body, compresslevel=6, mtime=0)
+    if len(encoded) >= len(body):
+        return response
+
+    response.set_data(encoded)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def wants_binary() -> bool:
+    """True if the client prefers raw bytes (Accept: application/octet-stream) over JSON."""
+    best = request.accept_mimetypes.best_match(['application/json', 'application/octet-stream'])
+    return best == 'application/octet-stream'
+
+
+def binary_response(payload, headers: dict = None) -> Response:
+    """
+    Returns text or bytes as an application/octet-stream body, metadata in X- headers.
+
+    Args:
+        payload: str (sent as UTF-8) or bytes
+        headers: Extra response headers (e.g. {'X-Cipher-Type': 'caesar'})
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    return Response(payload, mimetype='application/octet-stream', headers=headers or {})
+
+
+def init_app(app):
+    """Install the JSON provider and the compression hook on an app."""
+    app.config.setdefault('JSON_BACKEND', os.getenv('JSON_BACKEND', 'orjson'))
+    app.config.setdefault('COMPRESS_MIN_SIZE', int(os.getenv('COMPRESS_MIN_SIZE', 1024)))
+    app.json = FastJSONProvider(app, backend=app.config['JSON_BACKEND'])
+
+    @app.after_request
+    def _compress_api_response(response):
+        if request.path.startswith('/api/'):
+            return compress_response(response, app.config['COMPRESS_MIN_SIZE'])
+        return response
@@ -3,7 +3,7 @@ HoloCrypt Flask Application with REST API
 Multi-layer encryption system with email delivery and SMS notifications
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, send_from_directory
+from flask import Flask, Blueprint, Response, render_template, request, jsonify, send_file
 from flask_cors import CORS
 import os
 import base64
@@ -17,56 +17,63 @@ from holocrypt_enhanced import (
     generate_qr_with_redirect,
     create_qr_pdf,
     send_password_hint_sms,
-    generate_cipher_clue
+    generate_cipher_clue,
+    seal_into_image,
+    open_from_image,
+    generate_access_code_hash
 )
+from PIL import Image
+from static_assets import StaticIndex, static_index
+import api_response
+from api_response import wants_binary, binary_response
+from rate_limit import RateLimiter, rate_limited
+from byte_ciphers import shuffle_bytes_by_cipher, decipher_bytes
+from cipher_solver import crack, SOLVABLE_CIPHERS, MAX_TEXT_LENGTH as SOLVER_MAX_LENGTH
+from cipher_chain import MAX_STEPS as CHAIN_MAX_STEPS
+import metrics
+import profiling
+import qr_payload
+import cipher_engines
+import stego_pool
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)  # Enable CORS for API access
-
-# Configuration
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'holocrypt-secret-key-change-in-production')
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# All routes live on this blueprint; create_app() builds the Flask app around it
+api = Blueprint('holocrypt', __name__)
 
 # ==================== WEB ROUTES ====================
 
-@app.route('/')
+@api.route('/')
 def index():
     """Serve React app homepage"""
-    return send_file('static/dist/index.html')
+    return static_index().serve_exact('index.html')
 
-@app.route('/assets/<path:path>')
+@api.route('/assets/<path:path>')
 def serve_assets(path):
-    """Serve React build assets"""
-    return send_from_directory('static/dist/assets', path)
+    """Serve React build assets (hashed names, cached as immutable)"""
+    return static_index().serve_exact('assets/' + path)
 
-@app.route('/<path:path>')
+@api.route('/<path:path>')
 def serve_react_routes(path):
     """Serve React app for client-side routing"""
     # Don't intercept API routes
     if path.startswith('api/'):
         return jsonify({'error': 'API endpoint not found'}), 404
     
-    # Check if file exists in static/dist
-    file_path = os.path.join('static/dist', path)
-    if os.path.exists(file_path) and os.path.isfile(file_path):
-        return send_file(file_path)
-    
-    # Return index.html for client-side routing (React Router)
-    return send_file('static/dist/index.html')
+    # Serve the file if it is part of the build, otherwise index.html
+    # for client-side routing (React Router)
+    return static_index().serve(path)
 
-@app.route('/api/docs')
+@api.route('/api/docs')
 def api_docs():
     """API documentation page"""
     return render_template('api_docs.html')
 
 # ==================== REST API ENDPOINTS ====================
 
-@app.route('/api/v1/health', methods=['GET'])
+@api.route('/api/v1/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
@@ -75,7 +82,77 @@ def health_check():
         'version': '1.0.0'
     })
 
-@app.route('/api/v1/encrypt', methods=['POST'])
+@api.route('/api/v1/metrics', methods=['GET'])
+def api_metrics():
+    """
+    Prometheus scrape endpoint: per-stage and per-request latency histograms.
+    
+    Values are per worker process. If METRICS_TOKEN is set, requests must
+    send "Authorization: Bearer <token>".
+    """
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({
+            'success': False,
+            'error': 'Unauthorized'
+        }), 401
+    
+    return Response(metrics.render_all(), mimetype='text/plain; version=0.0.4')
+
+@api.route('/api/v1/engines', methods=['GET'])
+def api_engines():
+    """
+    API Endpoint: Scalar vs NumPy engine thresholds in use by this worker
+    
+    Response:
+    {
+        "success": true,
+        "thresholds": {"caesar": 104, "rail_fence_decipher": 16, ...},  // shortest input sent to NumPy; null = never
+        "source": "default" | "cache" | "calibrated",
+        "calibrated_at": "2026-01-01T00:00:00Z",
+        "fingerprint": {...}
+    }
+    
+    Protected by METRICS_TOKEN like /api/v1/metrics.
+    """
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({
+            'success': False,
+            'error': 'Unauthorized'
+        }), 401
+    
+    return jsonify({'success': True, **cipher_engines.report()})
+
+def binary_cipher(transform):
+    """
+    Runs a byte cipher over a raw application/octet-stream request body.
+    
+    The cipher comes from the cipher_type / cipher_params query arguments
+    (cipher_params as JSON) or the X-Cipher-Type / X-Cipher-Params headers.
+    The body is returned as raw bytes, so binary payloads never pass through
+    JSON or text decoding.
+    """
+    payload = request.get_data(cache=False)
+    cipher_type = request.args.get('cipher_type') or request.headers.get('X-Cipher-Type', 'caesar')
+    raw_params = request.args.get('cipher_params') or request.headers.get('X-Cipher-Params')
+    try:
+        cipher_params = json.loads(raw_params) if raw_params else {'shift': 5}
+        if not isinstance(cipher_params, dict):
+            raise ValueError('cipher_params must be a JSON object')
+        output = transform(payload, cipher_type, cipher_params)
+    except (ValueError, TypeError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    return binary_response(output, {
+        'X-Cipher-Type': cipher_type,
+        'X-Original-Length': str(len(payload))
+    })
+
+@api.route('/api/v1/encrypt', methods=['POST'])
 def api_encrypt():
     """
     API Endpoint: Encrypt message with cipher
@@ -94,7 +171,21 @@ def api_encrypt():
         "cipher_type": "caesar",
         "cipher_params": {...}
     }
+    
+    For several layers, use "cipher_type": "chain" with
+    "cipher_params": {"steps": [{"cipher_type": "vigenere", "cipher_params": {...}},
+    {"cipher_type": "rail_fence", ...}, {"cipher_type": "atbash"}]}.
+    
+    With "Accept: application/octet-stream" the body is the raw UTF-8
+    ciphertext instead, with X-Cipher-Type / X-Original-Length headers.
+    
+    With "Content-Type: application/octet-stream" the request body is a
+    binary payload, enciphered byte-wise (ASCII letters only) and returned
+    as raw bytes; see binary_cipher for passing the cipher.
     """
+    if request.mimetype == 'application/octet-stream':
+        return binary_cipher(shuffle_bytes_by_cipher)
+    
     try:
         data = request.get_json()
         
@@ -112,6 +203,13 @@ def api_encrypt():
         # Encrypt the message
         encrypted_text = shuffle_data_by_cipher(message, cipher_type, cipher_params)
         
+        # Accept: application/octet-stream returns the ciphertext unescaped
+        if wants_binary():
+            return binary_response(encrypted_text, {
+                'X-Cipher-Type': cipher_type,
+                'X-Original-Length': str(len(message))
+            })
+        
         return jsonify({
             'success': True,
             'encrypted_text': encrypted_text,
@@ -121,13 +219,19 @@ def api_encrypt():
             'encrypted_length': len(encrypted_text)
         })
         
+    except ValueError as e:
+        # Invalid cipher_params (shift, keyword, rails, chain steps) are client errors
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/v1/decrypt', methods=['POST'])
+@api.route('/api/v1/decrypt', methods=['POST'])
 def api_decrypt():
     """
     API Endpoint: Decrypt message with cipher
@@ -144,7 +248,16 @@ def api_decrypt():
         "success": true,
         "decrypted_text": "Your secret message"
     }
+    
+    A "chain" cipher_type is undone with the same steps it was encrypted
+    with, last step first.
+    
+    With "Content-Type: application/octet-stream" the request body is the
+    raw ciphertext and the response the raw plaintext bytes.
     """
+    if request.mimetype == 'application/octet-stream':
+        return binary_cipher(decipher_bytes)
+    
     try:
         data = request.get_json()
         
@@ -162,6 +275,9 @@ def api_decrypt():
         # Decrypt the message
         decrypted_text = decipher_data(encrypted_text, cipher_type, cipher_params)
         
+        if wants_binary():
+            return binary_response(decrypted_text, {'X-Cipher-Type': cipher_type})
+        
         return jsonify({
             'success': True,
             'decrypted_text': decrypted_text,
@@ -169,13 +285,20 @@ def api_decrypt():
             'cipher_params': cipher_params
         })
         
+    except ValueError as e:
+        # Invalid cipher_params (shift, keyword, rails, chain steps) are client errors
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/v1/validate-decrypt', methods=['POST'])
+@api.route('/api/v1/validate-decrypt', methods=['POST'])
+@rate_limited(rate=5, burst=20, cost=5)  # NLTK puzzle on wrong guesses
 def api_validate_decrypt():
     """
     API Endpoint: Validate cipher and decrypt (with puzzle on wrong cipher)
@@ -230,7 +353,70 @@ def api_validate_decrypt():
             'error': str(e)
         }), 500
 
-@app.route('/api/v1/send-encrypted-email', methods=['POST'])
+@api.route('/api/v1/auto-solve', methods=['POST'])
+@rate_limited(rate=5, burst=20, cost=2)  # a few ms of NumPy per KB
+def api_auto_solve():
+    """
+    API Endpoint: Recover cipher type, parameters and plaintext without the key
+    
+    Request Body:
+    {
+        "encrypted_text": "...",
+        "ciphers": ["caesar", "atbash", "rail_fence", "vigenere"],  // optional
+        "top": 5  // optional
+    }
+    
+    Response:
+    {
+        "success": true,
+        "best": {"cipher_type": "caesar", "cipher_params": {"shift": 5}, "plaintext": "...", "score": -5.1},
+        "candidates": [...]
+    }
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object'
+            }), 400
+        
+        if 'encrypted_text' not in data:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required field: encrypted_text'
+            }), 400
+        
+        encrypted_text = data['encrypted_text']
+        if len(encrypted_text) > SOLVER_MAX_LENGTH:
+            return jsonify({
+                'success': False,
+                'error': f'encrypted_text is limited to {SOLVER_MAX_LENGTH} characters'
+            }), 400
+        
+        try:
+            result = crack(encrypted_text,
+                           ciphers=data.get('ciphers', SOLVABLE_CIPHERS),
+                           top=int(data.get('top', 5)))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            **result
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/v1/send-encrypted-email', methods=['POST'])
+@rate_limited(rate=0.2, burst=5, cost=20)  # QR + PDF + Resend + Twilio
 def api_send_encrypted_email():
     """
     API Endpoint: Encrypt and send via email
@@ -257,7 +443,13 @@ def api_send_encrypted_email():
     }
     """
     try:
-        data = request.get_json()
+        # Malformed JSON is a client error, as on the native ASGI route
+        data = request.get_json(force=True, silent=True)
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object'
+            }), 400
         
         # Validate required fields
         required_fields = ['message', 'receiver_email', 'sender_name']
@@ -292,7 +484,8 @@ def api_send_encrypted_email():
             'error': str(e)
         }), 500
 
-@app.route('/api/v1/generate-qr', methods=['POST'])
+@api.route('/api/v1/generate-qr', methods=['POST'])
+@rate_limited(rate=2, burst=10, cost=3)  # QR render
 def api_generate_qr():
     """
     API Endpoint: Generate QR code for encrypted message
@@ -301,7 +494,8 @@ def api_generate_qr():
     {
         "encrypted_text": "...",
         "cipher_type": "caesar",
-        "cipher_params": {"shift": 5}
+        "cipher_params": {"shift": 5},
+        "encoding": "base45"  // optional: base45, base64url or legacy
     }
     
     Response: PNG image of QR code
@@ -318,6 +512,13 @@ def api_generate_qr():
         encrypted_text = data['encrypted_text']
         cipher_type = data.get('cipher_type', 'caesar')
         cipher_params = data.get('cipher_params', {'shift': 5})
+        encoding = data.get('encoding', 'base45')
+        
+        if encoding != 'legacy' and encoding not in qr_payload.ENCODINGS:
+            return jsonify({
+                'success': False,
+                'error': f'Unknown encoding: {encoding}'
+            }), 400
         
         # Get website URL
         website_url = os.getenv('DEPLOYMENT_URL', 'https://holocrypt-ewmtjmjwtyue4v8bkc2uik.streamlit.app')
@@ -327,7 +528,8 @@ def api_generate_qr():
             website_url=website_url,
             encrypted_data=encrypted_text,
             cipher_type=cipher_type,
-            cipher_params=cipher_params
+            cipher_params=cipher_params,
+            encoding=encoding
         )
         
         # Convert PIL image to bytes
@@ -343,7 +545,226 @@ def api_generate_qr():
             'error': str(e)
         }), 500
 
-@app.route('/api/v1/send-sms', methods=['POST'])
+@api.route('/api/v1/image/seal', methods=['POST'])
+@rate_limited(rate=2, burst=10, cost=5)  # scrypt + PNG encode
+def api_seal_image():
+    """
+    API Endpoint: Encrypt data and hide it in an image
+    
+    Request (multipart/form-data):
+        access_code: Code the receiver needs to open the image
+        data: File to seal (or a "message" text field)
+        cover: Optional cover image (default: a HoloCrypt QR code)
+    
+    Or JSON:
+    {
+        "message": "Your secret message",
+        "access_code": "1234"
+    }
+    
+    Response: PNG image holding the sealed data
+    """
+    try:
+        if request.is_json:
+            data = request.get_json() or {}
+            access_code = data.get('access_code')
+            payload = data['message'].encode('utf-8') if 'message' in data else None
+            cover = None
+        else:
+            access_code = request.form.get('access_code')
+            upload = request.files.get('data')
+            if upload is not None:
+                payload = upload.read()
+            elif 'message' in request.form:
+                payload = request.form['message'].encode('utf-8')
+            else:
+                payload = None
+            cover = Image.open(request.files['cover']) if 'cover' in request.files else None
+        
+        if not access_code or payload is None:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required fields: access_code and data/message'
+            }), 400
+        
+        sealed = seal_into_image(payload, access_code, cover)
+        
+        img_io = BytesIO()
+        sealed.save(img_io, 'PNG')
+        img_io.seek(0)
+        
+        return send_file(img_io, mimetype='image/png', as_attachment=False)
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/v1/image/open', methods=['POST'])
+@rate_limited(rate=2, burst=10, cost=5)  # scrypt + PNG decode
+def api_open_image():
+    """
+    API Endpoint: Recover data sealed with /api/v1/image/seal
+    
+    Request (multipart/form-data):
+        image: The sealed PNG
+        access_code: Code given by the sender
+    
+    Response: The original bytes (application/octet-stream)
+    """
+    try:
+        access_code = request.form.get('access_code')
+        if 'image' not in request.files or not access_code:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required fields: image and access_code'
+            }), 400
+        
+        data = open_from_image(Image.open(request.files['image']), access_code)
+        return binary_response(data)
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _per_image(values: list, count: int, name: str) -> list:
+    """A batch form field: one value for every image, or one per image."""
+    if len(values) == 1:
+        return values * count
+    if len(values) != count:
+        raise ValueError(f"Send one '{name}' for all images or one per image")
+    return values
+
+def _batch_results(results: list, uploads: list, key: str, encode) -> dict:
+    items = []
+    for index, (result, upload) in enumerate(zip(results, uploads)):
+        item = {'index': index, 'filename': upload.filename, 'success': result['success']}
+        if result['success']:
+            item[key] = encode(result['result'])
+        else:
+            item['error'] = result['error']
+        items.append(item)
+    return {
+        'success': True,
+        'results': items,
+        'total': len(items),
+        'succeeded': sum(1 for item in items if item['success'])
+    }
+
+@api.route('/api/v1/stego/embed', methods=['POST'])
+@rate_limited(rate=1, burst=5, cost=10)  # A whole batch fanned out over the stego pool
+def api_stego_embed():
+    """
+    API Endpoint: Hide data in a batch of images (LSB steganography)
+    
+    Request (multipart/form-data):
+        images: Cover images (repeat the field, up to STEGO_MAX_BATCH)
+        access_code: One for all images, or one per image
+        data: Files to hide, one for all images or one per image
+              (or "message" text fields instead)
+    
+    Response:
+    {
+        "success": true,
+        "results": [
+            {"index": 0, "filename": "qr1.png", "success": true, "image": "<base64 PNG>"},
+            {"index": 1, "filename": "tiny.png", "success": false, "error": "Image too small to hide this much data"}
+        ],
+        "total": 2,
+        "succeeded": 1
+    }
+    """
+    try:
+        uploads = request.files.getlist('images')
+        access_codes = request.form.getlist('access_code')
+        payloads = [upload.read() for upload in request.files.getlist('data')] or \
+            [message.encode('utf-8') for message in request.form.getlist('message')]
+        
+        if not uploads or not access_codes or not payloads:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required fields: images, access_code and data/message'
+            }), 400
+        
+        count = len(uploads)
+        hashes = [generate_access_code_hash(code) for code in _per_image(access_codes, count, 'access_code')]
+        results = stego_pool.embed_batch([upload.read() for upload in uploads],
+                                         _per_image(payloads, count, 'data'), hashes)
+        return jsonify(_batch_results(results, uploads, 'image',
+                                      lambda png: base64.b64encode(png).decode('ascii')))
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/v1/stego/extract', methods=['POST'])
+@rate_limited(rate=1, burst=5, cost=10)  # A whole batch fanned out over the stego pool
+def api_stego_extract():
+    """
+    API Endpoint: Recover data hidden with /api/v1/stego/embed from a batch of images
+    
+    Request (multipart/form-data):
+        images: Stego images (repeat the field, up to STEGO_MAX_BATCH)
+        access_code: One for all images, or one per image
+    
+    Response:
+    {
+        "success": true,
+        "results": [
+            {"index": 0, "filename": "qr1.png", "success": true, "data": "<base64>"},
+            {"index": 1, "filename": "qr2.png", "success": false, "error": "Invalid access code"}
+        ],
+        "total": 2,
+        "succeeded": 1
+    }
+    """
+    try:
+        uploads = request.files.getlist('images')
+        access_codes = request.form.getlist('access_code')
+        if not uploads or not access_codes:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required fields: images and access_code'
+            }), 400
+        
+        results = stego_pool.extract_batch([upload.read() for upload in uploads],
+                                           _per_image(access_codes, len(uploads), 'access_code'))
+        return jsonify(_batch_results(results, uploads, 'data',
+                                      lambda data: base64.b64encode(data).decode('ascii')))
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/v1/send-sms', methods=['POST'])
+@rate_limited(rate=0.2, burst=5, cost=10)  # Twilio round trip
 def api_send_sms():
     """
     API Endpoint: Send SMS with password hint
@@ -364,7 +785,13 @@ def api_send_sms():
     }
     """
     try:
-        data = request.get_json()
+        # Malformed JSON is a client error, as on the native ASGI route
+        data = request.get_json(force=True, silent=True)
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object'
+            }), 400
         
         # Validate required fields
         required_fields = ['receiver_phone', 'password_hint']
@@ -390,7 +817,7 @@ def api_send_sms():
             'error': str(e)
         }), 500
 
-@app.route('/api/v1/cipher-clue', methods=['POST'])
+@api.route('/api/v1/cipher-clue', methods=['POST'])
 def api_cipher_clue():
     """
     API Endpoint: Generate cipher clue/hint
@@ -422,13 +849,19 @@ def api_cipher_clue():
             'cipher_type': cipher_type
         })
         
+    except ValueError as e:
+        # Malformed chain spec
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/v1/ciphers', methods=['GET'])
+@api.route('/api/v1/ciphers', methods=['GET'])
 def api_list_ciphers():
     """
     API Endpoint: List available cipher types
@@ -501,6 +934,42 @@ def api_list_ciphers():
                 "substitution_key": "QWERTYUIOPASDFGHJKLZXCVBNM",
                 "ciphertext": "ITSSG"
             }
+        },
+        {
+            "type": "permutation",
+            "name": "Permutation Cipher",
+            "description": "Reorders characters by a permutation derived from a key",
+            "params": {
+                "key": {"type": "string", "default": "permutation"},
+                "seed": {"type": "string", "description": "Used as the key when key is absent"}
+            },
+            "example": {
+                "plaintext": "HELLO",
+                "key": "SECRET",
+                "ciphertext": "LELOH"
+            }
+        },
+        {
+            "type": "chain",
+            "name": "Cipher Chain",
+            "description": "Applies several ciphers in order; decryption undoes them in reverse",
+            "params": {
+                "steps": {
+                    "type": "array",
+                    "min_items": 1,
+                    "max_items": CHAIN_MAX_STEPS,
+                    "items": {"cipher_type": {"type": "string"}, "cipher_params": {"type": "object"}},
+                    "description": "Any cipher type above with its own params; nested chains are flattened"
+                }
+            },
+            "example": {
+                "plaintext": "HELLO",
+                "steps": [
+                    {"cipher_type": "caesar", "cipher_params": {"shift": 5}},
+                    {"cipher_type": "rail_fence", "cipher_params": {"rails": 3}}
+                ],
+                "ciphertext": "MTJQQ"
+            }
         }
     ]
     
@@ -512,7 +981,7 @@ def api_list_ciphers():
 
 # ==================== ERROR HANDLERS ====================
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
     if request.path.startswith('/api/'):
@@ -522,7 +991,7 @@ def not_found(error):
         }), 404
     return render_template('error.html', error="Page not found"), 404
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
     if request.path.startswith('/api/'):
@@ -532,7 +1001,7 @@ def internal_error(error):
         }), 500
     return render_template('error.html', error="Internal server error"), 500
 
-@app.errorhandler(413)
+@api.app_errorhandler(413)
 def request_entity_too_large(error):
     """Handle file too large errors"""
     return jsonify({
@@ -540,6 +1009,37 @@ def request_entity_too_large(error):
         'error': 'File too large. Maximum size is 16MB'
     }), 413
 
+# ==================== APP FACTORY ====================
+
+def create_app(config: dict = None) -> Flask:
+    """
+    Application factory used by the dev server, gunicorn (wsgi.py) and tests.
+    
+    Args:
+        config: Optional Flask config overrides applied after the defaults
+    
+    Returns:
+        Configured Flask app
+    """
+    app = Flask(__name__)
+    CORS(app)  # Enable CORS for API access
+    
+    # Configuration
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'holocrypt-secret-key-change-in-production')
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    if config:
+        app.config.update(config)
+    
+    app.register_blueprint(api)
+    metrics.init_app(app)         # Registered first so it sees the compressed size
+    api_response.init_app(app)   # orjson-backed jsonify + gzip/brotli for /api/
+    RateLimiter().init_app(app)   # 429s for clients flooding the expensive endpoints
+    StaticIndex().init_app(app)  # Index static/dist once at startup
+    profiling.init_app(app)       # No-op unless PROFILING_ENABLED=true
+    return app
+
+app = create_app()
+
 # ==================== MAIN ====================
 
 if __name__ == '__main__':
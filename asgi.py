@@ -0,0 +1,205 @@
+"""
+ASGI entry point: native async delivery endpoints in front of the Flask app
+
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+    uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 4
+
+POST /api/v1/send-encrypted-email and /api/v1/send-sms spend nearly all of
+their time waiting on Resend and Twilio. Under WSGI each one pins a sync
+worker for the whole round trip. Here they run as coroutines on the worker's
+event loop (encode_and_send_async, send_password_hint_sms_async) over one
+shared keep-alive HTTP client. A worker keeps up to ASYNC_DELIVERY_CAPACITY
+deliveries in flight (default 500) and answers 429 beyond that. The CPU steps
+(cipher, QR code, PDF) run in the loop's thread pool.
+
+Every other request, including OPTIONS preflights for these two paths, goes
+to the Flask app through a WSGI adapter. The native routes keep the Flask
+views' behaviour: the same JSON bodies and status codes, rate limits and
+token buckets (read from the views' rate_limited decorators), HTTP metrics
+and CORS header.
+
+The gunicorn command preloads the app and runs warm_up() once in the master.
+Plain uvicorn skips that.
+"""
+
+import asyncio
+import math
+import os
+import time
+
+from a2wsgi import WSGIMiddleware
+
+import async_http
+import metrics
+from app import app as flask_app
+from holocrypt_enhanced import encode_and_send_async, send_password_hint_sms_async
+from rate_limit import MemoryBackend, client_identity, refund_tokens, take_tokens, too_many_requests_body
+
+ASYNC_DELIVERY_CAPACITY = int(os.getenv('ASYNC_DELIVERY_CAPACITY', 500))
+
+
+# --- Delivery handlers ---
+
+async def send_encrypted_email(data: dict) -> dict:
+    """Async twin of app.api_send_encrypted_email."""
+    website_url = os.getenv('DEPLOYMENT_URL', 'https://holocrypt-ewmtjmjwtyue4v8bkc2uik.streamlit.app')
+    return await encode_and_send_async(
+        original_message=data['message'],
+        receiver_email=data['receiver_email'],
+        cipher_type=data.get('cipher_type', 'caesar'),
+        cipher_params=data.get('cipher_params', {'shift': 5}),
+        sender_name=data['sender_name'],
+        website_url=website_url,
+        pdf_password=data.get('pdf_password'),
+        receiver_phone=data.get('receiver_phone'),
+        password_hint=data.get('password_hint')
+    )
+
+
+async def send_sms(data: dict) -> dict:
+    """Async twin of app.api_send_sms."""
+    return await send_password_hint_sms_async(
+        receiver_phone=data['receiver_phone'],
+        password_hint=data['password_hint'],
+        sender_name=data.get('sender_name', 'HoloCrypt')
+    )
+
+
+# path -> (handler, required fields)
+ROUTES = {
+    '/api/v1/send-encrypted-email': (send_encrypted_email, ('message', 'receiver_email', 'sender_name')),
+    '/api/v1/send-sms': (send_sms, ('receiver_phone', 'password_hint')),
+}
+
+
+# --- ASGI app ---
+
+class _Response(Exception):
+    """Ends a native request early with this status and JSON body."""
+
+    def __init__(self, status: int, body: dict, headers: list = ()):
+        self.status, self.body, self.headers = status, body, list(headers)
+
+
+class DeliveryApp:
+    """
+    Serves ROUTES natively and hands everything else to the Flask app.
+
+    Args:
+        flask_app: App from create_app(); its config, rate limiter and JSON provider are reused
+        capacity: Native deliveries in flight at once in this worker
+    """
+
+    def __init__(self, flask_app, capacity: int = ASYNC_DELIVERY_CAPACITY):
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app)
+        self.capacity = capacity
+        self.in_flight = 0
+        self.routes = {}
+        for rule in flask_app.url_map.iter_rules():
+            if rule.rule in ROUTES and 'POST' in rule.methods:
+                view = flask_app.view_functions[rule.endpoint]
+                self.routes[rule.rule] = (*ROUTES[rule.rule], rule.endpoint, view.rate_limit)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] in self.routes:
+            await self._deliver(scope, receive, send, *self.routes[scope['path']])
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_http.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive) -> bytes:
+        limit = self.flask_app.config['MAX_CONTENT_LENGTH']
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise _Response(400, {'success': False, 'error': 'Client disconnected'})
+            body += message.get('body', b'')
+            if limit and len(body) > limit:
+                raise _Response(413, {'success': False, 'error': 'File too large. Maximum size is 16MB'})
+            if not message.get('more_body'):
+                return bytes(body)
+
+    async def _limiter_call(self, function, *args):
+        limiter = self.flask_app.extensions['holocrypt_limiter']
+        if isinstance(limiter.backend, MemoryBackend):
+            return function(limiter, *args)
+        return await asyncio.to_thread(function, limiter, *args)  # A network round trip; keep it off the loop
+
+    async def _check_limits(self, scope, headers: dict, endpoint: str, rate_limit: tuple):
+        """Takes the request's tokens; returns the refund_tokens() arguments, or None if limits are off."""
+        if not self.flask_app.config.get('RATE_LIMIT_ENABLED', True):
+            return None
+        limiter = self.flask_app.extensions['holocrypt_limiter']
+        api_key = headers.get(b'x-api-key', b'').decode('latin-1')
+        client = client_identity(limiter, api_key, (scope.get('client') or ('',))[0])
+        taken = (client, endpoint, *rate_limit)
+        retry_after, reason = await self._limiter_call(take_tokens, *taken)
+        if retry_after:
+            raise _Response(429, too_many_requests_body(retry_after, reason),
+                            [(b'retry-after', str(max(1, math.ceil(retry_after))).encode())])
+        return taken
+
+    async def _deliver(self, scope, receive, send, handler, required_fields, endpoint, rate_limit):
+        start = time.perf_counter()
+        headers = dict(scope['headers'])
+        body, data, admitted = b'', None, False
+        try:
+            body = await self._read_body(receive)
+            taken = await self._check_limits(scope, headers, endpoint, rate_limit)
+            # Waiting on providers costs nothing here; this bounds memory and provider fan-out
+            if self.in_flight >= self.capacity:
+                if taken:
+                    await self._limiter_call(refund_tokens, *taken)
+                raise _Response(429, too_many_requests_body(1, 'server busy'), [(b'retry-after', b'1')])
+            self.in_flight += 1
+            admitted = True
+
+            try:
+                data = self.flask_app.json.loads(body)
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                raise _Response(400, {'success': False, 'error': 'Request body must be a JSON object'})
+            for field in required_fields:
+                if field not in data:
+                    raise _Response(400, {'success': False, 'error': f'Missing required field: {field}'})
+
+            status, result, extra_headers = 200, await handler(data), []
+        except _Response as response:
+            status, result, extra_headers = response.status, response.body, response.headers
+        except Exception as e:
+            status, result, extra_headers = 500, {'success': False, 'error': str(e)}, []
+        finally:
+            if admitted:
+                self.in_flight -= 1
+
+        payload = self.flask_app.json.dumps(result).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(payload)).encode()),
+                (b'access-control-allow-origin', b'*'),
+                *extra_headers,
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': payload})
+        metrics.observe_request(time.perf_counter() - start, scope['path'], 'POST', status, data,
+                                len(body), len(payload))
+
+
+app = DeliveryApp(flask_app)
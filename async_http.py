@@ -0,0 +1,68 @@
+"""
+HoloCrypt Async HTTP
+Shared aiohttp session for provider calls (Resend, Twilio) made from the event loop
+
+Opening a client per call would pay a TCP and TLS handshake on every
+delivery. One session per event loop keeps a pool of keep-alive connections
+to each provider, shared by every request the worker has in flight. Sessions
+are bound to the loop that created them, so a new loop (a new worker, or
+asyncio.run in a script) gets its own.
+
+aiohttp rather than httpx: with a few hundred requests in flight, httpx's
+connection pool spends its time rescanning every connection on each state
+change (600 concurrent calls to a 200 ms stub: ~10 s with httpx 0.28, ~1 s
+with aiohttp).
+
+Environment: PROVIDER_MAX_CONNECTIONS (per worker, default 200),
+PROVIDER_TIMEOUT (seconds, default 30).
+"""
+
+import asyncio
+import os
+
+import aiohttp
+
+MAX_CONNECTIONS = int(os.getenv('PROVIDER_MAX_CONNECTIONS', 200))
+TIMEOUT = float(os.getenv('PROVIDER_TIMEOUT', 30))
+
+_session = None
+_loop = None
+
+
+def session() -> aiohttp.ClientSession:
+    """The running loop's shared session, created on first use."""
+    global _session, _loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _loop is not loop or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS),
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+        )
+        _loop = loop
+    return _session
+
+
+async def post(url: str, auth: tuple = None, **kwargs) -> tuple:
+    """
+    POSTs on the shared session.
+
+    Args:
+        url: Request URL
+        auth: Optional (user, password) for basic auth
+        **kwargs: Passed to ClientSession.post (json=, data=, headers=)
+
+    Returns:
+        (status code, response body text)
+    """
+    if auth is not None:
+        kwargs['auth'] = aiohttp.BasicAuth(*auth)
+    async with session().post(url, **kwargs) as response:
+        return response.status, await response.text()
+
+
+async def aclose():
+    """Closes the running loop's session (ASGI lifespan shutdown)."""
+    global _session, _loop
+    if _session is not None and _loop is asyncio.get_running_loop():
+        await _session.close()
+    _session = _loop = None
@@ -0,0 +1,203 @@
+"""
+HoloCrypt Batch Ciphers
+Caesar and Vigenere over many short messages in one vectorized pass
+
+Calling caesar_cipher once per message costs far more in interpreter
+overhead than in enciphering. Here N messages are packed, Arrow-style, into
+one contiguous code point array plus an offsets array (message i is
+codes[offsets[i]:offsets[i + 1]]). Per-message shifts and keywords are
+broadcast to every character through the offsets with np.repeat, each
+cipher runs as a few whole-array operations, and the result is split back
+into strings.
+
+Results match caesar_cipher / vigenere_cipher exactly, including their
+handling of non-ASCII letters. ASCII batches take the fast path: a uint8
+array and one gather from 26 shift tables. Work proceeds in blocks of
+about BLOCK_CHARS characters so memory stays bounded for huge batches.
+"""
+
+import numpy as np
+
+BLOCK_CHARS = 1 << 18
+
+_CODES = np.arange(256)
+# Letter base per ASCII byte: 65 for upper case, 97 for lower case, 0 for non-letters
+_ASCII_BASE = np.where((_CODES >= 65) & (_CODES <= 90), 65,
+                       np.where((_CODES >= 97) & (_CODES <= 122), 97, 0)).astype(np.int32)
+# Row s maps every ASCII byte through a Caesar shift of s
+_SHIFT_TABLES = np.where(_ASCII_BASE > 0, (_CODES - _ASCII_BASE + np.arange(26)[:, None]) % 26 + _ASCII_BASE,
+                         _CODES).astype(np.uint8).ravel()
+
+
+# --- Packing ---
+
+def pack(messages) -> tuple:
+    """
+    Packs messages into one array.
+
+    Returns:
+        (codes, offsets): uint8 codes if every message is ASCII, else UTF-32
+        code points; offsets has len(messages) + 1 entries
+    """
+    lengths = np.fromiter(map(len, messages), dtype=np.int64, count=len(messages))
+    offsets = np.zeros(len(messages) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    joined = ''.join(messages)
+    if joined.isascii():
+        return np.frombuffer(joined.encode('ascii'), dtype=np.uint8), offsets
+    return np.frombuffer(joined.encode('utf-32-le'), dtype='<u4'), offsets
+
+
+def unpack(codes: np.ndarray, offsets: np.ndarray) -> list:
+    """Splits packed codes back into one string per message."""
+    joined = codes.tobytes().decode('ascii' if codes.dtype == np.uint8 else 'utf-32-le')
+    bounds = offsets.tolist()
+    return [joined[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def _per_message(values, count: int, dtype=np.int64) -> np.ndarray:
+    """A scalar broadcast to every message, or a sequence with one value per message."""
+    if isinstance(values, (int, np.integer)):
+        return np.full(count, values, dtype=dtype)
+    values = np.asarray(values, dtype=dtype)
+    if values.shape != (count,):
+        raise ValueError(f"Expected one value per message ({count}), got {values.shape}")
+    return values
+
+
+def _blocks(offsets: np.ndarray):
+    """(first, last) message ranges of about BLOCK_CHARS characters each."""
+    count = len(offsets) - 1
+    first = 0
+    while first < count:
+        last = int(np.searchsorted(offsets, offsets[first] + BLOCK_CHARS, side='right')) - 1
+        last = min(max(last, first + 1), count)
+        yield first, last
+        first = last
+
+
+# --- Kernels ---
+
+def _letter_bases(codes: np.ndarray) -> np.ndarray:
+    """65 / 97 for letters (str.isupper / other str.isalpha), 0 otherwise."""
+    if codes.dtype == np.uint8:
+        return _ASCII_BASE[codes]
+    bases = np.zeros(len(codes), dtype=np.int32)
+    is_ascii = codes < 128
+    bases[is_ascii] = _ASCII_BASE[codes[is_ascii]]
+    other = np.flatnonzero(~is_ascii)
+    if len(other):
+        unique, inverse = np.unique(codes[other], return_inverse=True)
+        chars = map(chr, unique.tolist())
+        bases[other] = np.array([65 if c.isupper() else 97 if c.isalpha() else 0 for c in chars],
+                                dtype=np.int32)[inverse]
+    return bases
+
+
+def _shift(codes: np.ndarray, shifts: np.ndarray, bases: np.ndarray = None) -> np.ndarray:
+    """Shifts every letter of ``codes`` by the matching entry of ``shifts`` (0-25)."""
+    if codes.dtype == np.uint8:
+        index = shifts.astype(np.int32)
+        index *= 256
+        index += codes
+        return _SHIFT_TABLES[index]
+    bases = _letter_bases(codes) if bases is None else bases
+    wide = codes.astype(np.int64)
+    rotated = (wide - bases + shifts) % 26 + bases
+    return np.where(bases > 0, rotated, wide).astype(codes.dtype)
+
+
+def caesar_packed(codes: np.ndarray, offsets: np.ndarray, shifts, decipher: bool = False) -> np.ndarray:
+    """
+    Caesar cipher over packed messages.
+
+    Args:
+        codes, offsets: pack() output
+        shifts: One shift for every message, or one per message
+        decipher: Shift backwards
+
+    Returns:
+        New codes array (same offsets)
+    """
+    count = len(offsets) - 1
+    shifts = (_per_message(shifts, count) * (-1 if decipher else 1)) % 26
+    out = np.empty_like(codes)
+    for first, last in _blocks(offsets):
+        start, end = offsets[first], offsets[last]
+        per_char = np.repeat(shifts[first:last].astype(np.uint8), np.diff(offsets[first:last + 1]))
+        out[start:end] = _shift(codes[start:end], per_char)
+    return out
+
+
+def _keyword_table(keywords, count: int) -> tuple:
+    """(flat key shifts 0-25, start per message, length per message) for the keywords."""
+    if isinstance(keywords, str):
+        keywords = [keywords]
+        ids = np.zeros(count, dtype=np.int64)
+    elif len(keywords) != count:
+        raise ValueError(f"Expected one keyword per message ({count}), got {len(keywords)}")
+    else:
+        ids = np.arange(count)
+    lengths = np.fromiter(map(len, keywords), dtype=np.int64, count=len(keywords))
+    upper = ''.join(keywords).upper()
+    if len(upper) != lengths.sum():
+        # Some keyword changes length when upper-cased (e.g. 'ß' -> 'SS'), as vigenere_cipher sees it
+        keywords = [keyword.upper() for keyword in keywords]
+        lengths = np.fromiter(map(len, keywords), dtype=np.int64, count=len(keywords))
+        upper = ''.join(keywords)
+    if not lengths.all():
+        raise ValueError("Vigenere keyword must not be empty")
+
+    starts = np.zeros(len(keywords), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    flat = np.frombuffer(upper.encode('utf-32-le'), dtype='<u4').astype(np.int64)
+    return ((flat - 65) % 26).astype(np.uint8), starts[ids], lengths[ids]
+
+
+def vigenere_packed(codes: np.ndarray, offsets: np.ndarray, keywords, decipher: bool = False) -> np.ndarray:
+    """
+    Vigenere cipher over packed messages; the key restarts with each message.
+
+    Args:
+        codes, offsets: pack() output
+        keywords: One keyword for every message, or one per message
+        decipher: Shift backwards
+
+    Returns:
+        New codes array (same offsets)
+    """
+    count = len(offsets) - 1
+    key_shifts, key_starts, key_lengths = _keyword_table(keywords, count)
+    if decipher:
+        key_shifts = (26 - key_shifts) % 26
+
+    out = np.empty_like(codes)
+    for first, last in _blocks(offsets):
+        start, end = offsets[first], offsets[last]
+        block = codes[start:end]
+        lengths = np.diff(offsets[first:last + 1])
+        bases = _letter_bases(block)
+
+        # Letter rank within each message: running letter count minus the count before the message
+        position = np.cumsum(bases > 0, dtype=np.int32)
+        before = np.concatenate([[0], position])[offsets[first:last] - start]
+        position -= np.repeat((before + 1).astype(np.int32), lengths)
+        # Non-letters get a rank of whatever precedes them; they aren't shifted anyway
+        position %= np.repeat(key_lengths[first:last].astype(np.int32), lengths)
+        position += np.repeat(key_starts[first:last], lengths).astype(np.int32, copy=False)
+        out[start:end] = _shift(block, key_shifts[position], bases)
+    return out
+
+
+# --- Message lists ---
+
+def caesar_batch(messages: list, shifts, decipher: bool = False) -> list:
+    """Caesar cipher for many messages: caesar_cipher(messages[i], shifts[i]) for each i."""
+    codes, offsets = pack(messages)
+    return unpack(caesar_packed(codes, offsets, shifts, decipher), offsets)
+
+
+def vigenere_batch(messages: list, keywords, decipher: bool = False) -> list:
+    """Vigenere cipher for many messages: vigenere_cipher(messages[i], keywords[i]) for each i."""
+    codes, offsets = pack(messages)
+    return unpack(vigenere_packed(codes, offsets, keywords, decipher), offsets)
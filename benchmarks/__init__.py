@@ -0,0 +1,3 @@
+"""
+HoloCrypt benchmarks and load tests
+"""
@@ -0,0 +1,106 @@
+"""
+HoloCrypt benchmark CLI (fully offline)
+
+    python -m benchmarks run                              # all groups, print table
+    python -m benchmarks run --group cipher --quick       # one group, small inputs
+    python -m benchmarks run --output bench.json          # save JSON results
+    python -m benchmarks run --baseline baseline.json     # fail on regressions
+    python -m benchmarks compare bench.json baseline.json
+
+Run from the repository root. HTTP load testing against a running server
+lives in benchmarks.loadtest.
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.harness import measure, save_results, load_results, compare, format_seconds
+from benchmarks.suite import GROUPS
+
+
+def print_comparison(rows: list):
+    print(f"{'benchmark':<48} {'baseline':>11} {'current':>11} {'ratio':>7}")
+    for row in rows:
+        marker = {'regression': '  ❌', 'improvement': '  ✅'}.get(row['status'], '')
+        print(f"{row['name']:<48} {format_seconds(row['baseline_s'])} {format_seconds(row['current_s'])} "
+              f"{row['ratio']:6.2f}x{marker}")
+
+
+def run(args) -> int:
+    groups = args.group or list(GROUPS)
+    unknown = [group for group in groups if group not in GROUPS]
+    if unknown:
+        print(f"Unknown group(s): {', '.join(unknown)}. Available: {', '.join(GROUPS)}")
+        return 2
+
+    results = {}
+    for group in groups:
+        # Cases are (name, func) or (name, func, bytes_processed) for throughput
+        for name, func, *processed in GROUPS[group](args.quick):
+            if args.filter and args.filter not in name:
+                continue
+            try:
+                result = measure(func, min_time=args.min_time, repeat=args.repeat)
+            except Exception as e:
+                print(f"{name:<48} FAILED: {e}")
+                continue
+            throughput = ''
+            if processed:
+                result['throughput_mb_s'] = processed[0] / result['median_s'] / 1e6
+                throughput = f", {result['throughput_mb_s']:.1f} MB/s"
+            results[name] = result
+            if not args.json:
+                print(f"{name:<48} {format_seconds(result['median_s'])}  "
+                      f"(min {format_seconds(result['min_s']).strip()}, {result['loops']} loops{throughput})")
+
+    if args.output:
+        save_results(results, args.output)
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), args.threshold)
+        print()
+        print_comparison(rows)
+        regressions = [row for row in rows if row['status'] == 'regression']
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+def compare_files(args) -> int:
+    rows = compare(load_results(args.current), load_results(args.baseline), args.threshold)
+    print_comparison(rows)
+    return 1 if any(row['status'] == 'regression' for row in rows) else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="HoloCrypt benchmark suite")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run benchmarks")
+    run_parser.add_argument('--group', action='append', help=f"Group to run (repeatable): {', '.join(GROUPS)}")
+    run_parser.add_argument('--filter', help="Only run benchmarks whose name contains this")
+    run_parser.add_argument('--quick', action='store_true', help="Smaller inputs, for CI smoke runs")
+    run_parser.add_argument('--min-time', type=float, default=0.1, help="Minimum seconds per timed round")
+    run_parser.add_argument('--repeat', type=int, default=5, help="Timed rounds per benchmark")
+    run_parser.add_argument('--output', help="Write JSON results to this file")
+    run_parser.add_argument('--json', action='store_true', help="Print JSON results instead of a table")
+    run_parser.add_argument('--baseline', help="Compare against saved results; exit 1 on regressions")
+    run_parser.add_argument('--threshold', type=float, default=0.15, help="Allowed slowdown (0.15 = 15%%)")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser('compare', help="Compare two saved result files")
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('--threshold', type=float, default=0.15, help="Allowed slowdown (0.15 = 15%%)")
+    compare_parser.set_defaults(handler=compare_files)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Many short messages: Python loop over the scalar ciphers vs batch_ciphers
+
+    python -m benchmarks.batch                       # 10k and 1M messages
+    python -m benchmarks.batch --messages 10000 --json
+
+Messages are 20-200 characters of English-like text, each with its own
+shift / keyword. The batch time includes packing and unpacking. The scalar
+loop is timed on at most --loop-limit messages and scaled linearly beyond
+that (marked "est."), since a full 1M-message loop takes minutes.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from benchmarks.suite import sample_text
+
+
+def make_messages(count: int, seed: int = 0) -> tuple:
+    rng = random.Random(seed)
+    corpus = sample_text(4096, seed)
+    messages, shifts, keywords = [], [], []
+    for _ in range(count):
+        length = rng.randint(20, 200)
+        start = rng.randrange(len(corpus) - length)
+        messages.append(corpus[start:start + length])
+        shifts.append(rng.randint(1, 25))
+        keywords.append(''.join(rng.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=rng.randint(3, 8))))
+    return messages, shifts, keywords
+
+
+def timed(func) -> tuple:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run(count: int, loop_limit: int) -> dict:
+    from batch_ciphers import caesar_batch, vigenere_batch
+    from holocrypt_enhanced import caesar_cipher, vigenere_cipher
+
+    messages, shifts, keywords = make_messages(count)
+    looped = min(count, loop_limit)
+    characters = sum(map(len, messages))
+    results = {'messages': count, 'characters': characters, 'loop_measured': looped}
+
+    cases = (
+        ('caesar', lambda m, s, k: caesar_cipher(m, s), lambda: caesar_batch(messages, shifts)),
+        ('vigenere', lambda m, s, k: vigenere_cipher(m, k), lambda: vigenere_batch(messages, keywords)),
+    )
+    for name, scalar, batch in cases:
+        expected, loop_s = timed(lambda: [scalar(m, s, k) for m, s, k in
+                                          zip(messages[:looped], shifts[:looped], keywords[:looped])])
+        loop_s *= count / looped
+        output, batch_s = timed(batch)
+        if output[:looped] != expected:
+            raise AssertionError(f"{name}: batch output differs from the scalar cipher")
+        results[name] = {
+            'loop_s': loop_s,
+            'batch_s': batch_s,
+            'speedup': loop_s / batch_s,
+            'batch_messages_per_s': count / batch_s,
+            'batch_mb_s': characters / batch_s / 1e6,
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.batch', description="Batch vs scalar ciphers")
+    parser.add_argument('--messages', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--loop-limit', type=int, default=100_000, help="Most messages timed in the scalar loop")
+    parser.add_argument('--json', action='store_true', help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    rows = [run(count, args.loop_limit) for count in args.messages]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return rows
+
+    print(f"{'batch':<22} {'scalar loop':>13} {'batch':>11} {'speedup':>8} {'messages/s':>12}")
+    for row in rows:
+        estimated = ' est.' if row['loop_measured'] < row['messages'] else '     '
+        for name in ('caesar', 'vigenere'):
+            result = row[name]
+            print(f"{name + ' x ' + format(row['messages'], ','):<22} {result['loop_s']:>8.2f} s{estimated}"
+                  f"{result['batch_s']:>9.3f} s {result['speedup']:>7.0f}x {result['batch_messages_per_s']:>12,.0f}")
+    return rows
+
+
+if __name__ == '__main__':
+    main()
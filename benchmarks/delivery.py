@@ -0,0 +1,189 @@
+"""
+Delivery endpoints under load: sync WSGI workers vs the native async path (asgi.py)
+
+Starts local stand-ins for the Resend and Twilio APIs that answer after a
+fixed latency. The server is then run twice against them with the same
+number of workers: gunicorn with sync workers (wsgi:app), then gunicorn with
+uvicorn workers (asgi:app). One delivery route is hammered with
+benchmarks.loadtest.run_load, and the most provider calls the stubs saw in
+flight at once is reported.
+
+    python -m benchmarks.delivery                               # send-sms, 200 clients
+    python -m benchmarks.delivery --route email --latency 0.3 --workers 2
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.loadtest import ROOT, run_load, wait_for_server
+
+# Worker recycling (max_requests) is off: at async rates it would restart the
+# only worker every few seconds and reset every client connection
+_GUNICORN = ['-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '/dev/null', '--max-requests', '0']
+SERVERS = {
+    'wsgi': [*_GUNICORN, 'wsgi:app'],
+    'asgi': [*_GUNICORN, '-k', 'uvicorn.workers.UvicornWorker', 'asgi:app'],
+}
+
+BODIES = {
+    'sms': ('/api/v1/send-sms', {
+        'receiver_phone': '+15550100',
+        'password_hint': 'Your PDF password is: load-test',
+        'sender_name': 'Load Test',
+    }),
+    'email': ('/api/v1/send-encrypted-email', {
+        'message': 'The quick brown fox jumps over the lazy dog.',
+        'receiver_email': 'receiver@example.com',
+        'sender_name': 'Load Test',
+        'cipher_type': 'vigenere',
+        'cipher_params': {'keyword': 'SECRET'},
+        'pdf_password': 'load-test',
+        'receiver_phone': '+15550100',
+    }),
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # Hundreds of clients connect at once
+
+
+class StubProviders:
+    """
+    Resend (POST /emails) and Twilio (POST /2010-04-01/Accounts/<sid>/Messages.json)
+    on 127.0.0.1, each answering after ``latency`` seconds.
+
+    ``emails`` / ``messages`` count accepted calls; ``max_in_flight`` is the
+    most calls being served at once.
+    """
+
+    def __init__(self, latency: float = 0.1):
+        self.latency = latency
+        self.emails = 0
+        self.messages = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, as the providers do
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, body):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with stub._lock:
+                    stub._in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub._in_flight)
+                try:
+                    time.sleep(stub.latency)
+                    if self.path == '/emails':
+                        with stub._lock:
+                            stub.emails += 1
+                        self.send_json(200, {'id': str(uuid.uuid4())})
+                    elif self.path.startswith('/2010-04-01/Accounts/') and self.path.endswith('/Messages.json'):
+                        with stub._lock:
+                            stub.messages += 1
+                        self.send_json(201, {'sid': 'SM' + uuid.uuid4().hex, 'status': 'queued'})
+                    else:
+                        self.send_json(404, {'message': 'not found'})
+                finally:
+                    with stub._lock:
+                        stub._in_flight -= 1
+
+        self.server = _Server(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def reset(self):
+        with self._lock:
+            self.emails = self.messages = self.max_in_flight = 0
+
+    def environment(self) -> dict:
+        """Server environment pointing both providers at the stub."""
+        return {
+            'RESEND_API_URL': self.url,
+            'RESEND_API_KEY': 'stub-key',
+            'TWILIO_API_URL': self.url,
+            'TWILIO_ACCOUNT_SID': 'ACstub',
+            'TWILIO_AUTH_TOKEN': 'stub-token',
+            'TWILIO_PHONE_NUMBER': '+15550199',
+        }
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_server(kind: str, stub: StubProviders, args) -> dict:
+    path, body = BODIES[args.route]
+    env = dict(os.environ, **stub.environment(), PORT=str(args.port), WEB_CONCURRENCY=str(args.workers),
+               RATE_LIMIT_ENABLED='false')
+    server = subprocess.Popen([sys.executable, *SERVERS[kind]], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server('127.0.0.1', args.port, timeout=180)
+        stub.reset()
+        result = run_load(f'http://127.0.0.1:{args.port}', args.duration, args.concurrency,
+                          json.dumps(body).encode(), path=path)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    result.update(server=kind, emails=stub.emails, messages=stub.messages,
+                  provider_max_in_flight=stub.max_in_flight)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.delivery',
+                                     description="Load test the delivery endpoints against local provider stubs")
+    parser.add_argument('--route', choices=sorted(BODIES), default='sms', help="Delivery endpoint to hammer")
+    parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['wsgi', 'asgi'])
+    parser.add_argument('--latency', type=float, default=0.2, help="Provider latency per call in seconds")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per server")
+    parser.add_argument('--concurrency', type=int, default=200, help="Client threads")
+    parser.add_argument('--workers', type=int, default=1, help="Server worker processes")
+    parser.add_argument('--port', type=int, default=5077, help="Server port")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON only")
+    args = parser.parse_args(argv)
+
+    with StubProviders(latency=args.latency) as stub:
+        results = [run_server(kind, stub, args) for kind in args.servers]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return results
+
+    path = BODIES[args.route][0]
+    print(f"POST {path}: {args.concurrency} clients, {args.workers} worker(s), "
+          f"provider latency {args.latency * 1e3:.0f} ms")
+    print(f"{'server':<6} {'req/s':>8} {'ok':>7} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9} {'in flight':>10}")
+    for row in results:
+        print(f"{row['server']:<6} {row['req_per_s']:>8} {row['requests']:>7} {row['errors']:>7} "
+              f"{row['p50_ms']:>9} {row['p99_ms']:>9} {row['provider_max_in_flight']:>10}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark timing, result files and baseline comparison
+"""
+
+import json
+import platform
+import statistics
+import sys
+import time
+
+
+def measure(func, min_time: float = 0.1, repeat: int = 5) -> dict:
+    """
+    Times ``func()`` like timeit.autorange: the loop count is grown until one
+    round takes at least ``min_time``, then ``repeat`` rounds are timed.
+
+    Returns:
+        dict with per-call median/min/max seconds, loops per round and rounds
+    """
+    func()  # Warm caches and lazy imports outside the timed rounds
+
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    per_call = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        per_call.append((time.perf_counter() - start) / loops)
+
+    return {
+        'median_s': statistics.median(per_call),
+        'min_s': min(per_call),
+        'max_s': max(per_call),
+        'loops': loops,
+        'rounds': repeat,
+    }
+
+
+def environment() -> dict:
+    """Interpreter and library versions recorded alongside the results."""
+    info = {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+    try:
+        import numpy
+        info['numpy'] = numpy.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def save_results(results: dict, path: str):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({'environment': environment(), 'results': results}, fh, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as fh:
+        return json.load(fh)['results']
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.15) -> list:
+    """
+    Compares median timings against a baseline.
+
+    Args:
+        current: name -> measure() result for this run
+        baseline: the same for the saved baseline
+        threshold: Allowed slowdown as a fraction (0.15 = 15% slower)
+
+    Returns:
+        List of dicts (name, baseline_s, current_s, ratio, status) for every
+        benchmark present in both runs; status is 'regression', 'improvement'
+        or 'ok'
+    """
+    rows = []
+    for name in sorted(current):
+        if name not in baseline:
+            continue
+        base = baseline[name]['median_s']
+        now = current[name]['median_s']
+        ratio = now / base if base else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'baseline_s': base, 'current_s': now, 'ratio': ratio, 'status': status})
+    return rows
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:8.1f} µs'
+    if seconds < 1:
+        return f'{seconds * 1e3:8.2f} ms'
+    return f'{seconds:8.3f} s '
@@ -0,0 +1,258 @@
+"""
+Local IPFS gateway and Pinata pinning stand-in
+
+Serves objects by CID from memory over HTTP, with optional per-request
+latency, and accepts pinFileToIPFS / pinList calls like Pinata. Running it
+exercises ipfs_cache (cold fetch, cached reads, concurrent fetches of one
+CID, eviction, corruption recovery) and ipfs_upload (streamed uploads,
+batch pinning with already-pinned content skipped).
+
+    python -m benchmarks.ipfs_stub --latency 0.2 --size 200000
+"""
+
+import argparse
+import json
+import mmap
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ipfs_cid import compute_cid
+
+
+class StubIPFS:
+    """
+    In-memory IPFS gateway and pinning API on 127.0.0.1.
+
+    ``requests`` counts gateway GETs per CID; ``uploads`` counts pinFileToIPFS
+    calls and ``max_parallel_uploads`` the most that were in flight at once.
+    """
+
+    def __init__(self, latency: float = 0.0, jwt: str = 'stub-jwt'):
+        self.objects = {}
+        self.latency = latency
+        self.jwt = jwt
+        self.requests = {}
+        self.uploads = 0
+        self.chunked_uploads = 0
+        self.max_parallel_uploads = 0
+        self._parallel = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, body):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def authorized(self):
+                if self.headers.get('Authorization') == f'Bearer {stub.jwt}':
+                    return True
+                self.send_json(401, {'error': 'unauthorized'})
+                return False
+
+            def do_POST(self):
+                if self.path != '/pinning/pinFileToIPFS':
+                    self.send_error(404)
+                    return
+                if not self.authorized():
+                    return
+                with stub._lock:
+                    stub._parallel += 1
+                    stub.max_parallel_uploads = max(stub.max_parallel_uploads, stub._parallel)
+                try:
+                    if 'Content-Length' not in self.headers:
+                        stub.chunked_uploads += 1
+                        self.send_json(411, {'error': 'length required'})
+                        return
+                    boundary = self.headers['Content-Type'].split('boundary=', 1)[1].encode()
+                    remaining = int(self.headers['Content-Length'])
+                    # Part headers, then the file (spooled to disk so the stub's memory stays
+                    # out of the client's tracemalloc numbers), then the closing boundary
+                    while True:
+                        line = self.rfile.readline()
+                        remaining -= len(line)
+                        if line == b'\r\n':
+                            break
+                    remaining -= len(b'\r\n--' + boundary + b'--\r\n')
+                    spool = tempfile.TemporaryFile()
+                    while remaining:
+                        chunk = self.rfile.read(min(remaining, 1 << 20))
+                        spool.write(chunk)
+                        remaining -= len(chunk)
+                    self.rfile.read(len(b'\r\n--' + boundary + b'--\r\n'))
+                    spool.flush()
+                    data = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) if spool.tell() else b''
+                    time.sleep(stub.latency)
+                    cid = stub.add(data)
+                    with stub._lock:
+                        stub.uploads += 1
+                    self.send_json(200, {'IpfsHash': cid, 'PinSize': len(data)})
+                finally:
+                    with stub._lock:
+                        stub._parallel -= 1
+
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+                if url.path == '/data/pinList':
+                    if self.authorized():
+                        cid = urllib.parse.parse_qs(url.query).get('hashContains', [''])[0]
+                        rows = [{'ipfs_pin_hash': cid}] if cid in stub.objects else []
+                        self.send_json(200, {'count': len(rows), 'rows': rows})
+                    return
+
+                cid = url.path.rsplit('/', 1)[-1]
+                with stub._lock:
+                    stub.requests[cid] = stub.requests.get(cid, 0) + 1
+                time.sleep(stub.latency)
+                data = stub.objects.get(cid)
+                if data is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/octet-stream')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def add(self, data: bytes, cid: str = None) -> str:
+        cid = cid or compute_cid(data)
+        self.objects[cid] = data
+        return cid
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def check_cache(args, gateway: StubIPFS, directory: str) -> int:
+    from ipfs_cache import IPFSCache
+
+    failures = 0
+    rng = random.Random(0)
+    cache = IPFSCache(directory=directory, max_bytes=args.size * 3, gateway=gateway.url + '/ipfs/')
+    cid = gateway.add(rng.randbytes(args.size))
+
+    data, cold = timed(lambda: cache.read(cid))
+    _, warm = timed(lambda: cache.read(cid))
+    print(f"cold fetch   {cold * 1e3:8.2f} ms")
+    print(f"cached read  {warm * 1e3:8.2f} ms  ({cold / warm:.0f}x faster)")
+    failures += data != gateway.objects[cid]
+
+    shared = gateway.add(rng.randbytes(args.size))
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results, elapsed = timed(lambda: list(pool.map(lambda _: cache.read(shared), range(args.concurrency))))
+    print(f"{args.concurrency} concurrent readers: {gateway.requests[shared]} gateway request(s) "
+          f"in {elapsed * 1e3:.2f} ms")
+    failures += gateway.requests[shared] != 1 or any(r != gateway.objects[shared] for r in results)
+
+    # Corrupt the cached copy: it must be detected and refetched
+    with open(os.path.join(directory, cid), 'r+b') as fh:
+        fh.write(b'\xff\xff\xff\xff')
+    failures += cache.read(cid) != gateway.objects[cid]
+    print(f"corrupted entry refetched: {gateway.requests[cid] == 2}")
+    failures += gateway.requests[cid] != 2
+
+    # A gateway serving the wrong bytes is rejected and nothing is cached
+    bad = gateway.add(b'not the content', cid=compute_cid(b'expected content'))
+    try:
+        cache.read(bad)
+        failures += 1
+    except ValueError:
+        print("mismatched content rejected: True")
+    failures += os.path.exists(os.path.join(directory, bad))
+
+    for _ in range(4):
+        cache.read(gateway.add(rng.randbytes(args.size)))
+    stats = cache.stats()
+    print(f"after eviction: {stats['objects']} objects, {stats['bytes']} / {stats['max_bytes']} bytes")
+    failures += stats['bytes'] > stats['max_bytes']
+    return failures
+
+
+def check_uploads(args, gateway: StubIPFS, directory: str) -> int:
+    from ipfs_upload import PinataClient
+
+    failures = 0
+    rng = random.Random(1)
+    client = PinataClient(jwt=gateway.jwt, api_url=gateway.url, pool_size=args.concurrency)
+
+    # Stream a large file from disk; client memory must stay far below its size
+    big_path = os.path.join(directory, 'upload.bin')
+    big_size = 64 << 20
+    with open(big_path, 'wb') as fh:
+        for _ in range(big_size >> 20):
+            fh.write(rng.randbytes(1 << 20))
+    tracemalloc.start()
+    (result, elapsed) = timed(lambda: client.upload(big_path))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    with open(big_path, 'rb') as fh:
+        expected = compute_cid(fh.read())
+    print(f"streamed {big_size >> 20} MiB upload in {elapsed * 1e3:.0f} ms, client peak {peak / 2**20:.2f} MiB")
+    failures += result['cid'] != expected or peak > 8 << 20 or gateway.chunked_uploads
+
+    # Batch: half the items are already pinned and must be skipped
+    items = [rng.randbytes(args.size) for _ in range(2 * args.concurrency)]
+    for item in items[::2]:
+        gateway.add(item)
+    before = gateway.uploads
+    results, elapsed = timed(lambda: client.upload_many(items, max_workers=4))
+    uploaded = sum(r['uploaded'] for r in results if r['success'])
+    print(f"batch of {len(items)}: {uploaded} uploaded, {len(items) - uploaded} already pinned, "
+          f"max {gateway.max_parallel_uploads} in flight, {elapsed * 1e3:.0f} ms")
+    failures += gateway.uploads - before != len(items) // 2 or gateway.max_parallel_uploads > 4
+    failures += any(not r['success'] or r['cid'] != compute_cid(item) for r, item in zip(results, items))
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.ipfs_stub',
+                                     description="Exercise the IPFS cache and uploads against local stand-ins")
+    parser.add_argument('--latency', type=float, default=0.1, help="Stub latency per request in seconds")
+    parser.add_argument('--size', type=int, default=100_000, help="Object size in bytes")
+    parser.add_argument('--concurrency', type=int, default=16, help="Parallel readers / batch size")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='holocrypt-ipfs-')
+    try:
+        with StubIPFS(latency=args.latency) as gateway:
+            failures = check_cache(args, gateway, os.path.join(directory, 'cache'))
+            failures += check_uploads(args, gateway, directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print("OK" if not failures else f"{failures} check(s) FAILED")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
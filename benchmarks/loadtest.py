@@ -0,0 +1,157 @@
+"""
+HoloCrypt HTTP load test
+
+Hammers /api/v1/encrypt with keep-alive connections from a pool of client
+threads and reports throughput and latency percentiles.
+
+    # against an already running server
+    python -m benchmarks.loadtest --url http://localhost:5001
+
+    # start gunicorn with gunicorn.conf.py, test it, then stop it
+    python -m benchmarks.loadtest --spawn --duration 20 --concurrency 32
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def wait_for_server(host: str, port: int, timeout: float = 60.0):
+    """Poll the health endpoint until the server answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/api/v1/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Server on {host}:{port} did not become healthy within {timeout}s")
+
+
+def run_load(url: str, duration: float, concurrency: int, body: bytes, path: str = '/api/v1/encrypt') -> dict:
+    """
+    Runs ``concurrency`` client threads for ``duration`` seconds.
+
+    Returns:
+        dict with request count, errors, req/s and latency percentiles (ms)
+    """
+    parsed = urllib.parse.urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+    headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    stop_at = time.perf_counter() + duration
+
+    def client(slot: int):
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn.request('POST', path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[slot] += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                errors[slot] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            latencies[slot].append(time.perf_counter() - start)
+        conn.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = sorted(value for slot in latencies for value in slot)
+    return {
+        'path': path,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'requests': len(samples),
+        'errors': sum(errors),
+        'req_per_s': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 2),
+        'p90_ms': round(percentile(samples, 90) * 1000, 2),
+        'p99_ms': round(percentile(samples, 99) * 1000, 2),
+        'max_ms': round(samples[-1] * 1000, 2) if samples else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the HoloCrypt /api/v1/encrypt endpoint")
+    parser.add_argument('--url', default='http://127.0.0.1:5001', help="Server base URL")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run")
+    parser.add_argument('--concurrency', type=int, default=16, help="Client threads")
+    parser.add_argument('--message-size', type=int, default=256, help="Plaintext characters per request")
+    parser.add_argument('--cipher', default='vigenere', help="Cipher type to request")
+    parser.add_argument('--spawn', action='store_true', help="Start gunicorn -c gunicorn.conf.py wsgi:app for the run")
+    parser.add_argument('--json', action='store_true', help="Print the result as JSON only")
+    args = parser.parse_args(argv)
+
+    message = ('The quick brown fox jumps over the lazy dog. ' * (args.message_size // 45 + 1))[:args.message_size]
+    body = json.dumps({
+        'message': message,
+        'cipher_type': args.cipher,
+        'cipher_params': {'shift': 5, 'keyword': 'SECRET', 'rails': 3}
+    }).encode()
+
+    parsed = urllib.parse.urlparse(args.url)
+    server = None
+    if args.spawn:
+        env = dict(os.environ, PORT=str(parsed.port or 5001))
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '/dev/null', 'wsgi:app'],
+            cwd=ROOT, env=env
+        )
+
+    try:
+        wait_for_server(parsed.hostname, parsed.port or 80)
+        result = run_load(args.url, args.duration, args.concurrency, body)
+        result['message_size'] = args.message_size
+        result['cipher'] = args.cipher
+    finally:
+        if server is not None:
+            server.terminate()  # SIGTERM: graceful shutdown
+            server.wait(timeout=60)
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print("=" * 60)
+        print(f"POST {result['path']}  ({args.cipher}, {args.message_size} chars, {args.concurrency} clients)")
+        print("=" * 60)
+        print(f"Requests:   {result['requests']}  ({result['errors']} errors) in {result['duration_s']}s")
+        print(f"Throughput: {result['req_per_s']} req/s")
+        print(f"Latency:    p50 {result['p50_ms']} ms | p90 {result['p90_ms']} ms | "
+              f"p99 {result['p99_ms']} ms | max {result['max_ms']} ms")
+    return result
+
+
+if __name__ == '__main__':
+    main()
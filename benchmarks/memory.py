@@ -0,0 +1,76 @@
+"""
+Peak-memory comparison: hand-wired Fernet + stego vs seal_into_image/open_from_image
+
+    python -m benchmarks.memory --sizes 1024 16384 49152
+
+Peak Python/NumPy heap is measured with tracemalloc. PIL's internal image
+storage is not traced; both paths allocate exactly one output image there.
+"""
+
+import argparse
+import json
+import random
+import tracemalloc
+
+
+def peak_bytes(func) -> int:
+    """Peak traced allocation while running ``func()``."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak memory of the seal/open pipeline")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1024, 16384, 49152],
+                        help="Payload sizes in bytes")
+    parser.add_argument('--json', action='store_true', help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    from PIL import Image
+    from holocrypt_enhanced import (generate_key, encrypt_data, decrypt_data, hide_data_in_image,
+                                    extract_data_from_image, generate_access_code_hash,
+                                    seal_into_image, open_from_image)
+
+    # A cover with room for the largest legacy payload (base64 + JSON inflate it)
+    side = 2 * int((max(args.sizes) * 8 * 1.5 / 3) ** 0.5) + 64
+    cover = Image.new('RGB', (side, side), 'white')
+    access_code = 'bench-code'
+    results = []
+
+    for size in args.sizes:
+        data = random.Random(size).randbytes(size)
+        key = generate_key()
+
+        legacy_image = hide_data_in_image(cover, encrypt_data(data, key), generate_access_code_hash(access_code))
+        sealed_image = seal_into_image(data, access_code, cover)
+
+        row = {
+            'size': size,
+            'legacy_embed': peak_bytes(lambda: hide_data_in_image(
+                cover, encrypt_data(data, key), generate_access_code_hash(access_code))),
+            'sealed_embed': peak_bytes(lambda: seal_into_image(data, access_code, cover)),
+            'legacy_extract': peak_bytes(lambda: decrypt_data(
+                extract_data_from_image(legacy_image, access_code), key)),
+            'sealed_extract': peak_bytes(lambda: open_from_image(sealed_image, access_code)),
+        }
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return results
+
+    print(f"cover image {side}x{side} RGB ({side * side * 3 / 1e6:.1f} MB of pixels)")
+    print(f"{'payload':>9} {'legacy embed':>14} {'sealed embed':>14} {'legacy extract':>16} {'sealed extract':>16}")
+    for row in results:
+        print(f"{row['size']:>9} {row['legacy_embed'] / 1e6:>11.2f} MB {row['sealed_embed'] / 1e6:>11.2f} MB "
+              f"{row['legacy_extract'] / 1e6:>13.2f} MB {row['sealed_extract'] / 1e6:>13.2f} MB")
+    return results
+
+
+if __name__ == '__main__':
+    main()
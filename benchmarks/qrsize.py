@@ -0,0 +1,97 @@
+"""
+QR version and render time: legacy redirect query string vs the compact payload (qr_payload)
+
+    python -m benchmarks.qrsize
+    python -m benchmarks.qrsize --sizes 64 256 1024 --json
+
+Messages are random draws from a fixed English vocabulary (so they compress
+like prose rather than like a repeated sentence), enciphered before
+encoding. Render time is qrcode fitting plus image creation, as in
+generate_qr_with_redirect.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from benchmarks.suite import SAMPLE_TEXT, CIPHER_PARAMS
+
+URL = 'https://holocrypt-ewmtjmjwtyue4v8bkc2uik.streamlit.app'
+ENCODINGS = ('legacy', 'base64url', 'base45')
+
+
+def prose(size: int, seed: int = 0) -> str:
+    vocabulary = SAMPLE_TEXT.split()
+    rng = random.Random(seed)
+    text = ''
+    while len(text) < size:
+        text += rng.choice(vocabulary) + ' '
+    return text[:size]
+
+
+def redirect_url(text: str, cipher_type: str, params: dict, encoding: str) -> str:
+    import base64
+    import urllib.parse
+    import qr_payload
+
+    if encoding == 'legacy':
+        query = urllib.parse.urlencode({
+            'data': base64.urlsafe_b64encode(text.encode()).decode(),
+            'cipher': cipher_type,
+            'params': base64.urlsafe_b64encode(json.dumps(params).encode()).decode()
+        })
+    else:
+        query = qr_payload.encode_query(text, cipher_type, params, encoding)
+    return f"{URL}?{query}"
+
+
+def render(url: str, loops: int = 3) -> tuple:
+    """(QR version, best render seconds) at the error correction the app uses."""
+    import qrcode
+
+    best = float('inf')
+    for _ in range(loops):
+        start = time.perf_counter()
+        qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=4)
+        qr.add_data(url)
+        qr.make(fit=True)
+        qr.make_image(fill_color="black", back_color="white").convert('RGB')
+        best = min(best, time.perf_counter() - start)
+    return qr.version, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.qrsize', description="QR payload size comparison")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[32, 128, 256, 512])
+    parser.add_argument('--json', action='store_true', help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    from holocrypt_enhanced import shuffle_data_by_cipher
+
+    rows = []
+    for size in args.sizes:
+        for cipher_type in ('caesar', 'vigenere'):
+            params = CIPHER_PARAMS[cipher_type]
+            text = shuffle_data_by_cipher(prose(size), cipher_type, params)
+            row = {'size': size, 'cipher': cipher_type}
+            for encoding in ENCODINGS:
+                url = redirect_url(text, cipher_type, params, encoding)
+                version, seconds = render(url)
+                row[encoding] = {'url_chars': len(url), 'version': version, 'render_s': seconds}
+            rows.append(row)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return rows
+
+    print(f"{'message':<16}" + ''.join(f"{encoding:>24}" for encoding in ENCODINGS))
+    for row in rows:
+        cells = ''.join(f"{row[e]['url_chars']:>6} ch  v{row[e]['version']:<3}{row[e]['render_s'] * 1e3:>7.1f} ms"
+                        for e in ENCODINGS)
+        print(f"{row['cipher'] + '/' + str(row['size']):<16}{cells}")
+    return rows
+
+
+if __name__ == '__main__':
+    main()
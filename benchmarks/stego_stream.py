@@ -0,0 +1,96 @@
+"""
+Peak memory and time: hide_data_in_image on a decoded cover vs hide_data_in_png streaming it
+
+    python -m benchmarks.stego_stream                     # 4000x4000 cover
+    python -m benchmarks.stego_stream --sides 2000 8000 --json
+
+Each embed runs in a fresh subprocess. Peak memory is the growth of the
+process's maximum RSS (ru_maxrss) over its value once the modules are
+imported, so PIL's own pixel storage is counted too.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ACCESS_CODE = 'bench-code'
+PAYLOAD_SIZE = 64 * 1024
+
+
+def make_cover(path: str, side: int):
+    """A noisy RGB PNG written band by band, so building it stays small too."""
+    import numpy as np
+    from png_stream import PNGWriter, band_rows
+
+    rng = np.random.default_rng(side)
+    rows = band_rows(side)
+    with PNGWriter(path, side, side, compress_level=1) as writer:
+        for top in range(0, side, rows):
+            writer.write(rng.integers(0, 256, (min(rows, side - top), side, 3), dtype=np.uint8))
+
+
+def _peak_rss() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Linux reports KiB
+
+
+def worker(mode: str, source: str, destination: str):
+    from PIL import Image
+    from holocrypt_enhanced import hide_data_in_image, hide_data_in_png, generate_access_code_hash
+
+    data = os.urandom(PAYLOAD_SIZE)
+    access_code_hash = generate_access_code_hash(ACCESS_CODE)
+    before = _peak_rss()
+    start = time.perf_counter()
+    if mode == 'image':
+        hide_data_in_image(Image.open(source), data, access_code_hash).save(destination, 'PNG')
+    else:
+        hide_data_in_png(source, destination, data, access_code_hash)
+    print(json.dumps({'seconds': time.perf_counter() - start, 'peak_bytes': _peak_rss() - before}))
+
+
+def measure(mode: str, source: str, destination: str) -> dict:
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.stego_stream', '--worker', mode, source, destination],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak memory of whole-image vs streamed stego embedding")
+    parser.add_argument('--sides', type=int, nargs='+', default=[4000], help="Cover sizes (square, pixels)")
+    parser.add_argument('--json', action='store_true', help="Print JSON only")
+    parser.add_argument('--worker', nargs=3, metavar=('MODE', 'SOURCE', 'DESTINATION'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        worker(*args.worker)
+        return None
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for side in args.sides:
+            source = os.path.join(directory, f'cover-{side}.png')
+            make_cover(source, side)
+            row = {'side': side, 'pixel_bytes': side * side * 3}
+            for mode in ('image', 'stream'):
+                row[mode] = measure(mode, source, os.path.join(directory, f'{mode}-{side}.png'))
+            results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return results
+
+    print(f"{'cover':>11} {'pixels':>9} {'image peak':>12} {'stream peak':>12} {'image time':>11} {'stream time':>12}")
+    for row in results:
+        print(f"{row['side']:>5}x{row['side']:<5} {row['pixel_bytes'] / 1e6:>6.1f} MB "
+              f"{row['image']['peak_bytes'] / 1e6:>9.1f} MB {row['stream']['peak_bytes'] / 1e6:>9.1f} MB "
+              f"{row['image']['seconds']:>10.2f}s {row['stream']['seconds']:>11.2f}s")
+    return results
+
+
+if __name__ == '__main__':
+    main()
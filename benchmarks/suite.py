@@ -0,0 +1,209 @@
+"""
+Benchmark cases for the HoloCrypt hot paths
+
+Every group is a generator of (name, callable) pairs, or (name, callable,
+bytes_processed) to also report throughput. Nothing here touches the network:
+delivery endpoints (Resend, Twilio, IPFS) are deliberately excluded.
+"""
+
+import functools
+import itertools
+import random
+
+SAMPLE_TEXT = (
+    "The quick brown fox jumps over the lazy dog while HoloCrypt hides the "
+    "secret meeting point, 42 paces north of the old lighthouse. "
+)
+
+CIPHER_PARAMS = {
+    'caesar': {'shift': 5},
+    'vigenere': {'keyword': 'SECRET'},
+    'atbash': {},
+    'substitution': {'substitution_key': 'QWERTYUIOPASDFGHJKLZXCVBNM'},
+    'rail_fence': {'rails': 3},
+    'permutation': {'key': 'bench-key'},
+    'chain': {'steps': [
+        {'cipher_type': 'vigenere', 'cipher_params': {'keyword': 'SECRET'}},
+        {'cipher_type': 'rail_fence', 'cipher_params': {'rails': 3}},
+        {'cipher_type': 'atbash'},
+    ]},
+}
+DECIPHERABLE = tuple(CIPHER_PARAMS)
+
+
+def sample_text(size: int, seed: int = 0) -> str:
+    """Deterministic English-like text of exactly ``size`` characters."""
+    text = SAMPLE_TEXT * (size // len(SAMPLE_TEXT) + 1)
+    offset = random.Random(seed).randrange(len(SAMPLE_TEXT))
+    return (text + text)[offset:offset + size]
+
+
+def cipher_cases(quick: bool):
+    from holocrypt_enhanced import shuffle_data_by_cipher, decipher_data
+
+    sizes = (64, 1024) if quick else (64, 1024, 16384)
+    for size in sizes:
+        text = sample_text(size)
+        for cipher_type, params in CIPHER_PARAMS.items():
+            yield (f'cipher/{cipher_type}/encrypt/{size}',
+                   lambda t=text, c=cipher_type, p=params: shuffle_data_by_cipher(t, c, p))
+            if cipher_type in DECIPHERABLE:
+                encrypted = shuffle_data_by_cipher(text, cipher_type, params)
+                yield (f'cipher/{cipher_type}/decrypt/{size}',
+                       lambda e=encrypted, c=cipher_type, p=params: decipher_data(e, c, p))
+        # A new key per call: the permutation is generated instead of cached
+        keys = itertools.count()
+        yield (f'cipher/permutation/encrypt-uncached/{size}',
+               lambda t=text, k=keys: shuffle_data_by_cipher(t, 'permutation', {'key': next(k)}))
+        # The chain applied one call per step, as API clients had to before
+        yield (f'cipher/chain-stepwise/encrypt/{size}',
+               lambda t=text: functools.reduce(lambda data, step: shuffle_data_by_cipher(
+                   data, step['cipher_type'], step.get('cipher_params', {})), CIPHER_PARAMS['chain']['steps'], t))
+
+
+def bytes_cases(quick: bool):
+    from holocrypt_enhanced import shuffle_data_by_cipher
+    from byte_ciphers import shuffle_bytes_by_cipher, decipher_bytes
+
+    # The str API at the same size is the baseline the byte API replaces
+    baseline = sample_text(65536)
+    yield ('bytes/str-baseline/vigenere/65536',
+           lambda: shuffle_data_by_cipher(baseline, 'vigenere', CIPHER_PARAMS['vigenere']), 65536)
+
+    sizes = (65536, 1 << 20) if quick else (65536, 1 << 20, 16 << 20)
+    for size in sizes:
+        data = sample_text(size).encode('utf-8')
+        out = bytearray(size)
+        for cipher_type, params in CIPHER_PARAMS.items():
+            yield (f'bytes/{cipher_type}/encrypt/{size}',
+                   lambda d=data, o=out, c=cipher_type, p=params: shuffle_bytes_by_cipher(d, c, p, o), size)
+            yield (f'bytes/{cipher_type}/decrypt/{size}',
+                   lambda d=data, o=out, c=cipher_type, p=params: decipher_bytes(d, c, p, o), size)
+
+
+def solver_cases(quick: bool):
+    from holocrypt_enhanced import shuffle_data_by_cipher
+    from cipher_solver import crack
+
+    sizes = (256, 1024) if quick else (256, 1024, 4096, 16384)
+    for size in sizes:
+        text = sample_text(size)
+        for cipher_type in ('caesar', 'atbash', 'rail_fence', 'vigenere'):
+            encrypted = shuffle_data_by_cipher(text, cipher_type, CIPHER_PARAMS[cipher_type])
+            yield f'solver/{cipher_type}/{size}', lambda e=encrypted: crack(e), size
+
+
+def puzzle_cases(quick: bool):
+    from holocrypt_enhanced import generate_puzzle_with_nltk, seeded_puzzle
+
+    # easy/hard scan the whole NLTK word list once per word
+    text = sample_text(60 if quick else 200)
+    for difficulty in ('easy', 'medium', 'hard'):
+        yield (f'puzzle/{difficulty}/{len(text)}',
+               lambda d=difficulty: generate_puzzle_with_nltk(text, difficulty=d))
+    # Repeat wrong guesses on one ciphertext: served from the puzzle cache
+    yield f'puzzle/seeded_repeat/{len(text)}', lambda: seeded_puzzle(text, difficulty='medium')
+
+
+def stego_cases(quick: bool):
+    from holocrypt_enhanced import (generate_base_qr, hide_data_in_image, extract_data_from_image,
+                                    generate_access_code_hash)
+
+    cover = generate_base_qr()
+    access_code = 'bench-code'
+    code_hash = generate_access_code_hash(access_code)
+    sizes = (64, 4096) if quick else (64, 4096, 32768)
+    for size in sizes:
+        payload = random.Random(size).randbytes(size)
+        yield (f'stego/hide/{size}', lambda p=payload: hide_data_in_image(cover, p, code_hash))
+        stego = hide_data_in_image(cover, payload, code_hash)
+        yield (f'stego/extract/{size}', lambda s=stego: extract_data_from_image(s, access_code))
+
+
+def qr_cases(quick: bool):
+    from holocrypt_enhanced import generate_qr_with_redirect
+
+    sizes = (32, 256) if quick else (32, 256, 512)
+    for size in sizes:
+        text = sample_text(size)
+        for encoding in ('legacy', 'base64url', 'base45'):
+            yield (f'qr/redirect/{encoding}/{size}',
+                   lambda t=text, e=encoding: generate_qr_with_redirect('http://localhost', t, 'caesar', {'shift': 5},
+                                                                        encoding=e))
+
+
+def pdf_cases(quick: bool):
+    from holocrypt_enhanced import generate_qr_with_redirect, create_qr_pdf
+
+    text = sample_text(512)
+    qr_image = generate_qr_with_redirect('http://localhost', text[:128], 'caesar', {'shift': 5})
+    for label, password in (('plain', None), ('password', 'bench-password')):
+        yield (f'pdf/{label}',
+               lambda p=password: create_qr_pdf(qr_image, text, 'caesar', {'shift': 5},
+                                                'bench@localhost', 'Bench', pdf_password=p))
+
+
+def http_cases(quick: bool):
+    from app import create_app
+
+    client = create_app({'TESTING': True, 'RATE_LIMIT_ENABLED': False}).test_client()
+    text = sample_text(1024)
+    requests = {
+        'health': ('GET', '/api/v1/health', None),
+        'ciphers': ('GET', '/api/v1/ciphers', None),
+        'encrypt': ('POST', '/api/v1/encrypt',
+                    {'message': text, 'cipher_type': 'vigenere', 'cipher_params': {'keyword': 'SECRET'}}),
+        'decrypt': ('POST', '/api/v1/decrypt',
+                    {'encrypted_text': text, 'cipher_type': 'vigenere', 'cipher_params': {'keyword': 'SECRET'}}),
+        'validate-decrypt': ('POST', '/api/v1/validate-decrypt',
+                             {'encrypted_text': text[:200], 'provided_cipher': 'caesar',
+                              'provided_params': {'shift': 4}, 'actual_cipher': 'caesar',
+                              'actual_params': {'shift': 5}}),
+        'cipher-clue': ('POST', '/api/v1/cipher-clue',
+                        {'cipher_type': 'rail_fence', 'cipher_params': {'rails': 3}}),
+        'generate-qr': ('POST', '/api/v1/generate-qr',
+                        {'encrypted_text': text[:256], 'cipher_type': 'caesar', 'cipher_params': {'shift': 5}}),
+    }
+    for name, (method, path, body) in requests.items():
+        def call(method=method, path=path, body=body):
+            response = client.open(path, method=method, json=body)
+            if response.status_code != 200:
+                raise RuntimeError(f'{method} {path} returned {response.status_code}')
+        yield f'http/{name}', call
+
+
+def crypto_cases(quick: bool):
+    import io
+    from cryptography.fernet import Fernet
+    from holocrypt_enhanced import generate_key, encrypt_data, decrypt_data, encrypt_stream, decrypt_stream
+
+    key = generate_key()
+    sizes = (1024, 1 << 20) if quick else (1024, 1 << 20, 16 << 20)
+    for size in sizes:
+        data = random.Random(size).randbytes(size)
+        token = encrypt_data(data, key)
+        # The pre-cache path: a fresh Fernet per call
+        yield f'crypto/fernet_uncached/encrypt/{size}', lambda d=data: Fernet(key).encrypt(d), size
+        yield f'crypto/fernet/encrypt/{size}', lambda d=data: encrypt_data(d, key), size
+        yield f'crypto/fernet/decrypt/{size}', lambda t=token: decrypt_data(t, key), size
+
+        sealed = io.BytesIO()
+        encrypt_stream(io.BytesIO(data), sealed, key)
+        sealed = sealed.getvalue()
+        yield (f'crypto/stream/encrypt/{size}',
+               lambda d=data: encrypt_stream(io.BytesIO(d), io.BytesIO(), key), size)
+        yield (f'crypto/stream/decrypt/{size}',
+               lambda s=sealed: decrypt_stream(io.BytesIO(s), io.BytesIO(), key), size)
+
+
+GROUPS = {
+    'cipher': cipher_cases,
+    'bytes': bytes_cases,
+    'solver': solver_cases,
+    'puzzle': puzzle_cases,
+    'stego': stego_cases,
+    'qr': qr_cases,
+    'pdf': pdf_cases,
+    'http': http_cases,
+    'crypto': crypto_cases,
+}
@@ -0,0 +1,99 @@
+"""
+Memory and lookup cost: NLTK word list vs the mapped word set (word_set)
+
+    python -m benchmarks.wordset
+
+Uses the NLTK words corpus when installed; otherwise a synthetic corpus of
+the same size, so the numbers stay comparable offline. Python heap is
+measured with tracemalloc; the word set's mapped file lives in the page
+cache, shared by every worker, and is reported separately.
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+
+NLTK_WORD_COUNT = 236_736
+
+
+def synthetic_corpus(count: int = NLTK_WORD_COUNT) -> list:
+    rng = random.Random(0)
+    return [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 14))) for _ in range(count)]
+
+
+def retained_bytes(func):
+    """(result, Python heap still held by the result) of ``func()``."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        return result, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def per_call(func, loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return (time.perf_counter() - start) / loops
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Word list vs mapped word set")
+    parser.add_argument('--json', action='store_true', help="Print JSON only")
+    args = parser.parse_args(argv)
+
+    from word_set import WordSet, build_word_set, corpus_words
+
+    try:
+        corpus_words()
+        load_list, source = corpus_words, 'nltk'
+    except LookupError:
+        load_list, source = synthetic_corpus, 'synthetic'
+
+    # Both sources create fresh strings, so the strings count towards the list
+    word_list, list_bytes = retained_bytes(load_list)
+    text = ' '.join(random.Random(1).choices(word_list, k=200))
+    probe = word_list[len(word_list) // 2]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'words.bin')
+        build_seconds = per_call(lambda: build_word_set(word_list, path), 1)
+        words, set_heap = retained_bytes(lambda: WordSet(path))
+        lookup_set = set(word_list)
+
+        results = {
+            'source': source,
+            'words': len(word_list),
+            'list_heap_bytes': list_bytes,
+            'word_set_heap_bytes': set_heap,
+            'word_set_file_bytes': os.path.getsize(path),
+            'build_s': build_seconds,
+            'lookup_list_s': per_call(lambda: probe in word_list, 20),
+            'lookup_python_set_s': per_call(lambda: probe in lookup_set, 10000),
+            'lookup_word_set_s': per_call(lambda: probe in words, 10000),
+            'english_score_200_words_s': per_call(lambda: words.english_score(text), 200),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return results
+
+    print(f"corpus: {source}, {results['words']} words")
+    print(f"word list        {list_bytes / 1e6:8.2f} MB Python heap per process")
+    print(f"mapped word set  {set_heap / 1e6:8.2f} MB Python heap + "
+          f"{results['word_set_file_bytes'] / 1e6:.2f} MB shared page cache (built in {build_seconds:.2f} s)")
+    print(f"lookup: list {results['lookup_list_s'] * 1e3:.2f} ms, set {results['lookup_python_set_s'] * 1e6:.2f} µs, "
+          f"word set {results['lookup_word_set_s'] * 1e6:.2f} µs")
+    print(f"english_score (200 words): {results['english_score_200_words_s'] * 1e6:.0f} µs")
+    return results
+
+
+if __name__ == '__main__':
+    main()
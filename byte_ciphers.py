@@ -0,0 +1,354 @@
+"""
+HoloCrypt Byte Ciphers
+The classical ciphers over bytes, bytearray and memoryview, with no text decoding
+
+Only ASCII letters are enciphered, so for ASCII (or UTF-8) input the result
+matches the str ciphers byte for byte, and every other byte, including
+multi-byte UTF-8 sequences, is left alone. Rail fence and the permutation
+cipher move bytes rather than characters.
+
+Caesar, Atbash and substitution are one 256-entry table lookup, run as
+bytes.translate over cache-sized chunks written into the output buffer.
+Vigenere picks one of those tables per byte, block by block over an
+np.frombuffer view. Rail fence copies strided slices and never builds an
+index array.
+
+Every function takes ``out``: a writable buffer (bytearray, memoryview,
+mmap, NumPy array) at least as long as the input. When it is given, the
+result is written there and ``out`` is returned; otherwise new bytes are
+returned. Table ciphers and Vigenere may run in place (out=data).
+"""
+
+import functools
+import random
+
+import numpy as np
+
+import cipher_chain
+
+BLOCK_SIZE = 1 << 16
+TRANSLATE_CHUNK = 1 << 16
+
+_BYTES = np.arange(256, dtype=np.uint8)
+_UPPER = (_BYTES >= 65) & (_BYTES <= 90)
+_LOWER = (_BYTES >= 97) & (_BYTES <= 122)
+IS_LETTER = _UPPER | _LOWER
+
+
+# --- Buffers ---
+
+def _input(data) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def _output(out, length: int) -> np.ndarray:
+    target = np.frombuffer(out, dtype=np.uint8)
+    if not target.flags.writeable:
+        raise ValueError("out must be a writable buffer")
+    if len(target) < length:
+        raise ValueError(f"out holds {len(target)} bytes, {length} needed")
+    return target[:length]
+
+
+def _result(out, target: np.ndarray):
+    return out if out is not None else target.tobytes()
+
+
+# --- Table ciphers ---
+
+def _letter_table(upper: list, lower: list) -> bytes:
+    table = bytearray(range(256))
+    table[65:91] = bytes(upper)
+    table[97:123] = bytes(lower)
+    return bytes(table)
+
+
+@functools.lru_cache(maxsize=64)
+def _shift_table(shift: int) -> bytes:
+    mapping = [(i + shift) % 26 for i in range(26)]
+    return _letter_table([65 + m for m in mapping], [97 + m for m in mapping])
+
+
+@functools.lru_cache(maxsize=64)
+def _substitution_table(key: str, inverse: bool = False) -> bytes:
+    if len(key) != 26:
+        raise ValueError("Substitution key must have 26 letters")
+    upper = [ord(c) for c in key]
+    lower = [ord(c) for c in key.lower()]
+    if max(upper + lower) > 255:
+        raise ValueError("Substitution key must be ASCII")
+    if not inverse:
+        return _letter_table(upper, lower)
+    table = bytearray(range(256))
+    for i in range(26):
+        table[upper[i]] = 65 + i
+        table[lower[i]] = 97 + i
+    return bytes(table)
+
+
+_ATBASH_TABLE = _letter_table([90 - i for i in range(26)], [122 - i for i in range(26)])
+
+
+def translate_bytes(data, table: bytes, out=None):
+    """Maps every byte through a 256-byte table."""
+    source = memoryview(data).cast('B')
+    if out is None and len(source) <= TRANSLATE_CHUNK:
+        return data.translate(table) if isinstance(data, bytes) else source.tobytes().translate(table)
+
+    buffer = out if out is not None else bytearray(len(source))
+    target = memoryview(buffer).cast('B')
+    if target.readonly:
+        raise ValueError("out must be a writable buffer")
+    if len(target) < len(source):
+        raise ValueError(f"out holds {len(target)} bytes, {len(source)} needed")
+    # Cache-sized chunks run bytes.translate ~2x faster than one large call, and ~4x numpy.take
+    for start in range(0, len(source), TRANSLATE_CHUNK):
+        end = min(start + TRANSLATE_CHUNK, len(source))
+        target[start:end] = source[start:end].tobytes().translate(table)
+    return out if out is not None else bytes(buffer)
+
+
+def caesar_bytes(data, shift: int, out=None):
+    """Caesar cipher encryption over bytes."""
+    return translate_bytes(data, _shift_table(shift % 26), out)
+
+
+def caesar_decipher_bytes(data, shift: int, out=None):
+    """Caesar cipher decryption over bytes."""
+    return translate_bytes(data, _shift_table(-shift % 26), out)
+
+
+def atbash_bytes(data, out=None):
+    """Atbash over bytes (its own inverse)."""
+    return translate_bytes(data, _ATBASH_TABLE, out)
+
+
+def substitution_bytes(data, key: str = None, out=None):
+    """Substitution cipher over bytes; a random key is drawn if none is given."""
+    if key is None:
+        alphabet = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+        random.shuffle(alphabet)
+        key = ''.join(alphabet)
+    return translate_bytes(data, _substitution_table(key), out)
+
+
+def substitution_decipher_bytes(data, key: str, out=None):
+    """Substitution cipher decryption over bytes."""
+    return translate_bytes(data, _substitution_table(key, inverse=True), out)
+
+
+# --- Vigenere ---
+
+@functools.lru_cache(maxsize=64)
+def _vigenere_tables(keyword: str, sign: int) -> np.ndarray:
+    """One 256-entry shift table per key letter, flattened to (len(keyword) * 256,)."""
+    if not keyword:
+        raise ValueError("Vigenere keyword must not be empty")
+    return np.frombuffer(b''.join(_shift_table(sign * (ord(c) - 65) % 26) for c in keyword.upper()),
+                         dtype=np.uint8)
+
+
+def _vigenere(data, keyword: str, sign: int, out):
+    tables = _vigenere_tables(keyword, sign)
+    period = len(tables) // 256
+    source = _input(data)
+    target = _output(out, len(source)) if out is not None else np.empty(len(source), dtype=np.uint8)
+
+    # The key advances on letters only, so carry the letter count across blocks.
+    # Every table maps non-letters to themselves, so their key position is irrelevant.
+    key_index = 0
+    for start in range(0, len(source), BLOCK_SIZE):
+        block = source[start:start + BLOCK_SIZE]
+        letter_count = np.cumsum(IS_LETTER[block], dtype=np.int32)
+        lookup = (letter_count + (key_index - 1) % period) % period
+        lookup *= 256
+        lookup += block
+        key_index = (key_index + int(letter_count[-1])) % period
+        np.take(tables, lookup, out=target[start:start + len(block)])
+    return _result(out, target)
+
+
+def vigenere_bytes(data, keyword: str, out=None):
+    """Vigenere cipher encryption over bytes."""
+    return _vigenere(data, keyword, 1, out)
+
+
+def vigenere_decipher_bytes(data, keyword: str, out=None):
+    """Vigenere cipher decryption over bytes."""
+    return _vigenere(data, keyword, -1, out)
+
+
+# --- Rail fence ---
+
+def _rail_fence(data, rails: int, decipher: bool, out):
+    source = _input(data)
+    target = _output(out, len(source)) if out is not None else np.empty(len(source), dtype=np.uint8)
+    if np.shares_memory(target, source):
+        source = source.copy()  # A transposition can't run in place
+
+    if rails < 2 or len(source) < 2:
+        target[:] = source
+        return _result(out, target)
+
+    # Rail k holds positions k, cycle-k, cycle+k, 2*cycle-k, ... in zigzag order
+    cycle = 2 * (rails - 1)
+    fenced, plain = (source, target) if decipher else (target, source)
+    offset = 0
+    for k in range(rails):
+        down = plain[k::cycle]
+        up = plain[cycle - k::cycle] if 0 < k < rails - 1 else plain[:0]
+        segment = fenced[offset:offset + len(down) + len(up)]
+        if not len(up):
+            if decipher:
+                down[:] = segment
+            else:
+                segment[:] = down
+        elif decipher:
+            down[:] = segment[0::2]
+            up[:] = segment[1::2]
+        else:
+            segment[0::2] = down
+            segment[1::2] = up
+        offset += len(segment)
+    return _result(out, target)
+
+
+def rail_fence_bytes(data, rails: int, out=None):
+    """Rail fence cipher encryption over bytes."""
+    return _rail_fence(data, rails, False, out)
+
+
+def rail_fence_decipher_bytes(data, rails: int, out=None):
+    """Rail fence cipher decryption over bytes."""
+    return _rail_fence(data, rails, True, out)
+
+
+# --- Permutation ---
+
+def _permute(data, key, inverse: bool, out):
+    source = _input(data)
+    target = _output(out, len(source)) if out is not None else np.empty(len(source), dtype=np.uint8)
+    if np.shares_memory(target, source):
+        source = source.copy()  # A transposition can't run in place
+    np.take(source, cipher_chain.permutation_order(key, len(source), inverse), out=target)
+    return _result(out, target)
+
+
+def permutation_bytes(data, key, out=None):
+    """Permutation cipher encryption over bytes (same order as permutation_cipher)."""
+    return _permute(data, key, False, out)
+
+
+def permutation_decipher_bytes(data, key, out=None):
+    """Permutation cipher decryption over bytes."""
+    return _permute(data, key, True, out)
+
+
+def _copy(data, out):
+    if out is None:
+        return bytes(data)
+    source = _input(data)
+    _output(out, len(source))[:] = source
+    return out
+
+
+# --- Chains ---
+
+def _chain_map(data: bytes, step: tuple, phase: int) -> bytes:
+    if step[0] == 'caesar':
+        return caesar_bytes(data, step[1])
+    elif step[0] == 'vigenere':
+        keyword, sign = step[1], step[2]
+        return caesar_bytes(data, sign * (ord(keyword[phase % len(keyword)]) - 65))
+    elif step[0] == 'atbash':
+        return atbash_bytes(data)
+    return substitution_bytes(data, step[1])
+
+
+@functools.lru_cache(maxsize=64)
+def _chain_table_for(alphabet: bytes, steps: tuple, period: int) -> tuple:
+    rows = []
+    for phase in range(period):
+        data = alphabet
+        for step in steps:
+            data = _chain_map(data, step, phase)
+        rows.append(np.frombuffer(data, dtype=np.uint8))
+    return cipher_chain.fuse_rows(np.stack(rows))
+
+
+def _chain_table(alphabet: np.ndarray, steps: tuple, period: int) -> tuple:
+    return _chain_table_for(alphabet.astype(np.uint8).tobytes(), steps, period)
+
+
+def chain_bytes(data, cipher_params: dict, decipher: bool = False, out=None):
+    """
+    Cipher chain over bytes, compiled into one plan (see cipher_chain).
+
+    Substitution runs fuse into one 256-entry table, transpositions into
+    one permutation.
+    """
+    stages = cipher_chain.compile_plan(cipher_chain.resolve_steps(cipher_params, decipher))
+    source = _input(data)
+    alphabet, indices = cipher_chain.run_plan(stages, _BYTES, source, IS_LETTER.__getitem__, _chain_table)
+    target = _output(out, len(source)) if out is not None else np.empty(len(source), dtype=np.uint8)
+    np.take(alphabet.astype(np.uint8), indices, out=target)
+    return _result(out, target)
+
+
+# --- Dispatch ---
+
+def shuffle_bytes_by_cipher(data, cipher_type: str, cipher_params: dict, out=None):
+    """
+    Bytes counterpart of shuffle_data_by_cipher.
+
+    Args:
+        data: bytes, bytearray, memoryview or any buffer
+        cipher_type: Type of cipher (Caesar, Vigenere, Atbash, etc.)
+        cipher_params: Cipher parameters (shift, keyword, etc.)
+        out: Optional writable buffer for the result
+
+    Returns:
+        ``out`` if given, otherwise the encrypted bytes
+    """
+    cipher_type = cipher_type.lower()
+    if cipher_type == "caesar":
+        return caesar_bytes(data, cipher_params.get('shift', 3), out)
+    elif cipher_type == "vigenere":
+        return vigenere_bytes(data, cipher_params.get('keyword', 'KEY'), out)
+    elif cipher_type == "atbash":
+        return atbash_bytes(data, out)
+    elif cipher_type == "substitution":
+        return substitution_bytes(data, cipher_params.get('substitution_key', None), out)
+    elif cipher_type == "rail_fence":
+        return rail_fence_bytes(data, cipher_params.get('rails', 3), out)
+    elif cipher_type == "chain":
+        return chain_bytes(data, cipher_params, False, out)
+
+    # Default: keyed permutation of the bytes, the same order as for text
+    return _permute(data, cipher_chain.permutation_key(cipher_type, cipher_params), False, out)
+
+
+def decipher_bytes(data, cipher_type: str, cipher_params: dict, out=None):
+    """
+    Bytes counterpart of decipher_data (also inverts substitution, given its key).
+
+    Returns:
+        ``out`` if given, otherwise the decrypted bytes
+    """
+    cipher_type = cipher_type.lower()
+    if cipher_type == "caesar":
+        return caesar_decipher_bytes(data, cipher_params.get('shift', 3), out)
+    elif cipher_type == "vigenere":
+        return vigenere_decipher_bytes(data, cipher_params.get('keyword', 'KEY'), out)
+    elif cipher_type == "atbash":
+        return atbash_bytes(data, out)
+    elif cipher_type == "substitution":
+        if not cipher_params.get('substitution_key'):
+            return _copy(data, out)  # A random key can't be recovered
+        return substitution_decipher_bytes(data, cipher_params['substitution_key'], out)
+    elif cipher_type == "rail_fence":
+        return rail_fence_decipher_bytes(data, cipher_params.get('rails', 3), out)
+    elif cipher_type == "chain":
+        return chain_bytes(data, cipher_params, True, out)
+
+    return _permute(data, cipher_chain.permutation_key(cipher_type, cipher_params), True, out)
@@ -0,0 +1,336 @@
+"""
+HoloCrypt Cipher Chains
+Several ciphers applied in sequence, compiled into a plan of one or two passes
+
+A chain is given like any other cipher, as cipher_type "chain" with
+
+    cipher_params = {"steps": [
+        {"cipher_type": "vigenere", "cipher_params": {"keyword": "SECRET"}},
+        {"cipher_type": "rail_fence", "cipher_params": {"rails": 3}},
+        {"cipher_type": "atbash"}
+    ]}
+
+and produces exactly what applying the steps one after another would.
+
+Instead of one full copy of the text per step, the chain is compiled into
+stages over an index array (each character is an index into a small
+alphabet):
+
+- map stage: Caesar, Atbash, substitution and Vigenere steps fused into
+  one lookup table per key phase; Vigenere's phase is the letter count
+  mod the LCM of the keyword lengths, so a stage without Vigenere is a
+  single table
+- permute stage: rail fence and keyed permutations composed into one
+  index permutation
+
+Letter-for-letter maps commute with transpositions, so every Caesar,
+Atbash and substitution step folds into the nearest map stage; only a
+Vigenere step after a transposition starts a new stage. Vigenere, rail
+fence then Atbash is one table lookup plus one gather.
+
+This module is independent of the text representation: callers supply
+the alphabet, the index array, a letter test and a cached function
+building each stage's table (holocrypt_enhanced for str, byte_ciphers for
+bytes).
+"""
+
+import functools
+import hashlib
+import json
+import math
+import random
+
+import numpy as np
+
+MAX_PERIOD = 256  # Longest combined Vigenere period fused into one stage
+MAX_STEPS = 32
+PERMUTATION_CACHE_SIZE = 128
+PERMUTATION_CACHE_MAX_LENGTH = 1 << 16  # Longer orders are rebuilt, keeping the cache under ~32 MB
+
+PURE_MAPS = ('caesar', 'atbash', 'substitution')
+PERMUTATIONS = ('rail_fence', 'permutation')
+
+
+# --- Chain specs ---
+
+def chain_steps(cipher_params: dict) -> list:
+    """
+    The (cipher_type, cipher_params) steps of a chain, nested chains flattened.
+
+    Raises:
+        ValueError: The spec is malformed
+    """
+    steps = cipher_params.get('steps') if isinstance(cipher_params, dict) else None
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("A cipher chain needs a non-empty 'steps' list")
+
+    flat = []
+    for step in steps:
+        if isinstance(step, str):
+            step = {'cipher_type': step}
+        if not isinstance(step, dict) or not isinstance(step.get('cipher_type'), str):
+            raise ValueError("Each chain step needs a 'cipher_type'")
+        cipher_type = step['cipher_type'].lower()
+        params = step.get('cipher_params') or {}
+        if not isinstance(params, dict):
+            raise ValueError("Chain step 'cipher_params' must be an object")
+        if cipher_type == 'chain':
+            flat.extend(chain_steps(params))
+        else:
+            flat.append((cipher_type, params))
+    if len(flat) > MAX_STEPS:
+        raise ValueError(f"A cipher chain has at most {MAX_STEPS} steps")
+    return flat
+
+
+def inverse_substitution_key(key: str) -> str:
+    """The substitution key that undoes ``key`` (a permutation of A-Z)."""
+    key = key.upper()
+    if sorted(key) != [chr(65 + i) for i in range(26)]:
+        raise ValueError("Decrypting a substitution step needs a key that is a permutation of A-Z")
+    inverse = [''] * 26
+    for i, c in enumerate(key):
+        inverse[ord(c) - 65] = chr(65 + i)
+    return ''.join(inverse)
+
+
+def _integer(params: dict, name: str, default: int) -> int:
+    value = params.get(name, default)
+    try:
+        number = int(value)
+        if number != (int(value.strip()) if isinstance(value, str) else value):
+            raise ValueError
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Cipher parameter '{name}' must be an integer") from None
+    return number
+
+
+def shift_param(params: dict) -> int:
+    """Caesar 'shift' (default 3): an integer, or a string or float holding one."""
+    return _integer(params, 'shift', 3)
+
+
+def keyword_param(params: dict) -> str:
+    """Vigenere 'keyword' (default 'KEY'), upper-cased: a non-empty string."""
+    keyword = params.get('keyword', 'KEY')
+    if not isinstance(keyword, str) or not keyword:
+        raise ValueError("Vigenere keyword must be a non-empty string")
+    return keyword.upper()
+
+
+def rails_param(params: dict) -> int:
+    """Rail fence 'rails' (default 3): an integer of at least 1."""
+    rails = _integer(params, 'rails', 3)
+    if rails < 1:
+        raise ValueError("Cipher parameter 'rails' must be at least 1")
+    return rails
+
+
+def _normalize(cipher_type: str, params: dict) -> tuple:
+    if cipher_type == 'caesar':
+        return ('caesar', shift_param(params))
+    if cipher_type == 'vigenere':
+        return ('vigenere', keyword_param(params), 1)
+    if cipher_type == 'atbash':
+        return ('atbash',)
+    if cipher_type == 'substitution':
+        return ('substitution', params.get('substitution_key', None))
+    if cipher_type == 'rail_fence':
+        return ('rail_fence', rails_param(params), False)
+    # Default: keyed permutation, as in shuffle_data_by_cipher
+    return ('permutation', permutation_key(cipher_type, params), False)
+
+
+def _invert(step: tuple) -> tuple:
+    kind = step[0]
+    if kind == 'caesar':
+        return ('caesar', -step[1])
+    if kind == 'vigenere':
+        return ('vigenere', step[1], -step[2])
+    if kind == 'substitution':
+        if step[1] is None:
+            raise ValueError("Decrypting a substitution step needs its substitution_key")
+        return ('substitution', inverse_substitution_key(step[1]))
+    if kind in PERMUTATIONS:
+        return (kind, step[1], not step[2])
+    return step  # Atbash is its own inverse
+
+
+def resolve_steps(cipher_params: dict, decipher: bool = False) -> list:
+    """
+    Normalized steps in application order; for decryption the inverse steps, reversed.
+
+    A substitution step without a key gets a random one here, once per
+    call, like substitution_cipher.
+    """
+    steps = []
+    for cipher_type, params in chain_steps(cipher_params):
+        step = _normalize(cipher_type, params)
+        if step[0] == 'substitution' and step[1] is None:
+            alphabet = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+            random.shuffle(alphabet)
+            step = ('substitution', ''.join(alphabet))
+        steps.append(step)
+    return [_invert(step) for step in reversed(steps)] if decipher else steps
+
+
+# --- Planning ---
+
+def compile_plan(steps: list) -> list:
+    """
+    Groups normalized steps into stages.
+
+    Returns:
+        List of ('map', steps, period) and ('permute', steps) tuples
+    """
+    stages = []
+    for step in steps:
+        kind = step[0]
+        if kind in PERMUTATIONS:
+            if stages and stages[-1][0] == 'permute':
+                stages[-1][1].append(step)
+            else:
+                stages.append(['permute', [step]])
+            continue
+
+        if kind in PURE_MAPS:
+            # Commutes with any transposition, so joins the latest map stage
+            # (or a new first stage if every stage so far is a transposition)
+            for stage in reversed(stages):
+                if stage[0] == 'map':
+                    stage[1].append(step)
+                    break
+            else:
+                stages.insert(0, ['map', [step], 1])
+            continue
+
+        # Vigenere: depends on the letter order, so stays after earlier transpositions
+        stage = stages[-1] if stages and stages[-1][0] == 'map' else None
+        period = math.lcm(stage[2], len(step[1])) if stage else len(step[1])
+        if stage is None or period > MAX_PERIOD:
+            stages.append(['map', [step], len(step[1])])
+        else:
+            stage[1].append(step)
+            stage[2] = period
+    return [tuple(stage) for stage in stages]
+
+
+# --- Permutations ---
+
+@functools.lru_cache(maxsize=32)
+def rail_order(length: int, rails: int) -> np.ndarray:
+    """Rail fence reading order: ciphertext[j] = plaintext[order[j]]."""
+    cycle = 2 * (rails - 1)
+    phase = np.arange(length, dtype=np.int64) % cycle
+    return np.argsort(np.minimum(phase, cycle - phase), kind='stable')
+
+
+def permutation_key(cipher_type: str, cipher_params: dict):
+    """Key of the permutation cipher: 'key', else 'seed', else the cipher type name."""
+    for name in ('key', 'seed'):
+        if cipher_params.get(name) is not None:
+            return cipher_params[name]
+    return cipher_type.lower()
+
+
+@functools.lru_cache(maxsize=PERMUTATION_CACHE_SIZE)
+def _cached_permutation(key: str, length: int, inverse: bool) -> np.ndarray:
+    return _permutation(key, length, inverse)
+
+
+def _permutation(key: str, length: int, inverse: bool) -> np.ndarray:
+    if inverse:
+        forward = _cached_permutation if length <= PERMUTATION_CACHE_MAX_LENGTH else _permutation
+        order = _inverse_order(forward(key, length, False))  # its argsort, in O(n)
+    else:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=32, person=b'HoloCryptPerm').digest()
+        order = np.random.default_rng(int.from_bytes(digest, 'little')).permutation(length).astype(np.uint32)
+    order.flags.writeable = False  # Shared by every caller through the cache
+    return order
+
+
+def permutation_order(key, length: int, inverse: bool = False) -> np.ndarray:
+    """
+    Permutation cipher order for ``key``: ciphertext[j] = plaintext[order[j]].
+
+    The key (any JSON value) is hashed into the seed of a NumPy Generator;
+    ``inverse`` gives the decryption order (its argsort). Orders for
+    messages up to PERMUTATION_CACHE_MAX_LENGTH are cached per (key, length).
+    """
+    canonical = json.dumps(key, sort_keys=True)
+    if length > PERMUTATION_CACHE_MAX_LENGTH:
+        return _permutation(canonical, length, inverse)
+    return _cached_permutation(canonical, length, inverse)
+
+
+def _inverse_order(order: np.ndarray) -> np.ndarray:
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order), dtype=order.dtype)
+    return inverse
+
+
+def step_order(step: tuple, length: int):
+    """The permutation of one transposition step, or None for the identity."""
+    kind, param, inverse = step
+    if kind == 'permutation':
+        return permutation_order(param, length, inverse)
+    if param < 2 or length < 2:
+        return None
+    order = rail_order(length, param)
+    return _inverse_order(order) if inverse else order
+
+
+def compose_orders(steps: list, length: int):
+    """One permutation equivalent to applying ``steps`` in order, or None."""
+    composed = None
+    for step in steps:
+        order = step_order(step, length)
+        if order is not None:
+            composed = order if composed is None else composed[order]
+    return composed
+
+
+# --- Execution ---
+
+def fuse_rows(rows: np.ndarray) -> tuple:
+    """
+    Turns table rows of code points into (new alphabet, index table).
+
+    ``rows[p, i]`` is what alphabet entry i becomes at phase p; the result
+    maps indices straight to indices into the new alphabet.
+    """
+    alphabet, table = np.unique(rows, return_inverse=True)
+    return alphabet, table.reshape(rows.shape).astype(np.uint8 if len(alphabet) <= 256 else np.uint32)
+
+
+def run_plan(stages: list, alphabet: np.ndarray, indices: np.ndarray, is_letter, build_table) -> tuple:
+    """
+    Runs a compiled plan over text given as ``alphabet[indices]``.
+
+    Args:
+        stages: compile_plan output
+        alphabet: Code points in use (1-D, sorted)
+        indices: Text as indices into ``alphabet``
+        is_letter: alphabet -> bool array of characters the ciphers encipher
+        build_table: (alphabet, map steps, period) -> fuse_rows result for the
+                     stage; callers cache it, as it only depends on its arguments
+
+    Returns:
+        (alphabet, indices) of the result
+    """
+    for stage in stages:
+        if stage[0] == 'permute':
+            order = compose_orders(stage[1], len(indices))
+            if order is not None:
+                indices = indices[order]
+            continue
+
+        _, steps, period = stage
+        phase = None
+        if period > 1:
+            # Every row maps non-letters to themselves, so their phase doesn't matter
+            letter_count = np.cumsum(is_letter(alphabet)[indices], dtype=np.int64)
+            phase = (letter_count - 1) % period
+        alphabet, table = build_table(alphabet, tuple(steps), period)
+        indices = table[0][indices] if phase is None else table[phase, indices]
+    return alphabet, indices
@@ -0,0 +1,277 @@
+"""
+HoloCrypt Cipher Engines
+Per-call choice between a cipher's scalar reference implementation and its NumPy engine
+
+The pure-Python ciphers in holocrypt_enhanced are the reference
+implementations. They are the fastest way to encipher a short string, but
+pay interpreter overhead on every character. The NumPy engines pay a fixed
+setup cost per call (encoding, plan and table lookups), then run one to two
+orders of magnitude faster. Where the two cross depends on the cipher and on
+the machine, so it is measured rather than guessed:
+
+- calibrate() times both engines of every registered operation on a ladder
+  of input lengths and records the shortest length from which NumPy wins
+- the thresholds are saved to a JSON file together with a fingerprint of the
+  machine (CPU, Python and NumPy versions); load() only accepts a file whose
+  fingerprint matches, so a copied file or an upgrade triggers recalibration
+- select(operation, length) returns the engine to run for that input
+
+DEFAULT_THRESHOLDS apply until a calibration is loaded or run.
+"""
+
+import json
+import os
+import platform
+import random
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+CALIBRATION_VERSION = 1  # Bump when an engine changes enough to move its crossover
+DEFAULT_PATH = os.path.join('.holocrypt', 'engines.json')
+
+# Shortest input (characters) sent to the NumPy engine; None means always scalar.
+# Measured on a typical x86-64 server, used until calibration runs.
+DEFAULT_THRESHOLDS = {
+    'caesar': 64,
+    'vigenere': 96,
+    'vigenere_decipher': 96,
+    'atbash': 96,
+    'substitution': 96,
+    'rail_fence': 128,
+    'rail_fence_decipher': 32,
+}
+
+LENGTHS = tuple(2 ** k for k in range(2, 17))  # Calibration ladder: 4 .. 64K characters
+REFINE_STEPS = 3  # Bisections between the last losing and first winning length
+MEASURE_SECONDS = 0.002  # Target duration of one timed batch of calls
+
+_operations = {}  # operation -> (scalar, numpy, sample args)
+_lock = threading.Lock()
+_loaded = False
+_state = {
+    'thresholds': dict(DEFAULT_THRESHOLDS),
+    'source': 'default',
+    'path': None,
+    'calibrated_at': None,
+    'calibration_seconds': None,
+}
+
+
+# --- Registry ---
+
+def register(operation: str, scalar, numpy, sample_args: tuple = ()):
+    """
+    Registers the two engines of an operation.
+
+    Args:
+        operation: Name used by select() and in the thresholds
+        scalar: Reference implementation, called as scalar(text, *args)
+        numpy: Vectorized implementation with the same signature and results
+        sample_args: Arguments used when calibrating
+    """
+    _operations[operation] = (scalar, numpy, tuple(sample_args))
+    _state['thresholds'].setdefault(operation, DEFAULT_THRESHOLDS.get(operation))
+
+
+def select(operation: str, length: int):
+    """The engine to run ``operation`` on an input of ``length`` characters."""
+    if not _loaded:
+        load()
+    scalar, numpy, _ = _operations[operation]
+    threshold = _state['thresholds'].get(operation)
+    return numpy if threshold is not None and length >= threshold else scalar
+
+
+def thresholds() -> dict:
+    """Current thresholds: operation -> shortest input sent to the NumPy engine (None: never)."""
+    if not _loaded:
+        load()
+    return dict(_state['thresholds'])
+
+
+def report() -> dict:
+    """Thresholds plus where they came from, for the API."""
+    if not _loaded:
+        load()
+    return {
+        'thresholds': dict(_state['thresholds']),
+        'engines': {operation: ['scalar', 'numpy'] for operation in _operations},
+        'source': _state['source'],
+        'path': _state['path'],
+        'calibrated_at': _state['calibrated_at'],
+        'calibration_seconds': _state['calibration_seconds'],
+        'fingerprint': fingerprint(),
+    }
+
+
+# --- Calibration ---
+
+def _cpu_model() -> str:
+    try:
+        with open('/proc/cpuinfo', 'r', encoding='utf-8', errors='ignore') as fh:
+            for line in fh:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def fingerprint() -> dict:
+    """What a calibration is only valid for."""
+    return {
+        'version': CALIBRATION_VERSION,
+        'machine': platform.machine(),
+        'cpu': _cpu_model(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'operations': sorted(_operations),
+    }
+
+
+def sample_text(length: int, seed: int = 0) -> str:
+    """Mixed-case ASCII text with spaces and punctuation, like a typical message."""
+    rng = random.Random(seed)
+    return ''.join(rng.choices('etaoinshrdlucmfwypvbgkjqxzETAOINSHR     ,.', k=length))
+
+
+def _seconds_per_call(func, text: str, args: tuple) -> float:
+    """Best of three timed batches, each sized to take about MEASURE_SECONDS."""
+    func(text, *args)  # Warm caches (plans, lookup tables) first
+    start = time.perf_counter()
+    func(text, *args)
+    single = time.perf_counter() - start
+    number = max(1, int(MEASURE_SECONDS / max(single, 1e-7)))
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(text, *args)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _numpy_wins(operation: str, text: str) -> bool:
+    scalar, numpy, args = _operations[operation]
+    return _seconds_per_call(numpy, text, args) < _seconds_per_call(scalar, text, args)
+
+
+def crossover(operation: str, text: str = None):
+    """
+    Shortest input length from which the NumPy engine beats the scalar one.
+
+    Walks LENGTHS until NumPy wins at two consecutive lengths (one win may be
+    noise), then bisects between the last loss and the first win.
+
+    Returns:
+        Length in characters, or None if NumPy never wins up to LENGTHS[-1]
+    """
+    text = text or sample_text(LENGTHS[-1])
+    previous_loss = 0
+    first_win = None
+    for length in LENGTHS:
+        if not _numpy_wins(operation, text[:length]):
+            previous_loss, first_win = length, None
+        elif first_win is None:
+            first_win = length
+        else:
+            break
+    else:
+        if first_win is None:
+            return None
+
+    low, high = previous_loss, first_win
+    for _ in range(REFINE_STEPS):
+        middle = (low + high) // 2
+        if middle <= low:
+            break
+        if _numpy_wins(operation, text[:middle]):
+            high = middle
+        else:
+            low = middle
+    return max(high, 1)
+
+
+def calibrate(path: str = None, save: bool = True) -> dict:
+    """
+    Measures the threshold of every registered operation and applies it.
+
+    Args:
+        path: Calibration file (default: CIPHER_ENGINE_CALIBRATION or DEFAULT_PATH)
+        save: Write the result to ``path`` for later processes
+
+    Returns:
+        report()
+    """
+    global _loaded
+    path = path or os.getenv('CIPHER_ENGINE_CALIBRATION', DEFAULT_PATH)
+    start = time.perf_counter()
+    text = sample_text(LENGTHS[-1])
+    measured = {operation: crossover(operation, text) for operation in sorted(_operations)}
+    elapsed = time.perf_counter() - start
+
+    with _lock:
+        _state.update(thresholds=measured, source='calibrated', path=path,
+                      calibrated_at=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                      calibration_seconds=round(elapsed, 3))
+        _loaded = True
+    if save:
+        _save(path)
+    return report()
+
+
+# --- Calibration file ---
+
+def _save(path: str):
+    """Writes the current calibration atomically (workers may race to write it)."""
+    record = {
+        'fingerprint': fingerprint(),
+        'thresholds': _state['thresholds'],
+        'calibrated_at': _state['calibrated_at'],
+        'calibration_seconds': _state['calibration_seconds'],
+    }
+    directory = os.path.dirname(path) or '.'
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.engines-')
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(record, fh, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # A read-only deployment just recalibrates next time
+
+
+def load(path: str = None) -> bool:
+    """
+    Applies a saved calibration if its fingerprint matches this machine.
+
+    Returns:
+        True if the file was used; otherwise the current thresholds stay
+    """
+    global _loaded
+    path = path or os.getenv('CIPHER_ENGINE_CALIBRATION', DEFAULT_PATH)
+    with _lock:
+        _loaded = True
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                record = json.load(fh)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(record, dict) or record.get('fingerprint') != fingerprint():
+            return False
+        saved = record.get('thresholds') or {}
+        _state.update(thresholds={operation: saved.get(operation) for operation in _operations},
+                      source='cache', path=path, calibrated_at=record.get('calibrated_at'),
+                      calibration_seconds=record.get('calibration_seconds'))
+        return True
+
+
+def load_or_calibrate(path: str = None) -> dict:
+    """Loads the saved calibration, calibrating (and saving) if there is none for this machine."""
+    if not load(path):
+        calibrate(path)
+    return report()
@@ -0,0 +1,299 @@
+"""
+HoloCrypt Cipher Solver
+Recovers the cipher and parameters behind a classical-cipher text without the key
+
+Caesar shifts and Atbash are scored together as one matrix of letter-count
+permutations against English letter frequencies (chi-squared). Rail fence
+keeps letter frequencies intact, so every rail count is undone as a batch of
+index permutations and scored on English bigrams. Vigenere key length comes
+from the index of coincidence, and each key letter is then solved as a
+Caesar column. Candidates are ranked on dictionary coverage (word_set) when a
+word list is installed, then on the same bigram score.
+"""
+
+import numpy as np
+
+from word_set import default_word_set
+
+MAX_TEXT_LENGTH = 64 * 1024
+SOLVABLE_CIPHERS = ('caesar', 'atbash', 'rail_fence', 'vigenere')
+
+# A-Z, percent of letters in English text (Norvig, Mayzner revisited)
+ENGLISH_FREQUENCIES = np.array([
+    8.04, 1.48, 3.34, 3.82, 12.49, 2.40, 1.87, 5.05, 7.57, 0.16, 0.54, 4.07, 2.51,
+    7.23, 7.64, 2.14, 0.12, 6.28, 6.51, 9.28, 2.73, 1.05, 1.68, 0.23, 1.66, 0.09,
+])
+ENGLISH_FREQUENCIES /= ENGLISH_FREQUENCIES.sum()
+
+ENGLISH_IOC = float((ENGLISH_FREQUENCIES ** 2).sum())  # ~0.066
+RANDOM_IOC = 1 / 26
+
+_COMMON_BIGRAMS = {
+    'TH': 3.56, 'HE': 3.07, 'IN': 2.43, 'ER': 2.05, 'AN': 1.99, 'RE': 1.85, 'ON': 1.76, 'AT': 1.49,
+    'EN': 1.45, 'ND': 1.35, 'TI': 1.34, 'ES': 1.34, 'OR': 1.28, 'TE': 1.20, 'OF': 1.17, 'ED': 1.17,
+    'IS': 1.13, 'IT': 1.12, 'AL': 1.09, 'AR': 1.07, 'ST': 1.05, 'TO': 1.04, 'NT': 1.04, 'NG': 0.95,
+    'SE': 0.93, 'HA': 0.93, 'AS': 0.87, 'OU': 0.87, 'IO': 0.83, 'LE': 0.83, 'VE': 0.83, 'CO': 0.79,
+    'ME': 0.79, 'DE': 0.76, 'HI': 0.76, 'RI': 0.73, 'RO': 0.73, 'IC': 0.70, 'NE': 0.69, 'EA': 0.69,
+    'RA': 0.69, 'CE': 0.65, 'LI': 0.62, 'CH': 0.60, 'LL': 0.58, 'BE': 0.58, 'MA': 0.57, 'SI': 0.55,
+    'OM': 0.55, 'UR': 0.54,
+}
+
+
+# Cell value for anything that is not an ASCII letter
+GAP = 26
+
+
+def _bigram_log_table() -> np.ndarray:
+    # Independent-letter estimate for the long tail, measured values for the common pairs
+    table = np.outer(ENGLISH_FREQUENCIES, ENGLISH_FREQUENCIES) * 0.5
+    for pair, percent in _COMMON_BIGRAMS.items():
+        table[ord(pair[0]) - 65, ord(pair[1]) - 65] = percent / 100
+    # Row/column GAP contribute nothing, so pairs touching a non-letter drop out of the sum
+    padded = np.zeros((27, 27))
+    padded[:26, :26] = np.log(table)
+    return padded
+
+
+BIGRAM_LOG = _bigram_log_table()
+_BIGRAM_LOG_FLAT = BIGRAM_LOG.ravel()
+
+_LETTERS = np.arange(26)
+# Row s holds, for each plaintext letter p, the ciphertext letter (p + s) % 26
+_SHIFT_INDEX = (_LETTERS[None, :] + _LETTERS[:, None]) % 26
+_ATBASH_INDEX = 25 - _LETTERS
+
+
+# --- Text as arrays ---
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-32-le'), dtype='<u4').astype(np.int64)
+
+
+def _letter_cells(codepoints: np.ndarray) -> np.ndarray:
+    """uint8 letter index 0-25 for ASCII letters, GAP for everything else."""
+    folded = codepoints | 0x20
+    is_letter = (folded >= 97) & (folded <= 122)
+    return np.where(is_letter, folded - 97, GAP).astype(np.uint8)
+
+
+def chi_squared(counts: np.ndarray) -> np.ndarray:
+    """Chi-squared distance of letter counts (..., 26) from English, one value per row."""
+    counts = np.asarray(counts, dtype=np.float64)
+    expected = counts.sum(axis=-1, keepdims=True) * ENGLISH_FREQUENCIES
+    return (((counts - expected) ** 2) / np.maximum(expected, 1e-12)).sum(axis=-1)
+
+
+def bigram_score(cells: np.ndarray) -> np.ndarray:
+    """
+    Mean English bigram log-probability of adjacent letter pairs, per row.
+
+    Args:
+        cells: (n,) or (rows, n) letter cells as from _letter_cells
+    """
+    cells = np.atleast_2d(cells)
+    first, second = cells[:, :-1], cells[:, 1:]
+    flat = first.astype(np.intp) * 27
+    flat += second
+    totals = _BIGRAM_LOG_FLAT[flat].sum(axis=1)
+    pairs = ((first < GAP) & (second < GAP)).sum(axis=1)
+    return np.where(pairs > 0, totals / np.maximum(pairs, 1), -np.inf)
+
+
+def index_of_coincidence(counts: np.ndarray) -> np.ndarray:
+    counts = np.asarray(counts, dtype=np.float64)
+    sizes = counts.sum(axis=-1)
+    return (counts * (counts - 1)).sum(axis=-1) / np.maximum(sizes * (sizes - 1), 1)
+
+
+# --- Per-family solvers ---
+
+def score_shifts(letters: np.ndarray) -> np.ndarray:
+    """
+    Chi-squared for all 26 Caesar shifts plus Atbash, from a single histogram.
+
+    Returns:
+        (27,) array: index s is the score for shift s, index 26 for Atbash
+    """
+    counts = np.bincount(letters, minlength=26)
+    candidates = np.vstack([counts[_SHIFT_INDEX], counts[_ATBASH_INDEX][None, :]])
+    return chi_squared(candidates)
+
+
+def rail_orders(length: int, rails: np.ndarray) -> np.ndarray:
+    """
+    Rail fence reading orders for several rail counts at once.
+
+    Row r is the permutation the cipher applies: ciphertext[j] = plaintext[order[r, j]].
+    """
+    rails = np.asarray(rails, dtype=np.int32)
+    cycles = 2 * (rails[:, None] - 1)
+    phase = np.arange(length, dtype=np.int32)[None, :] % cycles
+    rail_of = np.minimum(phase, cycles - phase)
+    if len(rails) and rails.max() <= 256:
+        rail_of = rail_of.astype(np.uint8)  # Lets the stable sort use radix sort
+    return np.argsort(rail_of, axis=1, kind='stable')
+
+
+def score_rails(cells: np.ndarray, max_rails: int = 32):
+    """
+    Undoes every rail count from 2 to ``max_rails`` and scores each result.
+
+    Returns:
+        (rails array, bigram score array, (rows, n) deciphered cells)
+    """
+    length = len(cells)
+    rails = np.arange(2, max(2, min(max_rails, length - 1)) + 1)
+    if length < 3:
+        return rails[:0], np.empty(0), np.empty((0, length), dtype=cells.dtype)
+    orders = rail_orders(length, rails)
+    plain = np.empty((len(rails), length), dtype=cells.dtype)
+    np.put_along_axis(plain, orders, np.broadcast_to(cells, plain.shape), axis=1)
+    return rails, bigram_score(plain), plain
+
+
+def vigenere_key_length(letters: np.ndarray, max_length: int = 20) -> tuple:
+    """
+    Most likely Vigenere key length by average column index of coincidence.
+
+    Multiples of the true length score as well as the length itself, so the
+    shortest length close to the best score wins.
+
+    Returns:
+        (key length, list of mean IoC for lengths 1..max_length)
+    """
+    count = len(letters)
+    positions = np.arange(count)
+    iocs = []
+    # Columns need a handful of letters each for their IoC to mean anything
+    for length in range(1, max(1, min(max_length, count // 8)) + 1):
+        counts = np.bincount((positions % length) * 26 + letters, minlength=length * 26).reshape(length, 26)
+        iocs.append(float(index_of_coincidence(counts).mean()))
+
+    best = max(iocs) if iocs else ENGLISH_IOC
+    # Any English-like length is accepted, so noise at long lengths can't outbid it
+    threshold = min(best - 0.15 * (best - RANDOM_IOC), ENGLISH_IOC - 0.008)
+    key_length = next((i + 1 for i, ioc in enumerate(iocs) if ioc >= threshold), 1)
+    return key_length, iocs
+
+
+def vigenere_key(letters: np.ndarray, key_length: int) -> str:
+    """Solves each key column as a Caesar shift; repeats inside the key are folded."""
+    positions = np.arange(len(letters)) % key_length
+    counts = np.bincount(positions * 26 + letters, minlength=key_length * 26).reshape(key_length, 26)
+    shifts = chi_squared(counts[:, _SHIFT_INDEX]).argmin(axis=1)
+    key = ''.join(chr(65 + int(s)) for s in shifts)
+    for period in range(1, key_length):
+        if key_length % period == 0 and key == key[:period] * (key_length // period):
+            return key[:period]
+    return key
+
+
+# --- Applying candidates ---
+
+def _shift_cells(cells: np.ndarray, shifts) -> np.ndarray:
+    return np.where(cells < GAP, (cells.astype(np.int16) - shifts) % 26, GAP).astype(np.uint8)
+
+
+def _keystream(cells: np.ndarray, key: str) -> np.ndarray:
+    # Key advances on letters only, matching vigenere_cipher
+    key_shifts = np.frombuffer(key.upper().encode('ascii'), dtype=np.uint8).astype(np.int64) - 65
+    rank = np.cumsum(cells < GAP) - 1
+    return key_shifts[rank % len(key_shifts)]
+
+
+def _render(codepoints: np.ndarray, cells: np.ndarray, plain_cells: np.ndarray) -> str:
+    """Writes deciphered letters back with each position's original case."""
+    upper = (codepoints >= 65) & (codepoints <= 90)
+    out = np.where(plain_cells < GAP, plain_cells + np.where(upper, 65, 97), codepoints)
+    return out.astype('<u4').tobytes().decode('utf-32-le')
+
+
+def _candidate(cipher_type: str, cipher_params: dict, plaintext: str, score: float) -> dict:
+    return {
+        'cipher_type': cipher_type,
+        'cipher_params': cipher_params,
+        'plaintext': plaintext,
+        'score': round(float(score), 4) if np.isfinite(score) else None,
+    }
+
+
+def crack(text: str, ciphers=SOLVABLE_CIPHERS, max_rails: int = 32, max_key_length: int = 20,
+          top: int = 5) -> dict:
+    """
+    Finds the most likely cipher and parameters for ``text``.
+
+    Args:
+        text: Ciphertext produced by one of the classical ciphers
+        ciphers: Cipher families to try
+        max_rails: Highest rail count to try for rail fence
+        max_key_length: Longest Vigenere key to consider
+        top: Number of candidates to return
+
+    Returns:
+        dict with 'best' (candidate or None), 'candidates' (best first) and
+        'letters'; each candidate has cipher_type, cipher_params, plaintext and
+        score (mean bigram log-probability, higher is more English-like)
+    """
+    unknown = set(ciphers) - set(SOLVABLE_CIPHERS)
+    if unknown:
+        raise ValueError(f"Cannot solve cipher type(s): {', '.join(sorted(unknown))}")
+
+    codepoints = _codepoints(text)
+    cells = _letter_cells(codepoints)
+    letters = cells[cells < GAP].astype(np.intp)
+    if len(letters) == 0:
+        return {'best': None, 'candidates': [], 'letters': 0}
+
+    # (cipher_type, params, deciphered cells) per candidate, scored together below
+    found = []
+
+    if 'caesar' in ciphers or 'atbash' in ciphers:
+        scores = score_shifts(letters)
+        if 'caesar' in ciphers:
+            for shift in np.argsort(scores[:26])[:3]:
+                found.append(('caesar', {'shift': int(shift)}, _shift_cells(cells, int(shift))))
+        if 'atbash' in ciphers:
+            found.append(('atbash', {}, np.where(cells < GAP, 25 - cells, GAP).astype(np.uint8)))
+
+    if 'rail_fence' in ciphers:
+        rails, scores, plain = score_rails(cells, max_rails)
+        for index in np.argsort(-scores)[:3]:
+            found.append(('rail_fence', {'rails': int(rails[index])}, plain[index]))
+
+    if 'vigenere' in ciphers:
+        key_length, iocs = vigenere_key_length(letters, max_key_length)
+        if key_length > 1:
+            # A key made of two similar halves can pass the IoC test at half its length,
+            # so multiples are solved too and the bigram ranking picks between them
+            keys = {vigenere_key(letters, length) for length in range(key_length, len(iocs) + 1, key_length)[:3]}
+            for key in sorted(keys):
+                if len(key) > 1:
+                    found.append(('vigenere', {'keyword': key}, _shift_cells(cells, _keystream(cells, key))))
+
+    if not found:
+        return {'best': None, 'candidates': [], 'letters': int(len(letters))}
+
+    scores = bigram_score(np.vstack([plain for _, _, plain in found]))
+    words = default_word_set()
+
+    candidates = []
+    for (cipher_type, params, plain), score in zip(found, scores):
+        if cipher_type == 'rail_fence':
+            # Transposition: the characters themselves move, not just letters
+            order = rail_orders(len(codepoints), np.array([params['rails']]))[0]
+            moved = np.empty_like(codepoints)
+            moved[order] = codepoints
+            plaintext = moved.astype('<u4').tobytes().decode('utf-32-le')
+        else:
+            plaintext = _render(codepoints, cells, plain)
+        candidate = _candidate(cipher_type, params, plaintext, score)
+        candidate['english'] = round(words.english_score(plaintext), 4) if words is not None else None
+        candidates.append(candidate)
+
+    # Dictionary coverage is decisive on short texts where bigram statistics are thin
+    candidates.sort(key=lambda c: (c['english'] or 0.0, c['score'] if c['score'] is not None else -np.inf),
+                    reverse=True)
+    candidates = candidates[:top]
+
+    return {'best': candidates[0] if candidates else None, 'candidates': candidates,
+            'letters': int(len(letters))}
@@ -0,0 +1,234 @@
+"""
+HoloCrypt Credit Ledger
+In-process balance cache and write-behind ledger for the credit system
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, run as a single-process ledger
+    fcntl = None
+
+
+class BalanceCache:
+    """TTL cache of database credit balances, keyed by user id."""
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, stale_ok: bool = False):
+        """Return the cached balance, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            balance, expires_at = entry
+            if expires_at < time.monotonic() and not stale_ok:
+                del self._entries[user_id]
+                return None
+            return balance
+
+    def set(self, user_id: str, balance: int):
+        """Store a balance read from (or just written to) the database."""
+        with self._lock:
+            self._entries[user_id] = (balance, time.monotonic() + self.ttl)
+
+    def invalidate(self, user_id: str = None):
+        """Drop one user's balance, or every balance if no user is given."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+class CreditLedger:
+    """
+    Append-only local ledger of credit changes with a background flusher.
+
+    Every change is appended and fsynced to a JSON-lines file before the caller
+    returns, so unflushed entries survive a crash. The flusher periodically
+    aggregates pending deltas per user and hands them to ``apply_deltas``; only
+    entries the backend accepted are compacted out of the file. On start-up,
+    ledgers left behind by dead processes are adopted and replayed.
+
+    Delivery is at-least-once: a crash between the backend write and the
+    compaction replays that batch on the next start.
+
+    Args:
+        apply_deltas: Callable taking {user_id: delta} and returning
+            {user_id: new_balance} for every user it wrote successfully
+        on_applied: Optional callable receiving that same dict, invoked while
+            the ledger lock is held so balances never double-count a delta
+        directory: Where ledger files live
+        flush_interval: Seconds between background flushes
+    """
+
+    def __init__(self, apply_deltas, on_applied=None, directory: str = None,
+                 flush_interval: float = 2.0):
+        self.apply_deltas = apply_deltas
+        self.on_applied = on_applied
+        self.directory = directory or os.getenv('CREDIT_LEDGER_DIR', os.path.join('.holocrypt', 'ledger'))
+        self.flush_interval = flush_interval
+
+        # Held for every pending-balance read/write; never held across I/O to the backend
+        self.lock = threading.RLock()
+        # Held for the whole of a flush; readers take it to see the database between flushes
+        self.flush_lock = threading.Lock()
+
+        self._pending = {}
+        self._file = None
+        self._pid = None
+        self._thread = None
+        self._stop = threading.Event()
+        atexit.register(self.close)
+
+    # --- File handling ---
+
+    def _ledger_path(self) -> str:
+        name = f'credits.{os.getpid()}.jsonl' if fcntl else 'credits.jsonl'
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def _try_lock(fh) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _read_entries(fh):
+        fh.seek(0)
+        for line in fh:
+            try:
+                entry = json.loads(line)
+                yield entry['user_id'], int(entry['delta'])
+            except (ValueError, KeyError, TypeError):
+                continue  # torn write at the tail of a crashed ledger
+
+    @staticmethod
+    def _write_entry(fh, user_id: str, delta: int):
+        fh.write(json.dumps({'user_id': user_id, 'delta': delta, 'ts': time.time()}) + '\n')
+
+    def _ensure_open(self):
+        """Open (or re-open after fork) this process's ledger and adopt orphans."""
+        if self._file is not None and self._pid == os.getpid():
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._pending = {}
+        self._pid = os.getpid()
+        self.path = self._ledger_path()
+        self._file = open(self.path, 'a+', encoding='utf-8')
+        self._try_lock(self._file)
+
+        for user_id, delta in self._read_entries(self._file):
+            self._pending[user_id] = self._pending.get(user_id, 0) + delta
+
+        # Replay ledgers whose owning process is gone (their lock is free)
+        for orphan_path in glob.glob(os.path.join(self.directory, 'credits*.jsonl')):
+            if os.path.abspath(orphan_path) == os.path.abspath(self.path):
+                continue
+            with open(orphan_path, 'r+', encoding='utf-8') as orphan:
+                if not self._try_lock(orphan):
+                    continue
+                entries = list(self._read_entries(orphan))
+                for user_id, delta in entries:
+                    self._write_entry(self._file, user_id, delta)
+                    self._pending[user_id] = self._pending.get(user_id, 0) + delta
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                os.remove(orphan_path)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='credit-ledger-flusher', daemon=True)
+        self._thread.start()
+
+    def _compact(self):
+        """Rewrite the ledger so it only holds what is still pending."""
+        tmp_path = self.path + '.tmp'
+        tmp = open(tmp_path, 'w+', encoding='utf-8')
+        self._try_lock(tmp)
+        for user_id, delta in self._pending.items():
+            self._write_entry(tmp, user_id, delta)
+        tmp.flush()
+        os.fsync(tmp.fileno())
+        os.replace(tmp_path, self.path)
+        self._file.close()
+        self._file = tmp
+
+    # --- Public API ---
+
+    def append(self, user_id: str, delta: int):
+        """Durably record a credit change. Call with ``lock`` held for check-then-append."""
+        with self.lock:
+            self._ensure_open()
+            self._write_entry(self._file, user_id, delta)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending[user_id] = self._pending.get(user_id, 0) + delta
+
+    def pending_delta(self, user_id: str) -> int:
+        """Net change for a user that has not reached the backend yet."""
+        with self.lock:
+            self._ensure_open()
+            return self._pending.get(user_id, 0)
+
+    def flush(self) -> int:
+        """
+        Push all pending deltas to the backend in one batch.
+
+        Returns:
+            Number of users whose balance was written
+        """
+        with self.flush_lock:
+            with self.lock:
+                self._ensure_open()
+                batch = {user_id: delta for user_id, delta in self._pending.items() if delta}
+            if not batch:
+                return 0
+
+            applied = self.apply_deltas(batch) or {}
+
+            with self.lock:
+                for user_id in applied:
+                    remaining = self._pending.get(user_id, 0) - batch[user_id]
+                    if remaining:
+                        self._pending[user_id] = remaining
+                    else:
+                        self._pending.pop(user_id, None)
+                if self.on_applied:
+                    self.on_applied(applied)
+                self._compact()
+            return len(applied)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Credit ledger flush failed: {e}")
+
+    def close(self):
+        """Stop the flusher and make a final attempt to drain the ledger."""
+        if self._file is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️ Credit ledger flush failed: {e}")
+        with self.lock:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,53 @@
+"""
+Gunicorn configuration for HoloCrypt
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app   # async delivery routes
+
+Environment overrides: PORT, WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_TIMEOUT,
+GUNICORN_MAX_REQUESTS
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+# gunicorn's 2 * cores + 1: cipher, QR and PDF work keeps every core busy, and
+# the spare workers cover requests blocked on Resend, Twilio or IPFS
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Import app.py (and with it holocrypt_enhanced, NLTK, ReportLab, ...) once in
+# the master; workers inherit the loaded modules copy-on-write
+preload_app = True
+
+# Graceful shutdown: on SIGTERM workers finish in-flight requests (Resend and
+# Twilio calls included) for up to graceful_timeout seconds before being killed
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth. An async worker serves
+# far more requests per second, so raise this for asgi:app (0 disables it)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    """Runs in the master after the app is preloaded and before any worker forks."""
+    from holocrypt_enhanced import warm_up
+    warm_up()
+    server.log.info("HoloCrypt warmed up; forking %s workers", workers)
+
+
+def child_exit(server, worker):
+    """Runs in the master when a worker exits; frees its share of the admission budget."""
+    # The preloaded app's AdmissionController counts in-flight cost in memory
+    # shared by all workers, so a worker killed mid-request would leak its share
+    from app import app
+    app.extensions['holocrypt_limiter'].admission.reap(worker.pid)
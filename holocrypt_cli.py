@@ -0,0 +1,380 @@
+"""
+HoloCrypt CLI
+Bulk encryption and decryption of files and directories with the byte ciphers
+
+    python holocrypt_cli.py encrypt notes/ -o sealed/ -c vigenere -p '{"keyword": "SECRET"}'
+    python holocrypt_cli.py decrypt sealed/ -o notes/ -c vigenere -p '{"keyword": "SECRET"}'
+    python holocrypt_cli.py encrypt big.txt -o out/ -c chain -p @chain.json -j 8 --chunk-size 32
+
+Files are processed as bytes (byte_ciphers): ASCII letters are enciphered,
+every other byte (multi-byte UTF-8 included) passes through, and decrypting
+gives back the input byte for byte. Directories are walked recursively and
+mirrored under the output directory.
+
+Inputs are memory-mapped read-only and every output is preallocated at its
+final size and memory-mapped for writing, so workers read from and write to
+the page cache directly and no data passes through pipes. Large files are
+split into chunks (--chunk-size) spread over a process pool:
+
+- Caesar, Atbash and substitution are letter-for-letter, so split anywhere
+- Vigenere (and chains of letter-for-letter steps) too: a first pass counts
+  the letters in every chunk, and each chunk then starts with its keyword
+  rotated to the key position the letters before it have reached
+- transpositions (rail fence, permutation, chains containing them) move
+  bytes across the whole file, so each such file is one task
+"""
+
+import argparse
+import concurrent.futures
+import json
+import mmap
+import os
+import sys
+import time
+
+import numpy as np
+
+import cipher_chain
+from byte_ciphers import IS_LETTER, shuffle_bytes_by_cipher, decipher_bytes
+
+DEFAULT_CHUNK_MB = 16
+LETTER_MAPS = cipher_chain.PURE_MAPS + ('vigenere',)
+
+
+# --- Planning ---
+
+def _steps(cipher_type: str, cipher_params: dict) -> list:
+    cipher_type = cipher_type.lower()
+    if cipher_type == 'chain':
+        return cipher_chain.chain_steps(cipher_params)
+    return [(cipher_type, cipher_params)]
+
+
+def check_cipher(cipher_type: str, cipher_params: dict):
+    """
+    Raises:
+        ValueError: The cipher can't round-trip a file (substitution without a key)
+    """
+    for step_type, params in _steps(cipher_type, cipher_params):
+        if step_type == 'substitution' and not params.get('substitution_key'):
+            raise ValueError("Substitution needs a 'substitution_key': a random key could not be recovered")
+
+
+def splittable(cipher_type: str, cipher_params: dict) -> bool:
+    """Whether chunks can be enciphered independently (no transposition step)."""
+    return all(step_type in LETTER_MAPS for step_type, _ in _steps(cipher_type, cipher_params))
+
+
+def keyed(cipher_type: str, cipher_params: dict) -> bool:
+    """Whether a chunk's result depends on the letters before it (a Vigenere step)."""
+    return any(step_type == 'vigenere' for step_type, _ in _steps(cipher_type, cipher_params))
+
+
+def at_key_offset(cipher_type: str, cipher_params: dict, letters: int) -> tuple:
+    """
+    The same cipher, started ``letters`` letters into its key.
+
+    Vigenere on a chunk preceded by ``letters`` letters equals Vigenere with
+    the keyword rotated left by letters % len(keyword). Letter-for-letter
+    steps keep letters letters, so the count is the same for every step of
+    a chain, in either direction.
+
+    Returns:
+        (cipher_type, cipher_params)
+    """
+    def rotated(step_type: str, params: dict) -> dict:
+        if step_type == 'vigenere':
+            keyword = params.get('keyword', 'KEY').upper()
+            if not keyword:
+                raise ValueError("Vigenere keyword must not be empty")
+            shift = letters % len(keyword)
+            params = {**params, 'keyword': keyword[shift:] + keyword[:shift]}
+        return {'cipher_type': step_type, 'cipher_params': params}
+
+    if cipher_type.lower() == 'chain':
+        return 'chain', {'steps': [rotated(t, p) for t, p in cipher_chain.chain_steps(cipher_params)]}
+    step = rotated(cipher_type.lower(), cipher_params)
+    return step['cipher_type'], step['cipher_params']
+
+
+def collect(inputs: list, output_dir: str) -> list:
+    """
+    (source, destination, size) for every input file, directories walked recursively.
+
+    Raises:
+        ValueError: A destination is an input or two inputs map to one destination
+    """
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    source = os.path.join(root, name)
+                    files.append((source, os.path.join(output_dir, os.path.relpath(source, path))))
+        elif os.path.isfile(path):
+            files.append((path, os.path.join(output_dir, os.path.basename(path))))
+        else:
+            raise ValueError(f"{path}: no such file or directory")
+
+    seen = {}
+    sources = {os.path.realpath(source) for source, _ in files}
+    for source, destination in files:
+        real = os.path.realpath(destination)
+        if real in sources:
+            raise ValueError(f"{destination} would overwrite an input")
+        if real in seen:
+            raise ValueError(f"{source} and {seen[real]} both map to {destination}")
+        seen[real] = source
+    return [(source, destination, os.path.getsize(source)) for source, destination in files]
+
+
+def _preallocate(path: str, size: int):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as fh:
+        if size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fh.fileno(), 0, size)  # Fail now, not mid-write, if the disk is full
+                return
+            except OSError:
+                pass  # Unsupported by the filesystem
+        fh.truncate(size)
+
+
+# --- Workers ---
+
+def _count_letters(task: tuple) -> int:
+    path, start, end = task
+    with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as source:
+        chunk = np.frombuffer(source, dtype=np.uint8, count=end - start, offset=start)
+        count = int(np.count_nonzero(IS_LETTER[chunk]))
+        del chunk  # Release the mapping before it closes
+    return count
+
+
+def _transform(task: tuple) -> int:
+    source_path, target_path, start, end, cipher_type, cipher_params, decipher = task
+    transform = decipher_bytes if decipher else shuffle_bytes_by_cipher
+    with open(source_path, 'rb') as source_fh, open(target_path, 'r+b') as target_fh:
+        with mmap.mmap(source_fh.fileno(), 0, access=mmap.ACCESS_READ) as source, \
+                mmap.mmap(target_fh.fileno(), 0, access=mmap.ACCESS_WRITE) as target:
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                source.madvise(mmap.MADV_SEQUENTIAL, start - start % mmap.PAGESIZE,
+                               end - start + start % mmap.PAGESIZE)
+            with memoryview(source) as data, memoryview(target) as out:
+                with data[start:end] as chunk_in, out[start:end] as chunk_out:
+                    transform(chunk_in, cipher_type, cipher_params, out=chunk_out)
+    return end - start
+
+
+def _completed(executor, func, tasks: list):
+    """Yields (task, result or exception) as tasks finish, in the pool or inline."""
+    if executor is None:
+        for task in tasks:
+            try:
+                yield task, func(task)
+            except Exception as e:
+                yield task, e
+        return
+    futures = {executor.submit(func, task): task for task in tasks}
+    for future in concurrent.futures.as_completed(futures):
+        try:
+            yield futures[future], future.result()
+        except Exception as e:
+            yield futures[future], e
+
+
+# --- Progress ---
+
+def human_bytes(count: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if count < 1000:
+            return f"{count:.1f} {unit}" if unit != 'B' else f"{int(count)} B"
+        count /= 1000
+    return f"{count:.1f} TB"
+
+
+class Progress:
+    """One updating line on a terminal (a line every few seconds otherwise): done, percent, rate."""
+
+    def __init__(self, total: int, stream=None, enabled: bool = True):
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.enabled = enabled
+        self.tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.interval = 0.2 if self.tty else 5.0
+        self.start = time.perf_counter()
+        self.done = 0
+        self.files_done = 0
+        self._last = self.start
+
+    def update(self, nbytes: int = 0, files: int = 0):
+        self.done += nbytes
+        self.files_done += files
+        now = time.perf_counter()
+        if self.enabled and now - self._last >= self.interval:
+            self._last = now
+            self._write(now)
+
+    def _write(self, now: float):
+        elapsed = max(now - self.start, 1e-9)
+        percent = 100.0 * self.done / self.total if self.total else 100.0
+        line = (f"{percent:5.1f}%  {human_bytes(self.done)} / {human_bytes(self.total)}  "
+                f"{human_bytes(self.done / elapsed)}/s  {self.files_done} files")
+        self.stream.write(('\r' + line + '\033[K') if self.tty else line + '\n')
+        self.stream.flush()
+
+    def close(self):
+        if self.enabled:
+            self._write(time.perf_counter())
+            if self.tty:
+                self.stream.write('\n')
+            self.stream.flush()
+
+
+# --- Runner ---
+
+def process(files: list, cipher_type: str, cipher_params: dict, decipher: bool = False,
+            workers: int = None, chunk_size: int = DEFAULT_CHUNK_MB << 20, progress: Progress = None) -> dict:
+    """
+    Encrypts (or decrypts) every (source, destination, size) in ``files``.
+
+    Args:
+        workers: Pool size (default: CPU count); 1 runs in this process
+        chunk_size: Bytes per task for ciphers that can be split
+        progress: Optional Progress to update as chunks finish
+
+    Returns:
+        Summary dict (files, bytes, chunks, workers, seconds, throughput, failed)
+    """
+    check_cipher(cipher_type, cipher_params)
+    workers = workers or os.cpu_count() or 1
+    split = splittable(cipher_type, cipher_params)
+    start_time = time.perf_counter()
+
+    ranges = {}  # source -> [(start, end), ...]
+    for source, destination, size in files:
+        _preallocate(destination, size)
+        step = chunk_size if split else max(size, 1)
+        ranges[source] = [(start, min(start + step, size)) for start in range(0, size, step)]
+
+    executor = concurrent.futures.ProcessPoolExecutor(workers) if workers > 1 else None
+    failed = {}
+    try:
+        # Letters before each chunk, so every chunk knows its key position
+        letters = {}
+        if split and keyed(cipher_type, cipher_params):
+            count_tasks = [(source, start, end) for source, chunks in ranges.items() for start, end in chunks]
+            for (source, start, _), count in _completed(executor, _count_letters, count_tasks):
+                if isinstance(count, Exception):
+                    failed[source] = count
+                letters[(source, start)] = count
+
+        tasks = []
+        for source, destination, size in files:
+            if source in failed:
+                continue
+            before = 0
+            for start, end in ranges[source]:
+                chunk_type, chunk_params = cipher_type, cipher_params
+                if letters:
+                    chunk_type, chunk_params = at_key_offset(cipher_type, cipher_params, before)
+                    before += letters[(source, start)]
+                tasks.append((source, destination, start, end, chunk_type, chunk_params, decipher))
+        tasks.sort(key=lambda task: task[2] - task[3])  # Largest first, for an even finish
+
+        remaining = {source: len(chunks) for source, chunks in ranges.items()}
+        if progress is not None:
+            progress.update(files=sum(1 for count in remaining.values() if not count))
+        for task, result in _completed(executor, _transform, tasks):
+            source = task[0]
+            if isinstance(result, Exception):
+                failed[source] = result
+                result = 0
+            remaining[source] -= 1
+            if progress is not None:
+                progress.update(result, files=0 if remaining[source] else 1)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if progress is not None:
+            progress.close()
+
+    for source, destination, _ in files:
+        if source in failed:
+            try:
+                os.remove(destination)  # Never leave a half-written output behind
+            except OSError:
+                pass
+
+    seconds = time.perf_counter() - start_time
+    total = sum(size for source, _, size in files if source not in failed)
+    return {
+        'files': len(files) - len(failed),
+        'bytes': total,
+        'chunks': sum(len(chunks) for chunks in ranges.values()),
+        'workers': workers,
+        'seconds': seconds,
+        'throughput_mb_s': total / seconds / 1e6 if seconds else 0.0,
+        'failed': {source: str(error) for source, error in failed.items()},
+    }
+
+
+# --- Command line ---
+
+def _params(value: str) -> dict:
+    """--params: a JSON object, or @file containing one."""
+    if value.startswith('@'):
+        with open(value[1:], 'r', encoding='utf-8') as fh:
+            value = fh.read()
+    try:
+        params = json.loads(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid JSON: {e}")
+    if not isinstance(params, dict):
+        raise argparse.ArgumentTypeError("cipher params must be a JSON object")
+    return params
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='holocrypt', description="Encrypt or decrypt files with HoloCrypt ciphers")
+    commands = parser.add_subparsers(dest='command', required=True)
+    for command in ('encrypt', 'decrypt'):
+        sub = commands.add_parser(command, help=f"{command.capitalize()} files and directories")
+        sub.add_argument('inputs', nargs='+', help="Files or directories (walked recursively)")
+        sub.add_argument('-o', '--output', required=True, help="Output directory")
+        sub.add_argument('-c', '--cipher', default='caesar',
+                         help="caesar, vigenere, atbash, substitution, rail_fence, chain, permutation")
+        sub.add_argument('-p', '--params', type=_params, default={},
+                         help='Cipher params as JSON, or @file.json (e.g. \'{"keyword": "SECRET"}\')')
+        sub.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help="Worker processes (1: no pool)")
+        sub.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_MB, help="Chunk size in MB")
+        sub.add_argument('-q', '--quiet', action='store_true', help="No progress line")
+        sub.add_argument('--json', action='store_true', help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        check_cipher(args.cipher, args.params)
+        files = collect(args.inputs, args.output)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1 MB")
+
+    progress = Progress(sum(size for _, _, size in files), enabled=not args.quiet and not args.json)
+    summary = process(files, args.cipher, args.params, decipher=args.command == 'decrypt',
+                      workers=max(args.workers or 1, 1), chunk_size=args.chunk_size << 20, progress=progress)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        verb = 'Encrypted' if args.command == 'encrypt' else 'Decrypted'
+        print(f"{verb} {summary['files']} files, {human_bytes(summary['bytes'])} in {summary['seconds']:.2f} s "
+              f"({summary['throughput_mb_s']:.0f} MB/s, {summary['chunks']} chunks, {summary['workers']} workers)")
+        for source, error in summary['failed'].items():
+            print(f"failed: {source}: {error}", file=sys.stderr)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
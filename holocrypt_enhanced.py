@@ -1,6 +1,14 @@
+import asyncio
 import os
 import qrcode
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+from cryptography.fernet import InvalidToken
+from cryptography.exceptions import InvalidTag
+from collections import OrderedDict
 from io import BytesIO
 import requests
 import json
@@ -8,6 +16,7 @@ from dotenv import load_dotenv
 from PIL import Image
 import numpy as np
 import hashlib
+import hmac
 import random
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -20,8 +29,20 @@ from reportlab.lib.utils import ImageReader
 import nltk
 from nltk.corpus import words
 import base64
+import functools
+import struct
+import threading
 import urllib.parse
 from pypdf import PdfReader, PdfWriter
+from credit_ledger import BalanceCache, CreditLedger
+import metrics
+import ipfs_cache
+import ipfs_upload
+import word_set
+import qr_payload
+import cipher_chain
+import cipher_engines
+import png_stream
 
 # Download NLTK data (run once)
 try:
@@ -38,15 +59,155 @@ def generate_key():
     """Generates a new Fernet key (AES-256)."""
     return Fernet.generate_key()
 
+@functools.lru_cache(maxsize=256)
+def _fernet(key: bytes) -> Fernet:
+    """Fernet instances keyed by key; building one decodes and splits the key every time."""
+    return Fernet(key)
+
 def encrypt_data(data: bytes, key: bytes) -> bytes:
     """Encrypts data using AES-256 (Fernet)."""
-    f = Fernet(key)
-    return f.encrypt(data)
+    return _fernet(key).encrypt(data)
 
 def decrypt_data(encrypted_data: bytes, key: bytes) -> bytes:
     """Decrypts data using AES-256 (Fernet)."""
-    f = Fernet(key)
-    return f.decrypt(encrypted_data)
+    return _fernet(key).decrypt(encrypted_data)
+
+# --- Streaming Encryption (chunked AES-256-GCM) ---
+#
+# Stream format ("HCS1"), for payloads too large to hold in memory:
+#   header: b"HCS1" | chunk_size (u32 BE) | nonce_prefix (7 bytes)
+#   frames: length (u32 BE) | AES-GCM ciphertext + 16-byte tag
+# Frame i uses nonce = nonce_prefix | i (u32 BE) | last-frame flag (1 byte) and
+# the header as associated data, so frames cannot be reordered, dropped,
+# truncated or moved between streams without failing authentication.
+
+STREAM_MAGIC = b"HCS1"
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_STREAM_CHUNK_SIZE = 16 * 1024 * 1024  # Largest frame decrypt_stream will buffer
+_STREAM_HEADER = struct.Struct(">4sI7s")
+_FRAME_LENGTH = struct.Struct(">I")
+_GCM_TAG_SIZE = 16
+
+@functools.lru_cache(maxsize=256)
+def _stream_cipher(key: bytes) -> AESGCM:
+    """AES-256-GCM instance for a Fernet key (HKDF-SHA256 derived, domain-separated)."""
+    stream_key = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"holocrypt-stream-v1",
+    ).derive(base64.urlsafe_b64decode(key))
+    return AESGCM(stream_key)
+
+def _stream_nonce(prefix: bytes, index: int, last: bool) -> bytes:
+    return prefix + struct.pack(">IB", index, 1 if last else 0)
+
+def _read_exact(source, size: int) -> bytes:
+    """Up to ``size`` bytes, short only at end of stream (pipes and sockets return partial reads)."""
+    data = source.read(size)
+    if not data or len(data) == size:
+        return data or b""
+    parts = [data]
+    remaining = size - len(data)
+    while remaining:
+        part = source.read(remaining)
+        if not part:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b"".join(parts)
+
+def encrypt_stream(source, destination, key: bytes, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """
+    Encrypts a byte stream of any length in constant memory.
+    
+    Args:
+        source: Readable binary file object (plaintext)
+        destination: Writable binary file object (receives the HCS1 stream)
+        key: Fernet key from generate_key()
+        chunk_size: Plaintext bytes per frame, 1 to MAX_STREAM_CHUNK_SIZE
+    
+    Returns:
+        Number of plaintext bytes encrypted
+    """
+    if not 0 < chunk_size <= MAX_STREAM_CHUNK_SIZE:
+        raise ValueError(f"Stream chunk size must be between 1 and {MAX_STREAM_CHUNK_SIZE} bytes")
+    cipher = _stream_cipher(key)
+    header = _STREAM_HEADER.pack(STREAM_MAGIC, chunk_size, os.urandom(7))
+    prefix = header[-7:]
+    destination.write(header)
+    
+    total = 0
+    index = 0
+    chunk = _read_exact(source, chunk_size)
+    while True:
+        # Read one chunk ahead so the final frame can be flagged
+        next_chunk = _read_exact(source, chunk_size) if len(chunk) == chunk_size else b""
+        last = not next_chunk
+        sealed = cipher.encrypt(_stream_nonce(prefix, index, last), chunk, header)
+        destination.write(_FRAME_LENGTH.pack(len(sealed)))
+        destination.write(sealed)
+        total += len(chunk)
+        if last:
+            return total
+        chunk = next_chunk
+        index += 1
+
+def decrypt_stream(source, destination, key: bytes) -> int:
+    """
+    Decrypts an HCS1 stream produced by encrypt_stream, in constant memory.
+    
+    Raises:
+        ValueError: If the stream is malformed, truncated or fails authentication,
+            or its header declares frames over MAX_STREAM_CHUNK_SIZE.
+            Frames before the failure may already have been written.
+    
+    Returns:
+        Number of plaintext bytes written
+    """
+    cipher = _stream_cipher(key)
+    header = _read_exact(source, _STREAM_HEADER.size)
+    if len(header) != _STREAM_HEADER.size:
+        raise ValueError("Not a HoloCrypt stream: header too short")
+    magic, chunk_size, prefix = _STREAM_HEADER.unpack(header)
+    if magic != STREAM_MAGIC:
+        raise ValueError("Not a HoloCrypt stream: bad magic")
+    if not 0 < chunk_size <= MAX_STREAM_CHUNK_SIZE:
+        # The header is only authenticated with the first frame; don't let it size our reads
+        raise ValueError("HoloCrypt stream corrupted: chunk size out of range")
+    
+    total = 0
+    index = 0
+    while True:
+        length_bytes = _read_exact(source, _FRAME_LENGTH.size)
+        if len(length_bytes) != _FRAME_LENGTH.size:
+            raise ValueError("HoloCrypt stream truncated: final frame missing")
+        (length,) = _FRAME_LENGTH.unpack(length_bytes)
+        if length > chunk_size + _GCM_TAG_SIZE:
+            raise ValueError("HoloCrypt stream corrupted: oversized frame")
+        sealed = _read_exact(source, length)
+        if len(sealed) != length:
+            raise ValueError("HoloCrypt stream truncated inside a frame")
+        
+        # A short frame must be the last one; a full one is tried as "more to come" first
+        flags = (False, True) if length == chunk_size + _GCM_TAG_SIZE else (True,)
+        chunk = None
+        for last in flags:
+            try:
+                chunk = cipher.decrypt(_stream_nonce(prefix, index, last), sealed, header)
+                break
+            except InvalidTag:
+                continue
+        if chunk is None:
+            raise ValueError("HoloCrypt stream failed authentication")
+        
+        destination.write(chunk)
+        total += len(chunk)
+        if last:
+            if source.read(1):
+                raise ValueError("HoloCrypt stream corrupted: data after final frame")
+            return total
+        index += 1
 
 def generate_access_code_hash(access_code: str) -> str:
     """Generates SHA-256 hash of access code for verification."""
@@ -65,31 +226,35 @@ def shuffle_data_by_cipher(data: str, cipher_type: str, cipher_params: dict) ->
     
     Returns:
         Shuffled/encrypted text
+    
+    Raises:
+        ValueError: A shift, keyword or rails parameter is invalid
     """
     if cipher_type.lower() == "caesar":
-        shift = cipher_params.get('shift', 3)
-        return caesar_cipher(data, shift)
+        shift = cipher_chain.shift_param(cipher_params)
+        return cipher_engines.select('caesar', len(data))(data, shift)
     
     elif cipher_type.lower() == "vigenere":
-        keyword = cipher_params.get('keyword', 'KEY')
-        return vigenere_cipher(data, keyword)
+        keyword = cipher_chain.keyword_param(cipher_params)
+        return cipher_engines.select('vigenere', len(data))(data, keyword)
     
     elif cipher_type.lower() == "atbash":
-        return atbash_cipher(data)
+        return cipher_engines.select('atbash', len(data))(data)
     
     elif cipher_type.lower() == "substitution":
         key = cipher_params.get('substitution_key', None)
-        return substitution_cipher(data, key)
+        return cipher_engines.select('substitution', len(data))(data, key)
     
     elif cipher_type.lower() == "rail_fence":
-        rails = cipher_params.get('rails', 3)
-        return rail_fence_cipher(data, rails)
+        rails = cipher_chain.rails_param(cipher_params)
+        return cipher_engines.select('rail_fence', len(data))(data, rails)
+    
+    elif cipher_type.lower() == "chain":
+        return cipher_chain_text(data, cipher_params)
     
     else:
-        # Default: simple character shuffling
-        chars = list(data)
-        random.shuffle(chars)
-        return ''.join(chars)
+        # Default: keyed permutation ("permutation" or any unknown type), undone by decipher_data
+        return permutation_cipher(data, cipher_chain.permutation_key(cipher_type, cipher_params))
 
 def caesar_cipher(text: str, shift: int) -> str:
     """Caesar cipher encryption."""
@@ -172,7 +337,7 @@ def substitution_cipher(text: str, key: str = None) -> str:
 
 def rail_fence_cipher(text: str, rails: int) -> str:
     """Rail fence cipher encryption."""
-    if rails == 1:
+    if rails == 1 or rails >= len(text):  # Every character on its own rail, in order
         return text
     
     fence = [[] for _ in range(rails)]
@@ -190,7 +355,7 @@ def rail_fence_cipher(text: str, rails: int) -> str:
 
 def rail_fence_decipher(text: str, rails: int) -> str:
     """Rail fence cipher decryption."""
-    if rails == 1:
+    if rails == 1 or rails >= len(text):
         return text
     
     fence = [['' for _ in range(len(text))] for _ in range(rails)]
@@ -224,6 +389,20 @@ def rail_fence_decipher(text: str, rails: int) -> str:
     
     return ''.join(result)
 
+def _permute_text(text: str, order: np.ndarray) -> str:
+    """Reorders the characters of text: result[j] = text[order[j]]."""
+    if text.isascii():
+        return np.frombuffer(text.encode('ascii'), dtype=np.uint8)[order].tobytes().decode('ascii')
+    return np.frombuffer(text.encode('utf-32-le'), dtype='<u4')[order].tobytes().decode('utf-32-le')
+
+def permutation_cipher(text: str, key) -> str:
+    """Permutation cipher encryption: characters reordered by a key-derived permutation."""
+    return _permute_text(text, cipher_chain.permutation_order(key, len(text)))
+
+def permutation_decipher(text: str, key) -> str:
+    """Permutation cipher decryption."""
+    return _permute_text(text, cipher_chain.permutation_order(key, len(text), inverse=True))
+
 def decipher_data(encrypted_text: str, cipher_type: str, cipher_params: dict) -> str:
     """
     Decrypts data based on cipher type and parameters.
@@ -235,24 +414,144 @@ def decipher_data(encrypted_text: str, cipher_type: str, cipher_params: dict) ->
     
     Returns:
         Decrypted plaintext
+    
+    Raises:
+        ValueError: A shift, keyword or rails parameter is invalid
     """
     if cipher_type.lower() == "caesar":
-        shift = cipher_params.get('shift', 3)
-        return caesar_decipher(encrypted_text, shift)
+        shift = cipher_chain.shift_param(cipher_params)
+        return cipher_engines.select('caesar', len(encrypted_text))(encrypted_text, -shift)
     
     elif cipher_type.lower() == "vigenere":
-        keyword = cipher_params.get('keyword', 'KEY')
-        return vigenere_decipher(encrypted_text, keyword)
+        keyword = cipher_chain.keyword_param(cipher_params)
+        return cipher_engines.select('vigenere_decipher', len(encrypted_text))(encrypted_text, keyword)
     
     elif cipher_type.lower() == "atbash":
-        return atbash_cipher(encrypted_text)  # Atbash is its own inverse
+        return cipher_engines.select('atbash', len(encrypted_text))(encrypted_text)  # Atbash is its own inverse
     
     elif cipher_type.lower() == "rail_fence":
-        rails = cipher_params.get('rails', 3)
-        return rail_fence_decipher(encrypted_text, rails)
+        rails = cipher_chain.rails_param(cipher_params)
+        return cipher_engines.select('rail_fence_decipher', len(encrypted_text))(encrypted_text, rails)
+    
+    elif cipher_type.lower() == "substitution":
+        key = cipher_params.get('substitution_key')
+        if not key:
+            return encrypted_text  # A random key can't be recovered
+        inverse = cipher_chain.inverse_substitution_key(key)
+        return cipher_engines.select('substitution', len(encrypted_text))(encrypted_text, inverse)
+    
+    elif cipher_type.lower() == "chain":
+        return cipher_chain_text(encrypted_text, cipher_params, decipher=True)
     
     else:
-        return encrypted_text
+        return permutation_decipher(encrypted_text, cipher_chain.permutation_key(cipher_type, cipher_params))
+
+# --- Cipher Chains ---
+
+def _chain_map(text: str, step: tuple, phase: int) -> str:
+    """Applies one letter-for-letter chain step; Vigenere acts as its Caesar shift at ``phase``."""
+    if step[0] == 'caesar':
+        return caesar_cipher(text, step[1])
+    elif step[0] == 'vigenere':
+        keyword, sign = step[1], step[2]
+        return caesar_cipher(text, sign * (ord(keyword[phase % len(keyword)]) - ord('A')))
+    elif step[0] == 'atbash':
+        return atbash_cipher(text)
+    return substitution_cipher(text, step[1])
+
+@functools.lru_cache(maxsize=64)
+def _chain_table_for(alphabet: str, steps: tuple, period: int) -> tuple:
+    rows = []
+    for phase in range(period):
+        text = alphabet
+        for step in steps:
+            text = _chain_map(text, step, phase)
+        rows.append(np.frombuffer(text.encode('utf-32-le'), dtype='<u4'))
+    return cipher_chain.fuse_rows(np.stack(rows))
+
+def _chain_table(alphabet: np.ndarray, steps: tuple, period: int) -> tuple:
+    return _chain_table_for(alphabet.astype('<u4').tobytes().decode('utf-32-le'), steps, period)
+
+@functools.lru_cache(maxsize=64)
+def _chain_letters_for(alphabet: str) -> np.ndarray:
+    return np.array([c.isalpha() for c in alphabet], dtype=bool)
+
+def _chain_letters(alphabet: np.ndarray) -> np.ndarray:
+    return _chain_letters_for(alphabet.astype('<u4').tobytes().decode('utf-32-le'))
+
+def cipher_chain_text(text: str, cipher_params: dict, decipher: bool = False) -> str:
+    """
+    Encrypts (or decrypts) text with a cipher chain in one compiled plan.
+    
+    Same result as applying each step with shuffle_data_by_cipher in turn
+    (see cipher_chain for the spec and how steps are fused).
+    
+    Args:
+        text: Text to transform
+        cipher_params: {"steps": [{"cipher_type": ..., "cipher_params": {...}}, ...]}
+        decipher: Undo the chain instead (last step first)
+    
+    Returns:
+        Transformed text
+    """
+    stages = cipher_chain.compile_plan(cipher_chain.resolve_steps(cipher_params, decipher))
+    
+    # Text as indices into its alphabet: bytes for ASCII, sorted code points otherwise
+    if text.isascii():
+        alphabet = np.arange(128, dtype=np.uint32)
+        indices = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    else:
+        alphabet, indices = np.unique(np.frombuffer(text.encode('utf-32-le'), dtype='<u4'), return_inverse=True)
+    
+    alphabet, indices = cipher_chain.run_plan(stages, alphabet, indices, _chain_letters, _chain_table)
+    if not len(alphabet) or alphabet[-1] < 128:
+        return alphabet.astype(np.uint8)[indices].tobytes().decode('ascii')
+    return alphabet.astype('<u4')[indices].tobytes().decode('utf-32-le')
+
+# --- Cipher Engines ---
+# The functions above are the reference implementations; shuffle_data_by_cipher
+# and decipher_data pick per call between them and these NumPy engines (one-step
+# chains) by input length, using thresholds calibrated by cipher_engines.
+
+def _single_step(text: str, cipher_type: str, cipher_params: dict, decipher: bool = False) -> str:
+    return cipher_chain_text(text, {'steps': [{'cipher_type': cipher_type, 'cipher_params': cipher_params}]},
+                             decipher)
+
+def caesar_numpy(text: str, shift: int) -> str:
+    """Caesar cipher encryption, NumPy engine (same result as caesar_cipher)."""
+    return _single_step(text, 'caesar', {'shift': shift})
+
+def vigenere_numpy(text: str, keyword: str) -> str:
+    """Vigenere cipher encryption, NumPy engine."""
+    return _single_step(text, 'vigenere', {'keyword': keyword})
+
+def vigenere_decipher_numpy(text: str, keyword: str) -> str:
+    """Vigenere cipher decryption, NumPy engine."""
+    return _single_step(text, 'vigenere', {'keyword': keyword}, decipher=True)
+
+def atbash_numpy(text: str) -> str:
+    """Atbash cipher, NumPy engine."""
+    return _single_step(text, 'atbash', {})
+
+def substitution_numpy(text: str, key: str = None) -> str:
+    """Substitution cipher, NumPy engine."""
+    return _single_step(text, 'substitution', {'substitution_key': key})
+
+def rail_fence_numpy(text: str, rails: int) -> str:
+    """Rail fence cipher encryption, NumPy engine."""
+    return _single_step(text, 'rail_fence', {'rails': rails})
+
+def rail_fence_decipher_numpy(text: str, rails: int) -> str:
+    """Rail fence cipher decryption, NumPy engine."""
+    return _single_step(text, 'rail_fence', {'rails': rails}, decipher=True)
+
+cipher_engines.register('caesar', caesar_cipher, caesar_numpy, (5,))
+cipher_engines.register('vigenere', vigenere_cipher, vigenere_numpy, ('SECRET',))
+cipher_engines.register('vigenere_decipher', vigenere_decipher, vigenere_decipher_numpy, ('SECRET',))
+cipher_engines.register('atbash', atbash_cipher, atbash_numpy)
+cipher_engines.register('substitution', substitution_cipher, substitution_numpy, ('QWERTYUIOPASDFGHJKLZXCVBNM',))
+cipher_engines.register('rail_fence', rail_fence_cipher, rail_fence_numpy, (3,))
+cipher_engines.register('rail_fence_decipher', rail_fence_decipher, rail_fence_decipher_numpy, (3,))
 
 # --- NLTK Puzzle Generation ---
 
@@ -312,20 +611,50 @@ def generate_cipher_clue(cipher_type: str, cipher_params: dict) -> str:
         ]
         return clues[0]  # Direct clue
     
+    elif cipher_type.lower() == "permutation":
+        return f"Cipher Type: PERMUTATION | The letters were shuffled with the key: {cipher_chain.permutation_key(cipher_type, cipher_params)}"
+    
+    elif cipher_type.lower() == "chain":
+        layers = [_chain_step_clue(step_type, step_params)
+                  for step_type, step_params in cipher_chain.chain_steps(cipher_params)]
+        return "Cipher Type: CHAIN | Apply in order: " + ", ".join(
+            f"{i}. {layer}" for i, layer in enumerate(layers, 1))
+    
     else:
         return f"Cipher Type: {cipher_type.upper()} | Parameters: {cipher_params}"
 
-def generate_puzzle_with_nltk(original_text: str, difficulty: str = "medium") -> str:
+def _chain_step_clue(cipher_type: str, cipher_params: dict) -> str:
+    """Short clue for one layer of a cipher chain."""
+    if cipher_type == "caesar":
+        return f"CAESAR shift {cipher_params.get('shift', 3)}"
+    elif cipher_type == "vigenere":
+        return f"VIGENERE keyword {cipher_params.get('keyword', 'KEY')}"
+    elif cipher_type == "atbash":
+        return "ATBASH"
+    elif cipher_type == "rail_fence":
+        return f"RAIL FENCE {cipher_params.get('rails', 3)} rails"
+    elif cipher_type == "permutation":
+        return f"PERMUTATION key {cipher_chain.permutation_key(cipher_type, cipher_params)}"
+    elif cipher_type == "substitution":
+        return f"SUBSTITUTION key {cipher_params.get('substitution_key', 'QWERTYUIOPASDFGHJKLZXCVBNM')}"
+    return f"{cipher_type.upper()} {cipher_params}"
+
+@metrics.timed('puzzle')
+def generate_puzzle_with_nltk(original_text: str, difficulty: str = "medium",
+                              rng: random.Random = None) -> str:
     """
     Generates a word puzzle using NLTK when wrong cipher is entered.
     
     Args:
         original_text: The text to puzzleify
         difficulty: easy, medium, or hard
+        rng: Random instance to draw from (default: the global random module)
     
     Returns:
         Puzzled text
     """
+    rng = rng or random
+    
     try:
         word_list = words.words()
         
@@ -341,17 +670,17 @@ def generate_puzzle_with_nltk(original_text: str, difficulty: str = "medium") ->
             if difficulty == "easy":
                 # Replace with rhyming-ish word (similar ending)
                 similar = [w for w in word_list if len(w) == len(word) and w[-2:] == word[-2:]]
-                puzzled_words.append(random.choice(similar) if similar else word)
+                puzzled_words.append(rng.choice(similar) if similar else word)
             
             elif difficulty == "hard":
                 # Complete scramble with random words
                 similar = [w for w in word_list if len(w) == len(word)]
-                puzzled_words.append(random.choice(similar) if similar else word)
+                puzzled_words.append(rng.choice(similar) if similar else word)
             
             else:  # medium
                 # Anagram-style shuffling
                 chars = list(word)
-                random.shuffle(chars)
+                rng.shuffle(chars)
                 puzzled_words.append(''.join(chars))
         
         return ' '.join(puzzled_words)
@@ -359,91 +688,136 @@ def generate_puzzle_with_nltk(original_text: str, difficulty: str = "medium") ->
     except Exception as e:
         # Fallback: simple character shuffling
         chars = list(original_text)
-        random.shuffle(chars)
+        rng.shuffle(chars)
         return ''.join(chars)
 
-# --- LSB Steganography (Hide data in QR code images) ---
+@functools.lru_cache(maxsize=1)
+def _puzzle_secret() -> bytes:
+    """PUZZLE_SECRET, or a random secret persisted once and shared by all workers."""
+    secret = os.getenv('PUZZLE_SECRET')
+    if secret:
+        return secret.encode('utf-8')
+    
+    path = os.path.join('.holocrypt', 'puzzle_secret')
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(os.urandom(32))
+        try:
+            os.link(tmp_path, path)  # Atomic publish; the first worker's secret wins
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    with open(path, 'rb') as fh:
+        return fh.read()
 
-def hide_data_in_image(qr_image: Image.Image, encrypted_data: bytes, access_code_hash: str) -> Image.Image:
+# Puzzles are cached under (seed digest, length) rather than the text itself,
+# within an entry count and a total size in characters; texts over
+# PUZZLE_CACHE_MAX_TEXT characters are never cached
+PUZZLE_CACHE_SIZE = int(os.getenv('PUZZLE_CACHE_SIZE', 1024))
+PUZZLE_CACHE_MAX_CHARS = int(os.getenv('PUZZLE_CACHE_MAX_CHARS', 8 * 1024 * 1024))
+PUZZLE_CACHE_MAX_TEXT = int(os.getenv('PUZZLE_CACHE_MAX_TEXT', 64 * 1024))
+
+_puzzle_cache = OrderedDict()
+_puzzle_cache_chars = 0
+_puzzle_cache_lock = threading.Lock()
+
+def _cache_puzzle(key: tuple, puzzle: str):
+    global _puzzle_cache_chars
+    with _puzzle_cache_lock:
+        if key in _puzzle_cache:
+            return
+        _puzzle_cache[key] = puzzle
+        _puzzle_cache_chars += len(puzzle)
+        while len(_puzzle_cache) > PUZZLE_CACHE_SIZE or _puzzle_cache_chars > PUZZLE_CACHE_MAX_CHARS:
+            _, evicted = _puzzle_cache.popitem(last=False)
+            _puzzle_cache_chars -= len(evicted)
+
+def seeded_puzzle(original_text: str, difficulty: str = "medium") -> str:
     """
-    Hides encrypted data inside a QR code image using LSB steganography.
-    Returns a new Image object with hidden data.
+    Reproducible puzzle: the same text and difficulty always give the same
+    puzzle, seeded from an HMAC under the server secret so outputs can't be
+    predicted without it. Results for texts up to PUZZLE_CACHE_MAX_TEXT
+    characters are LRU-cached, so repeated wrong guesses on one ciphertext
+    cost nothing.
     """
-    # Convert encrypted data to base64 string for embedding
-    import base64
-    data_to_hide = base64.b64encode(encrypted_data).decode('utf-8')
-    
-    # Add access code hash as metadata
-    payload = json.dumps({
+    seed = hmac.new(_puzzle_secret(), f"{difficulty}\0{original_text}".encode('utf-8'), hashlib.sha256).digest()
+    cacheable = len(original_text) <= PUZZLE_CACHE_MAX_TEXT
+    key = (seed, len(original_text))
+    if cacheable:
+        with _puzzle_cache_lock:
+            puzzle = _puzzle_cache.get(key)
+            if puzzle is not None:
+                _puzzle_cache.move_to_end(key)
+                return puzzle
+    
+    puzzle = generate_puzzle_with_nltk(original_text, difficulty, rng=random.Random(seed))
+    if cacheable:
+        _cache_puzzle(key, puzzle)
+    return puzzle
+
+# --- LSB Steganography (Hide data in QR code images) ---
+
+def _stego_payload(encrypted_data: bytes, access_code_hash: str) -> bytes:
+    """JSON payload embedded by hide_data_in_image: access code hash plus base64 data."""
+    return json.dumps({
         'hash': access_code_hash,
-        'data': data_to_hide
-    })
-    
-    # Convert QR to RGB if needed
-    if qr_image.mode != 'RGB':
-        qr_image = qr_image.convert('RGB')
-    
-    # Embed data using LSB
-    img_array = np.array(qr_image)
+        'data': base64.b64encode(encrypted_data).decode('utf-8')
+    }).encode('utf-8')
+
+def hide_data_in_pixels(pixels: np.ndarray, encrypted_data: bytes, access_code_hash: str) -> None:
+    """
+    hide_data_in_image on a flat uint8 RGB pixel buffer, in place.
     
-    # Simple LSB implementation: encode payload length + payload
-    payload_bytes = payload.encode('utf-8')
+    Layout: payload length as 32 bits, then the payload, MSB first, one bit
+    per channel LSB. Works on any writable view (e.g. shared memory).
+    """
+    payload_bytes = _stego_payload(encrypted_data, access_code_hash)
     payload_length = len(payload_bytes)
     
-    # Store length in first pixels (4 bytes = 32 bits)
-    length_bits = format(payload_length, '032b')
-    
-    flat_array = img_array.flatten()
-    
     # Check if image has enough capacity
-    max_bytes = len(flat_array) // 8
+    max_bytes = len(pixels) // 8
     if payload_length > max_bytes - 4:
         raise ValueError("Image too small to hide this much data")
     
-    # Encode length
-    for i in range(32):
-        flat_array[i] = (flat_array[i] & 0xFE) | int(length_bits[i])
-    
-    # Encode payload
-    payload_bits = ''.join(format(byte, '08b') for byte in payload_bytes)
-    for i, bit in enumerate(payload_bits):
-        flat_array[32 + i] = (flat_array[32 + i] & 0xFE) | int(bit)
-    
-    # Reshape back to original shape
-    stego_array = flat_array.reshape(img_array.shape)
-    return Image.fromarray(stego_array.astype('uint8'), mode='RGB')
+    _write_lsb_bytes(pixels, 0, payload_length.to_bytes(4, 'big'))
+    _write_lsb_bytes(pixels, 32, payload_bytes)
 
-def extract_data_from_image(stego_image: Image.Image, access_code: str) -> bytes:
+def hide_data_in_image(qr_image: Image.Image, encrypted_data: bytes, access_code_hash: str) -> Image.Image:
     """
-    Extracts and decrypts hidden data from a steganographic image.
-    Verifies access code before returning data.
+    Hides encrypted data inside a QR code image using LSB steganography.
+    Returns a new Image object with hidden data.
     """
-    import base64
-    
-    # Convert to RGB if needed
-    if stego_image.mode != 'RGB':
-        stego_image = stego_image.convert('RGB')
-    
-    img_array = np.array(stego_image)
-    flat_array = img_array.flatten()
+    # Convert QR to RGB if needed
+    if qr_image.mode != 'RGB':
+        qr_image = qr_image.convert('RGB')
     
+    img_array = np.array(qr_image)  # copy; the input image is left untouched
+    hide_data_in_pixels(img_array.reshape(-1), encrypted_data, access_code_hash)
+    return Image.fromarray(img_array)
+
+def extract_data_from_pixels(pixels: np.ndarray, access_code: str) -> bytes:
+    """extract_data_from_image on a flat uint8 RGB pixel buffer."""
     # Check if array is large enough
-    if len(flat_array) < 32:
+    if len(pixels) < 32:
         raise ValueError("Image too small to contain hidden data")
     
     # Extract length (first 32 bits)
-    length_bits = ''.join(str(flat_array[i] & 1) for i in range(32))
-    payload_length = int(length_bits, 2)
+    payload_length = int.from_bytes(_read_lsb_bytes(pixels, 0, 4).tobytes(), 'big')
     
     # Validate payload length
-    max_bytes = (len(flat_array) - 32) // 8
+    max_bytes = (len(pixels) - 32) // 8
     if payload_length > max_bytes or payload_length <= 0:
         raise ValueError("Invalid payload length detected - image may not contain hidden data")
     
-    # Extract payload
-    payload_bits = ''.join(str(flat_array[32 + i] & 1) for i in range(payload_length * 8))
-    payload_bytes = bytes(int(payload_bits[i:i+8], 2) for i in range(0, len(payload_bits), 8))
-    
+    payload_bytes = _read_lsb_bytes(pixels, 32, payload_length).tobytes()
+    return _open_stego_payload(payload_bytes, access_code)
+
+def _open_stego_payload(payload_bytes: bytes, access_code: str) -> bytes:
+    """Checks the access code against an extracted _stego_payload and returns its data."""
     # Parse JSON payload
     try:
         payload = json.loads(payload_bytes.decode('utf-8'))
@@ -459,57 +833,297 @@ def extract_data_from_image(stego_image: Image.Image, access_code: str) -> bytes
     encrypted_data = base64.b64decode(payload['data'])
     return encrypted_data
 
+def extract_data_from_image(stego_image: Image.Image, access_code: str) -> bytes:
+    """
+    Extracts and decrypts hidden data from a steganographic image.
+    Verifies access code before returning data.
+    """
+    # Convert to RGB if needed
+    if stego_image.mode != 'RGB':
+        stego_image = stego_image.convert('RGB')
+    
+    return extract_data_from_pixels(np.frombuffer(stego_image.tobytes(), dtype=np.uint8), access_code)
+
+# --- Sealed Images (Fernet + LSB steganography in one pass) ---
+#
+# Same bit layout as hide_data_in_image (32-bit big-endian length, then the
+# payload MSB-first in the channel LSBs), but the payload is binary:
+#   b"HCI1" | scrypt salt (16 bytes) | raw Fernet token
+# The Fernet key is derived from the access code, so a wrong code fails
+# authentication instead of being compared against a stored hash.
+
+SEAL_MAGIC = b"HCI1"
+_SEAL_SALT_SIZE = 16
+
+def _access_code_key(access_code: str, salt: bytes) -> bytes:
+    """Fernet key derived from an access code with scrypt."""
+    raw = Scrypt(salt=salt, length=32, n=2**14, r=8, p=1).derive(access_code.encode('utf-8'))
+    return base64.urlsafe_b64encode(raw)
+
+def _write_lsb_bytes(pixels: np.ndarray, offset: int, data) -> None:
+    """Writes bytes MSB-first into the LSBs of pixels[offset:], one bit plane at a time."""
+    source = np.frombuffer(data, dtype=np.uint8)
+    end = offset + 8 * len(source)
+    for bit in range(8):
+        plane = pixels[offset + bit:end:8]  # view, no copy
+        plane &= 0xFE
+        plane |= (source >> (7 - bit)) & 1
+
+def _read_lsb_bytes(pixels: np.ndarray, offset: int, length: int) -> np.ndarray:
+    """Inverse of _write_lsb_bytes."""
+    out = np.zeros(length, dtype=np.uint8)
+    end = offset + 8 * length
+    for bit in range(8):
+        out |= (pixels[offset + bit:end:8] & 1) << (7 - bit)
+    return out
+
+def _payload_rows(payload_length: int, width: int) -> int:
+    """Image rows touched by a length header plus payload_length bytes (RGB)."""
+    return -(-(32 + 8 * payload_length) // (3 * width))
+
+def seal_into_image(data: bytes, access_code: str, cover_image: Image.Image = None) -> Image.Image:
+    """
+    Encrypts data with a key derived from the access code and hides it in an image.
+    
+    Only the band of rows that carries the payload is copied into a
+    preallocated buffer; the token is written into it bit plane by bit plane
+    through a NumPy view and the band is pasted onto a copy of the cover. This
+    skips the base64/JSON/bit-string and flatten/reshape/astype copies of
+    hide_data_in_image.
+    
+    Args:
+        data: Bytes (or any buffer) to protect
+        access_code: Code the receiver needs to open the image
+        cover_image: Image to hide the data in (default: generate_base_qr())
+    
+    Returns:
+        New RGB image holding the sealed data
+    """
+    if cover_image is None:
+        cover_image = generate_base_qr()
+    if cover_image.mode != 'RGB':
+        cover_image = cover_image.convert('RGB')
+    
+    salt = os.urandom(_SEAL_SALT_SIZE)
+    if not isinstance(data, bytes):
+        data = bytes(data)  # Fernet only accepts bytes
+    # Fernet tokens are urlsafe base64; embed the raw bytes instead
+    raw_token = base64.urlsafe_b64decode(Fernet(_access_code_key(access_code, salt)).encrypt(data))
+    payload_length = len(SEAL_MAGIC) + _SEAL_SALT_SIZE + len(raw_token)
+    
+    width, height = cover_image.size
+    rows = _payload_rows(payload_length, width)
+    if rows > height:
+        raise ValueError("Image too small to hide this much data")
+    
+    band_buffer = bytearray(cover_image.crop((0, 0, width, rows)).tobytes())
+    pixels = np.frombuffer(band_buffer, dtype=np.uint8)  # writable view of the buffer
+    _write_lsb_bytes(pixels, 0, payload_length.to_bytes(4, 'big'))
+    offset = 32
+    for part in (SEAL_MAGIC, salt, raw_token):
+        _write_lsb_bytes(pixels, offset, part)
+        offset += 8 * len(part)
+    
+    sealed = cover_image.copy()
+    sealed.paste(Image.frombuffer('RGB', (width, rows), band_buffer, 'raw', 'RGB', 0, 1), (0, 0))
+    return sealed
+
+def open_from_image(stego_image: Image.Image, access_code: str) -> bytes:
+    """
+    Recovers data hidden by seal_into_image.
+    
+    Raises:
+        ValueError: If the image holds no sealed data or the access code is wrong
+    """
+    if stego_image.mode != 'RGB':
+        stego_image = stego_image.convert('RGB')
+    
+    # Decode only the rows holding the header, then only those holding the payload
+    width, height = stego_image.size
+    if width * height * 3 < 32:
+        raise ValueError("Image too small to contain hidden data")
+    
+    rows = _payload_rows(0, width)
+    pixels = np.frombuffer(stego_image.crop((0, 0, width, rows)).tobytes(), dtype=np.uint8)
+    payload_length = int.from_bytes(_read_lsb_bytes(pixels, 0, 4).tobytes(), 'big')
+    header_length = len(SEAL_MAGIC) + _SEAL_SALT_SIZE
+    rows = _payload_rows(payload_length, width)
+    if payload_length <= header_length or rows > height:
+        raise ValueError("Invalid payload length detected - image may not contain sealed data")
+    
+    pixels = np.frombuffer(stego_image.crop((0, 0, width, rows)).tobytes(), dtype=np.uint8)
+    payload = _read_lsb_bytes(pixels, 32, payload_length)
+    if payload[:len(SEAL_MAGIC)].tobytes() != SEAL_MAGIC:
+        raise ValueError("Image does not contain sealed HoloCrypt data")
+    
+    salt = payload[len(SEAL_MAGIC):header_length].tobytes()
+    token = base64.urlsafe_b64encode(payload[header_length:])
+    try:
+        return Fernet(_access_code_key(access_code, salt)).decrypt(token)
+    except InvalidToken:
+        raise ValueError("Invalid access code")
+
+# --- Streaming Steganography (large PNG covers, a band of rows at a time) ---
+#
+# Same layout and pixels as hide_data_in_image / extract_data_from_image, but
+# the cover is read from a PNG file and the result written to one through
+# png_stream, so memory is bounded by the band size, not the image size.
+
+def hide_data_in_png(source, destination, encrypted_data: bytes, access_code_hash: str,
+                     band_rows: int = None) -> None:
+    """
+    hide_data_in_image for a PNG cover too large to decode at once.
+
+    Args:
+        source: Path or binary file object of the cover PNG
+        destination: Path (replaced atomically) or binary file object for the stego PNG
+        encrypted_data: Bytes to hide
+        access_code_hash: generate_access_code_hash() output
+        band_rows: Rows processed at a time (default: about 1 MB of pixels)
+
+    Raises:
+        ValueError: Unsupported PNG, or the image is too small for the data
+    """
+    payload_bytes = _stego_payload(encrypted_data, access_code_hash)
+    stream = np.frombuffer(len(payload_bytes).to_bytes(4, 'big') + payload_bytes, dtype=np.uint8)
+    total_bits = 8 * len(stream)
+
+    with png_stream.PNGReader(source) as reader:
+        # Check capacity from the header, before anything is written
+        if len(payload_bytes) > (reader.width * reader.height * 3) // 8 - 4:
+            raise ValueError("Image too small to hide this much data")
+
+        with png_stream.PNGWriter(destination, reader.width, reader.height) as writer:
+            offset = 0  # Channel index of the band's first byte in the whole image
+            for band in reader.bands(band_rows):
+                flat = band.reshape(-1)
+                if offset < total_bits:
+                    # Bits of the stream that land in this band
+                    count = min(len(flat), total_bits - offset)
+                    first = offset // 8
+                    bits = np.unpackbits(stream[first:-(-(offset + count) // 8)])
+                    bits = bits[offset - 8 * first:offset - 8 * first + count]
+                    flat[:count] &= 0xFE
+                    flat[:count] |= bits
+                offset += len(flat)
+                writer.write(band)
+
+def extract_data_from_png(source, access_code: str, band_rows: int = None) -> bytes:
+    """
+    extract_data_from_image for a PNG file, reading only the rows that hold the data.
+
+    Args:
+        source: Path or binary file object of the stego PNG
+        access_code: Access code given to the recipient
+        band_rows: Rows decoded at a time (default: about 1 MB of pixels)
+    """
+    with png_stream.PNGReader(source) as reader:
+        channels = reader.width * reader.height * 3
+        if channels < 32:
+            raise ValueError("Image too small to contain hidden data")
+
+        needed = 32  # Bits still to read: the length header first
+        payload_length = None
+        carry = np.zeros(0, dtype=np.uint8)  # LSBs not yet forming a whole byte
+        packed = []
+        for band in reader.bands(band_rows):
+            flat = band.reshape(-1)
+            start = 0
+            while needed and start < len(flat):
+                lsbs = flat[start:start + needed] & 1
+                start += len(lsbs)
+                needed -= len(lsbs)
+                bits = np.concatenate([carry, lsbs])
+                whole = len(bits) // 8 * 8
+                packed.append(np.packbits(bits[:whole]).tobytes())
+                carry = bits[whole:]
+
+                if not needed and payload_length is None:
+                    payload_length = int.from_bytes(b''.join(packed), 'big')
+                    if payload_length > (channels - 32) // 8 or payload_length <= 0:
+                        raise ValueError("Invalid payload length detected - image may not contain hidden data")
+                    packed = []
+                    needed = 8 * payload_length
+            if not needed:
+                break
+
+    return _open_stego_payload(b''.join(packed), access_code)
+
 # --- IPFS Integration (Pinata) ---
 
+def _png_bytes(image: Image.Image) -> memoryview:
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getbuffer()
+
 def upload_to_ipfs(image: Image.Image, filename: str = "holocrypt_qr.png") -> str:
     """
     Uploads steganographic image to IPFS using Pinata.
     Returns the IPFS CID.
     """
-    PINATA_JWT = os.getenv('PINATA_JWT')
-    
-    if not PINATA_JWT:
-        raise ValueError("PINATA_JWT not found in environment variables")
+    client = ipfs_upload.default_client()
     
-    url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
-    
-    headers = {
-        "Authorization": f"Bearer {PINATA_JWT}"
-    }
+    try:
+        return client.upload(_png_bytes(image), filename, content_type='image/png')['cid']
+    except Exception as e:
+        raise Exception(f"Failed to upload to IPFS: {str(e)}")
+
+def upload_file_to_ipfs(source, filename: str = None, skip_pinned: bool = False) -> str:
+    """
+    Uploads raw bytes, or a file streamed from disk, to IPFS using Pinata.
     
-    # Convert image to bytes
-    img_byte_arr = BytesIO()
-    image.save(img_byte_arr, format='PNG')
-    img_byte_arr.seek(0)
+    Args:
+        source: bytes-like object or file path
+        filename: Name for the pin (defaults to the file's basename)
+        skip_pinned: Don't upload if the locally computed CID is already pinned
     
-    files = {
-        'file': (filename, img_byte_arr, 'image/png')
-    }
+    Returns:
+        The IPFS CID
+    """
+    client = ipfs_upload.default_client()
     
     try:
-        response = requests.post(url, files=files, headers=headers)
-        response.raise_for_status()
-        result = response.json()
-        return result['IpfsHash']
+        return client.upload(source, filename, skip_pinned=skip_pinned)['cid']
     except Exception as e:
         raise Exception(f"Failed to upload to IPFS: {str(e)}")
 
+def upload_batch_to_ipfs(items: list, max_workers: int = 4, skip_pinned: bool = True) -> list:
+    """
+    Uploads many images/files concurrently over one pooled session.
+    
+    Args:
+        items: PIL images, bytes-like objects or file paths (or (item, filename) tuples)
+        max_workers: Maximum concurrent uploads
+        skip_pinned: Skip items whose locally computed CID is already pinned
+    
+    Returns:
+        One dict per item, in order: {'success', 'cid', 'uploaded'} or {'success': False, 'error'}
+    """
+    client = ipfs_upload.default_client()
+    
+    sources = []
+    for index, item in enumerate(items):
+        item, filename = item if isinstance(item, tuple) else (item, None)
+        if isinstance(item, Image.Image):
+            item, filename = _png_bytes(item), filename or f"holocrypt_qr_{index}.png"
+        sources.append((item, filename))
+    
+    return client.upload_many(sources, max_workers=max_workers, skip_pinned=skip_pinned)
+
 def get_from_ipfs(cid: str) -> Image.Image:
     """
     Retrieves image from IPFS using Pinata gateway.
+    Served from the local content-addressed cache (ipfs_cache) when possible.
     """
     try:
-        url = f"https://gateway.pinata.cloud/ipfs/{cid}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return Image.open(BytesIO(response.content))
+        return Image.open(ipfs_cache.default_cache().open(cid))
     except Exception as e:
         raise Exception(f"Failed to retrieve from IPFS: {str(e)}")
 
 # --- QR Code Generation with Website Redirect ---
 
 def generate_qr_with_redirect(website_url: str, encrypted_data: str, cipher_type: str, 
-                              cipher_params: dict) -> Image.Image:
+                              cipher_params: dict, encoding: str = 'base45') -> Image.Image:
     """
     Generates a QR code that redirects to your website with encrypted data as parameters.
     Works with both localhost (development) and deployed URLs (production).
@@ -519,6 +1133,8 @@ def generate_qr_with_redirect(website_url: str, encrypted_data: str, cipher_type
         encrypted_data: The encrypted cipher text
         cipher_type: Type of cipher used
         cipher_params: Cipher parameters
+        encoding: 'base45' or 'base64url' for the compact payload (see qr_payload),
+                  'legacy' for the old data/cipher/params query string
     
     Returns:
         QR code image
@@ -526,17 +1142,21 @@ def generate_qr_with_redirect(website_url: str, encrypted_data: str, cipher_type
     # Use Streamlit deployment URL as default
     deployment_url = os.getenv('DEPLOYMENT_URL', 'https://holocrypt-ewmtjmjwtyue4v8bkc2uik.streamlit.app')
     
-    # Create URL with encrypted data as query parameters
-    params = {
-        'data': base64.urlsafe_b64encode(encrypted_data.encode()).decode(),
-        'cipher': cipher_type,
-        'params': base64.urlsafe_b64encode(json.dumps(cipher_params).encode()).decode()
-    }
+    if encoding == 'legacy':
+        params = {
+            'data': base64.urlsafe_b64encode(encrypted_data.encode()).decode(),
+            'cipher': cipher_type,
+            'params': base64.urlsafe_b64encode(json.dumps(cipher_params).encode()).decode()
+        }
+        query = urllib.parse.urlencode(params)
+    else:
+        # One packed, compressed payload encoded once
+        query = qr_payload.encode_query(encrypted_data, cipher_type, cipher_params, encoding)
     
-    redirect_url = f"{deployment_url}?{urllib.parse.urlencode(params)}"
+    redirect_url = f"{deployment_url}?{query}"
     
     qr = qrcode.QRCode(
-        version=10,  # Larger version to hold URL with data
+        version=None,  # Smallest version that fits the URL
         error_correction=qrcode.constants.ERROR_CORRECT_H,
         box_size=10,
         border=4,
@@ -564,7 +1184,28 @@ def generate_base_qr(data: str = "HoloCrypt Protected Content") -> Image.Image:
 # --- Credit System (Database) ---
 
 class CreditSystem:
-    """Manages user credits for encoding/decoding operations."""
+    """
+    Manages user credits for encoding/decoding operations.
+
+    Balances are served from an in-process TTL cache plus the local ledger of
+    unflushed changes; deductions and additions are appended to the ledger and
+    written to Supabase in batches by a background flusher, so the database is
+    off the hot path of every encode or decode.
+
+    Overspend window: each worker approves deductions against its own cached
+    balance and ledger, and sees other workers' spending only once they have
+    flushed (CREDIT_FLUSH_INTERVAL) and its cache has expired
+    (CREDIT_CACHE_TTL). Within that window a user can overspend by what the
+    other workers approve, and the stored balance can go negative by as much.
+    With CREDIT_STRICT=true every deduction is instead a conditional update in
+    the database (one round trip per call) and is refused unless the stored
+    balance covers it.
+
+    Deltas reach the database through the add_credits and spend_credits SQL
+    functions, called over RPC, so concurrent writers never overwrite each
+    other's updates. They are created by
+    supabase/migrations/20261019000000_credit_functions.sql.
+    """
     
     def __init__(self):
         try:
@@ -574,6 +1215,36 @@ class CreditSystem:
             self.client = create_client(url, key) if url and key else None
         except:
             self.client = None
+        
+        self.strict = os.getenv('CREDIT_STRICT', 'false').lower() == 'true'
+        self.cache = BalanceCache(ttl=float(os.getenv('CREDIT_CACHE_TTL', 30)))
+        self.ledger = CreditLedger(
+            apply_deltas=self._apply_deltas,
+            on_applied=self._on_applied,
+            flush_interval=float(os.getenv('CREDIT_FLUSH_INTERVAL', 2))
+        )
+    
+    def _fetch_credits(self, user_id: str) -> int:
+        """Read a balance straight from the database."""
+        result = self.client.table('users').select('credits').eq('user_id', user_id).execute()
+        if result.data:
+            return result.data[0]['credits']
+        return 0
+    
+    def _apply_deltas(self, deltas: dict) -> dict:
+        """Ledger flush callback: add each user's net delta in the database, return new balances."""
+        applied = {}
+        for user_id, delta in deltas.items():
+            try:
+                result = self.client.rpc('add_credits', {'p_user_id': user_id, 'p_delta': delta}).execute()
+                applied[user_id] = int(result.data)
+            except Exception as e:
+                print(f"⚠️ Credit flush failed for {user_id}: {e}")
+        return applied
+    
+    def _on_applied(self, balances: dict):
+        for user_id, balance in balances.items():
+            self.cache.set(user_id, balance)
     
     def get_credits(self, user_id: str) -> int:
         """Get user's current credit balance."""
@@ -581,25 +1252,50 @@ class CreditSystem:
             return 100  # Default credits for demo mode
         
         try:
-            result = self.client.table('users').select('credits').eq('user_id', user_id).execute()
-            if result.data:
-                return result.data[0]['credits']
-            return 0
+            with self.ledger.lock:
+                base = self.cache.get(user_id)
+                if base is not None:
+                    return base + self.ledger.pending_delta(user_id)
+            
+            # Cache miss: read between flushes so the row and the pending delta agree
+            with self.ledger.flush_lock:
+                base = self._fetch_credits(user_id)
+                with self.ledger.lock:
+                    self.cache.set(user_id, base)
+                    return base + self.ledger.pending_delta(user_id)
         except:
             return 100  # Fallback to demo mode
     
+    def _spend_credits(self, user_id: str, amount: int) -> bool:
+        """Strict deduction: conditional update in the database, refused if the balance is short."""
+        try:
+            result = self.client.rpc('spend_credits', {'p_user_id': user_id, 'p_amount': amount}).execute()
+        except Exception as e:
+            print(f"⚠️ Credit deduction failed for {user_id}: {e}")
+            return False  # Can't confirm the balance
+        if result.data is None:
+            return False
+        with self.ledger.lock:
+            self.cache.set(user_id, int(result.data))
+        return True
+    
     def deduct_credits(self, user_id: str, amount: int) -> bool:
-        """Deduct credits from user account."""
+        """Deduct credits from user account (see the class docstring for the overspend window)."""
         if not self.client:
             return True  # Always succeed in demo mode
         
+        if self.strict:
+            return self._spend_credits(user_id, amount)
+        
         try:
             current = self.get_credits(user_id)
-            if current < amount:
-                return False
-            
-            new_balance = current - amount
-            self.client.table('users').update({'credits': new_balance}).eq('user_id', user_id).execute()
+            with self.ledger.lock:
+                base = self.cache.get(user_id, stale_ok=True)
+                if base is not None:
+                    current = base + self.ledger.pending_delta(user_id)
+                if current < amount:
+                    return False
+                self.ledger.append(user_id, -amount)
             return True
         except:
             return True  # Fallback to demo mode
@@ -610,13 +1306,84 @@ class CreditSystem:
             return
         
         try:
-            current = self.get_credits(user_id)
-            new_balance = current + amount
-            self.client.table('users').upsert({'user_id': user_id, 'credits': new_balance}).execute()
+            self.ledger.append(user_id, amount)
         except:
             pass
+    
+    def invalidate_cache(self, user_id: str = None):
+        """Forget cached balances (e.g. after an out-of-band top-up)."""
+        self.cache.invalidate(user_id)
+    
+    def flush(self) -> int:
+        """Write pending ledger entries to the database now."""
+        if not self.client:
+            return 0
+        return self.ledger.flush()
 
 # --- SMS/Text Message Function ---
+#
+# Sent through Twilio's Messages REST API. send_password_hint_sms and
+# send_password_hint_sms_async share the request and the reading of the
+# response; TWILIO_API_URL points both at another host (e.g. a local stub).
+
+def _sms_request(receiver_phone: str, password_hint: str, sender_name: str):
+    """(url, auth, form) for the Twilio Messages API, or None if Twilio isn't configured."""
+    account_sid = os.getenv('TWILIO_ACCOUNT_SID')
+    auth_token = os.getenv('TWILIO_AUTH_TOKEN')
+    twilio_phone = os.getenv('TWILIO_PHONE_NUMBER')
+    
+    if not all([account_sid, auth_token, twilio_phone]):
+        return None
+    
+    api_url = os.getenv('TWILIO_API_URL', 'https://api.twilio.com').rstrip('/')
+    url = f"{api_url}/2010-04-01/Accounts/{account_sid}/Messages.json"
+    
+    # Format message body
+    message_body = f"🔐 HoloCrypt from {sender_name}\n\n{password_hint}"
+    return url, (account_sid, auth_token), {'To': receiver_phone, 'From': twilio_phone, 'Body': message_body}
+
+def _sms_result(status_code: int, body: str, form: dict) -> dict:
+    """send_password_hint_sms result for a Twilio API response."""
+    try:
+        message = json.loads(body)
+    except ValueError:
+        message = {}
+    
+    if status_code not in (200, 201):
+        error_msg = f"Twilio API error ({status_code}): {message.get('message', body)}"
+        print(f"\n❌ SMS Error: {error_msg}")
+        return {
+            'success': False,
+            'message': f'SMS sending failed: {error_msg}'
+        }
+    
+    print(f"\n📱 SMS Sent Successfully!")
+    print(f"To: {form['To']}")
+    print(f"From: {form['From']}")
+    print(f"Message SID: {message.get('sid')}")
+    print(f"Status: {message.get('status')}")
+    
+    return {
+        'success': True,
+        'message': f"SMS sent to {form['To']}",
+        'sms_sid': message.get('sid'),
+        'sms_status': message.get('status'),
+        'sms_body': form['Body']
+    }
+
+def _sms_failed(error: Exception) -> dict:
+    error_msg = str(error)
+    print(f"\n❌ SMS Error: {error_msg}")
+    
+    return {
+        'success': False,
+        'message': f'SMS sending failed: {error_msg}'
+    }
+
+_TWILIO_NOT_CONFIGURED = {
+    'success': False,
+    'message': 'Twilio credentials not configured in .env file'
+}
 
 def send_password_hint_sms(receiver_phone: str, password_hint: str, sender_name: str = "HoloCrypt") -> dict:
     """
@@ -631,55 +1398,42 @@ def send_password_hint_sms(receiver_phone: str, password_hint: str, sender_name:
         dict with success status and message
     """
     try:
-        # Get Twilio credentials from environment
-        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-        twilio_phone = os.getenv('TWILIO_PHONE_NUMBER')
+        sms_request = _sms_request(receiver_phone, password_hint, sender_name)
+        if sms_request is None:
+            return dict(_TWILIO_NOT_CONFIGURED)
+        url, auth, form = sms_request
         
-        if not all([account_sid, auth_token, twilio_phone]):
-            return {
-                'success': False,
-                'message': 'Twilio credentials not configured in .env file'
-            }
-        
-        # Import Twilio client
-        from twilio.rest import Client
-        
-        # Initialize Twilio client
-        client = Client(account_sid, auth_token)
+        # Send SMS
+        with metrics.stage('twilio') as twilio_stage:
+            response = requests.post(url, auth=auth, data=form)
+            if response.status_code not in (200, 201):
+                twilio_stage.outcome = 'error'
         
-        # Format message body
-        message_body = f"🔐 HoloCrypt from {sender_name}\n\n{password_hint}"
+        return _sms_result(response.status_code, response.text, form)
         
-        # Send SMS
-        message = client.messages.create(
-            body=message_body,
-            from_=twilio_phone,
-            to=receiver_phone
-        )
+    except Exception as e:
+        return _sms_failed(e)
+
+async def send_password_hint_sms_async(receiver_phone: str, password_hint: str,
+                                       sender_name: str = "HoloCrypt") -> dict:
+    """send_password_hint_sms on the shared async HTTP client (async_http)."""
+    import async_http
+    
+    try:
+        sms_request = _sms_request(receiver_phone, password_hint, sender_name)
+        if sms_request is None:
+            return dict(_TWILIO_NOT_CONFIGURED)
+        url, auth, form = sms_request
         
-        print(f"\n📱 SMS Sent Successfully!")
-        print(f"To: {receiver_phone}")
-        print(f"From: {twilio_phone}")
-        print(f"Message SID: {message.sid}")
-        print(f"Status: {message.status}")
+        with metrics.stage('twilio') as twilio_stage:
+            status_code, body = await async_http.post(url, auth=auth, data=form)
+            if status_code not in (200, 201):
+                twilio_stage.outcome = 'error'
         
-        return {
-            'success': True,
-            'message': f'SMS sent to {receiver_phone}',
-            'sms_sid': message.sid,
-            'sms_status': message.status,
-            'sms_body': message_body
-        }
+        return _sms_result(status_code, body, form)
         
     except Exception as e:
-        error_msg = str(e)
-        print(f"\n❌ SMS Error: {error_msg}")
-        
-        return {
-            'success': False,
-            'message': f'SMS sending failed: {error_msg}'
-        }
+        return _sms_failed(e)
 
 # --- Email Sending with Resend API ---
 
@@ -692,6 +1446,20 @@ def create_qr_pdf(qr_image: Image.Image, cipher_text: str, cipher_type: str,
     Args:
         pdf_password: Password to protect the PDF (optional)
     """
+    with metrics.stage('pdf_build'):
+        pdf_buffer = _draw_qr_pdf(qr_image, cipher_text, cipher_type, cipher_params,
+                                  receiver_email, sender_name)
+    
+    # Apply password protection if provided
+    if pdf_password:
+        with metrics.stage('pdf_encrypt'):
+            return _encrypt_pdf(pdf_buffer, pdf_password)
+    
+    return pdf_buffer
+
+def _draw_qr_pdf(qr_image: Image.Image, cipher_text: str, cipher_type: str,
+                 cipher_params: dict, receiver_email: str, sender_name: str) -> BytesIO:
+    """Lays out the QR code, cipher clue and cipher text on a single PDF page."""
     from reportlab.lib.pagesizes import letter
     from reportlab.pdfgen import canvas
     from reportlab.lib.units import inch
@@ -779,26 +1547,120 @@ def create_qr_pdf(qr_image: Image.Image, cipher_text: str, cipher_type: str,
     
     c.save()
     pdf_buffer.seek(0)
+    return pdf_buffer
+
+def _encrypt_pdf(pdf_buffer: BytesIO, pdf_password: str) -> BytesIO:
+    """Re-writes a PDF with AES-256 password protection."""
+    temp_buffer = BytesIO()
+    reader = PdfReader(pdf_buffer)
+    writer = PdfWriter()
+    
+    # Copy all pages
+    for page in reader.pages:
+        writer.add_page(page)
+    
+    # Encrypt with password
+    writer.encrypt(pdf_password, algorithm="AES-256")
+    
+    # Write to new buffer
+    writer.write(temp_buffer)
+    temp_buffer.seek(0)
+    return temp_buffer
+
+def _resend_api_key() -> str:
+    # Get API key from environment or use provided key
+    return os.getenv('RESEND_API_KEY', "re_gDc5Qt7T_8XAdPpZx2dRajsS9CHMJhXiP")
+
+_RESEND_NOT_CONFIGURED = {
+    'success': False,
+    'message': 'RESEND_API_KEY not configured in .env file'
+}
+
+def _resend_request(api_key: str, receiver_email: str, qr_image: Image.Image, cipher_type: str,
+                    cipher_params: dict, cipher_text: str, sender_name: str, pdf_password: str) -> tuple:
+    """(url, headers, payload) of the Resend API call, building the PDF attachment."""
+    # Create password-protected PDF attachment
+    pdf_buffer = create_qr_pdf(
+        qr_image=qr_image,
+        cipher_text=cipher_text,
+        cipher_type=cipher_type,
+        cipher_params=cipher_params,
+        receiver_email=receiver_email,
+        sender_name=sender_name,
+        pdf_password=pdf_password
+    )
     
-    # Apply password protection if provided
-    if pdf_password:
-        temp_buffer = BytesIO()
-        reader = PdfReader(pdf_buffer)
-        writer = PdfWriter()
-        
-        # Copy all pages
-        for page in reader.pages:
-            writer.add_page(page)
-        
-        # Encrypt with password
-        writer.encrypt(pdf_password, algorithm="AES-256")
+    # Convert PDF to base64
+    pdf_base64 = base64.b64encode(pdf_buffer.read()).decode()
+    
+    # Minimal email body - no details revealed
+    email_html = """
+    <html>
+    <body style="font-family: Arial, sans-serif; padding: 20px;">
+        <p>You have received a secure encrypted message.</p>
+        <p><strong>Please open the attached PDF for details.</strong></p>
+    </body>
+    </html>
+    """
+    
+    # Prepare Resend API request (RESEND_API_URL points it at another host, e.g. a local stub)
+    url = os.getenv('RESEND_API_URL', "https://api.resend.com").rstrip('/') + "/emails"
+    
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    
+    payload = {
+        "from": "onboarding@resend.dev",  # Resend verified sender
+        "to": [receiver_email],
+        "subject": "HoloCrypt: You've Received an Encrypted Message",
+        "html": email_html,
+        "attachments": [
+            {
+                "filename": "holocrypt_encrypted_message.pdf",
+                "content": pdf_base64
+            }
+        ]
+    }
+    return url, headers, payload
+
+def _resend_result(status_code: int, body: str, receiver_email: str) -> dict:
+    """send_email_with_resend result for a Resend API response."""
+    # Check if this is a test mode (unverified domain)
+    # In test mode, can only send to account owner email
+    test_mode_email = "punithns26@gmail.com"
+    
+    if status_code != 200:
+        try:
+            error_data = json.loads(body)
+            error_msg = error_data.get('message', str(error_data))
+            
+            # Provide helpful message for common errors
+            if status_code == 403 and 'testing emails' in error_msg:
+                return {
+                    'success': False,
+                    'message': f'⚠️ Test Mode: Can only send to {test_mode_email}\n\n' +
+                             'To send to other emails:\n' +
+                             '1. Verify a domain at resend.com/domains\n' +
+                             '2. Update sender email in code\n\n' +
+                             f'For testing, use receiver email: {test_mode_email}'
+                }
+        except:
+            error_msg = body
         
-        # Write to new buffer
-        writer.write(temp_buffer)
-        temp_buffer.seek(0)
-        return temp_buffer
+        return {
+            'success': False,
+            'message': f'Resend API error ({status_code}): {error_msg}'
+        }
     
-    return pdf_buffer
+    result = json.loads(body)
+    
+    return {
+        'success': True,
+        'message': f'Email successfully sent to {receiver_email} via Resend',
+        'email_id': result.get('id')
+    }
 
 def send_email_with_resend(receiver_email: str, puzzle_message: str, qr_image: Image.Image, 
                            cipher_type: str, cipher_params: dict, cipher_text: str,
@@ -822,106 +1684,56 @@ def send_email_with_resend(receiver_email: str, puzzle_message: str, qr_image: I
     Returns:
         dict with 'success' (bool) and 'message' (str) keys
     """
-    # Get API key from environment or use provided key
-    RESEND_API_KEY = os.getenv('RESEND_API_KEY', "re_gDc5Qt7T_8XAdPpZx2dRajsS9CHMJhXiP")
+    api_key = _resend_api_key()
+    if not api_key:
+        return dict(_RESEND_NOT_CONFIGURED)
+    
+    try:
+        url, headers, payload = _resend_request(api_key, receiver_email, qr_image, cipher_type, cipher_params,
+                                                cipher_text, sender_name, pdf_password)
+        
+        with metrics.stage('resend') as resend_stage:
+            response = requests.post(url, headers=headers, json=payload)
+            if response.status_code != 200:
+                resend_stage.outcome = 'error'
+        
+        return _resend_result(response.status_code, response.text, receiver_email)
     
-    if not RESEND_API_KEY:
+    except Exception as e:
         return {
             'success': False,
-            'message': 'RESEND_API_KEY not configured in .env file'
+            'message': f'Failed to send email: {str(e)}'
         }
+
+async def send_email_with_resend_async(receiver_email: str, puzzle_message: str, qr_image: Image.Image,
+                                       cipher_type: str, cipher_params: dict, cipher_text: str,
+                                       sender_name: str = "HoloCrypt",
+                                       website_url: str = "https://yourwebsite.com/decrypt",
+                                       pdf_password: str = None) -> dict:
+    """
+    send_email_with_resend on the shared async HTTP client (async_http).
     
-    # Check if this is a test mode (unverified domain)
-    # In test mode, can only send to account owner email
-    test_mode_email = "punithns26@gmail.com"
+    The PDF is built in a worker thread, so the event loop keeps serving
+    other requests while it renders.
+    """
+    import async_http
+    
+    api_key = _resend_api_key()
+    if not api_key:
+        return dict(_RESEND_NOT_CONFIGURED)
     
     try:
-        # Create password-protected PDF attachment
-        pdf_buffer = create_qr_pdf(
-            qr_image=qr_image,
-            cipher_text=cipher_text,
-            cipher_type=cipher_type,
-            cipher_params=cipher_params,
-            receiver_email=receiver_email,
-            sender_name=sender_name,
-            pdf_password=pdf_password
-        )
-        
-        # Convert PDF to base64
-        pdf_base64 = base64.b64encode(pdf_buffer.read()).decode()
-        
-        # Minimal email body - no details revealed
-        email_html = """
-        <html>
-        <body style="font-family: Arial, sans-serif; padding: 20px;">
-            <p>You have received a secure encrypted message.</p>
-            <p><strong>Please open the attached PDF for details.</strong></p>
-        </body>
-        </html>
-        """
-        
-        # Prepare Resend API request
-        url = "https://api.resend.com/emails"
-        
-        headers = {
-            "Authorization": f"Bearer {RESEND_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "from": "onboarding@resend.dev",  # Resend verified sender
-            "to": [receiver_email],
-            "subject": "HoloCrypt: You've Received an Encrypted Message",
-            "html": email_html,
-            "attachments": [
-                {
-                    "filename": "holocrypt_encrypted_message.pdf",
-                    "content": pdf_base64
-                }
-            ]
-        }
+        url, headers, payload = await asyncio.to_thread(
+            _resend_request, api_key, receiver_email, qr_image, cipher_type, cipher_params,
+            cipher_text, sender_name, pdf_password)
         
-        response = requests.post(url, headers=headers, json=payload)
+        with metrics.stage('resend') as resend_stage:
+            status_code, body = await async_http.post(url, headers=headers, json=payload)
+            if status_code != 200:
+                resend_stage.outcome = 'error'
         
-        # Debug: Print response details
-        if response.status_code != 200:
-            try:
-                error_data = response.json()
-                error_msg = error_data.get('message', str(error_data))
-                
-                # Provide helpful message for common errors
-                if response.status_code == 403 and 'testing emails' in error_msg:
-                    return {
-                        'success': False,
-                        'message': f'⚠️ Test Mode: Can only send to {test_mode_email}\n\n' +
-                                 'To send to other emails:\n' +
-                                 '1. Verify a domain at resend.com/domains\n' +
-                                 '2. Update sender email in code\n\n' +
-                                 f'For testing, use receiver email: {test_mode_email}'
-                    }
-            except:
-                error_msg = response.text
-            
-            return {
-                'success': False,
-                'message': f'Resend API error ({response.status_code}): {error_msg}'
-            }
-        
-        response.raise_for_status()
-        result = response.json()
-        
-        return {
-            'success': True,
-            'message': f'Email successfully sent to {receiver_email} via Resend',
-            'email_id': result.get('id')
-        }
+        return _resend_result(status_code, body, receiver_email)
     
-    except requests.exceptions.HTTPError as e:
-        error_detail = e.response.json() if e.response else str(e)
-        return {
-            'success': False,
-            'message': f'Resend API error: {error_detail}'
-        }
     except Exception as e:
         return {
             'success': False,
@@ -965,7 +1777,7 @@ def validate_and_decrypt(encrypted_data: str, provided_cipher: str, provided_par
     else:
         # Wrong cipher - generate puzzle
         try:
-            puzzled = generate_puzzle_with_nltk(encrypted_data, difficulty="medium")
+            puzzled = seeded_puzzle(encrypted_data, difficulty="medium")
             return {
                 'correct': False,
                 'result': puzzled,
@@ -982,6 +1794,9 @@ def decode_qr_params(query_string: str) -> dict:
     """
     Decodes parameters from QR code redirect URL.
     
+    Accepts both the compact payload (z= / p=, see qr_payload) and the
+    legacy data/cipher/params query string.
+    
     Args:
         query_string: URL query string from QR scan
     
@@ -991,6 +1806,10 @@ def decode_qr_params(query_string: str) -> dict:
     try:
         params = urllib.parse.parse_qs(query_string)
         
+        compact = qr_payload.decode_query(params)
+        if compact is not None:
+            return compact
+        
         encrypted_data = base64.urlsafe_b64decode(params['data'][0]).decode()
         cipher_type = params['cipher'][0]
         cipher_params = json.loads(base64.urlsafe_b64decode(params['params'][0]).decode())
@@ -1006,6 +1825,35 @@ def decode_qr_params(query_string: str) -> dict:
 
 # --- Complete Workflow Functions ---
 
+def _encode_for_delivery(original_message: str, cipher_type: str, cipher_params: dict, website_url: str) -> tuple:
+    """(encrypted text, puzzle message, QR image) for encode_and_send."""
+    # Step 1: Shuffle/encrypt data based on cipher
+    with metrics.stage('cipher'):
+        encrypted_text = shuffle_data_by_cipher(original_message, cipher_type, cipher_params)
+    
+    # Step 2: Create puzzle message
+    puzzle_message = f"🧩 Encrypted with {cipher_type} cipher\n\n{encrypted_text}"
+    
+    # Step 3: Generate QR code with redirect URL
+    with metrics.stage('qr'):
+        qr_image = generate_qr_with_redirect(website_url, encrypted_text, cipher_type, cipher_params)
+    return encrypted_text, puzzle_message, qr_image
+
+def _delivery_result(encrypted_text: str, email_result: dict, sms_result: dict) -> dict:
+    if email_result['success']:
+        return {
+            'success': True,
+            'message': 'Message encrypted and sent successfully!',
+            'encrypted_text': encrypted_text,
+            'email_status': email_result,
+            'sms_status': sms_result
+        }
+    else:
+        return {
+            'success': False,
+            'message': email_result['message']
+        }
+
 def encode_and_send(original_message: str, receiver_email: str, cipher_type: str,
                    cipher_params: dict, sender_name: str = "HoloCrypt",
                    website_url: str = "https://holocrypt-ewmtjmjwtyue4v8bkc2uik.streamlit.app",
@@ -1029,53 +1877,38 @@ def encode_and_send(original_message: str, receiver_email: str, cipher_type: str
         dict with status and details
     """
     try:
-        # Step 1: Shuffle/encrypt data based on cipher
-        encrypted_text = shuffle_data_by_cipher(original_message, cipher_type, cipher_params)
-        
-        # Step 2: Create puzzle message
-        puzzle_message = f"🧩 Encrypted with {cipher_type} cipher\n\n{encrypted_text}"
+        # Label every stage below with the cipher and message size
+        with metrics.labels(cipher_type, len(original_message)):
+            # Steps 1-3: Encrypt, build the puzzle message and the QR code
+            encrypted_text, puzzle_message, qr_image = _encode_for_delivery(
+                original_message, cipher_type, cipher_params, website_url)
         
-        # Step 3: Generate QR code with redirect URL
-        qr_image = generate_qr_with_redirect(website_url, encrypted_text, cipher_type, cipher_params)
-        
-        # Step 4: Send email via Resend with password-protected PDF
-        email_result = send_email_with_resend(
-            receiver_email=receiver_email,
-            puzzle_message=puzzle_message,
-            qr_image=qr_image,
-            cipher_type=cipher_type,
-            cipher_params=cipher_params,
-            cipher_text=encrypted_text,
-            sender_name=sender_name,
-            website_url=website_url,
-            pdf_password=pdf_password
-        )
+            # Step 4: Send email via Resend with password-protected PDF
+            email_result = send_email_with_resend(
+                receiver_email=receiver_email,
+                puzzle_message=puzzle_message,
+                qr_image=qr_image,
+                cipher_type=cipher_type,
+                cipher_params=cipher_params,
+                cipher_text=encrypted_text,
+                sender_name=sender_name,
+                website_url=website_url,
+                pdf_password=pdf_password
+            )
         
-        # Step 5: Send SMS with password hint (if phone number provided)
-        sms_result = None
-        if receiver_phone and pdf_password:
-            if not password_hint:
-                password_hint = f"Your PDF password is: {pdf_password}"
+            # Step 5: Send SMS with password hint (if phone number provided)
+            sms_result = None
+            if receiver_phone and pdf_password:
+                if not password_hint:
+                    password_hint = f"Your PDF password is: {pdf_password}"
             
-            sms_result = send_password_hint_sms(
-                receiver_phone=receiver_phone,
-                password_hint=password_hint,
-                sender_name=sender_name
-            )
+                sms_result = send_password_hint_sms(
+                    receiver_phone=receiver_phone,
+                    password_hint=password_hint,
+                    sender_name=sender_name
+                )
         
-        if email_result['success']:
-            return {
-                'success': True,
-                'message': 'Message encrypted and sent successfully!',
-                'encrypted_text': encrypted_text,
-                'email_status': email_result,
-                'sms_status': sms_result
-            }
-        else:
-            return {
-                'success': False,
-                'message': email_result['message']
-            }
+            return _delivery_result(encrypted_text, email_result, sms_result)
     
     except Exception as e:
         return {
@@ -1083,6 +1916,70 @@ def encode_and_send(original_message: str, receiver_email: str, cipher_type: str
             'message': f'Encoding failed: {str(e)}'
         }
 
+async def encode_and_send_async(original_message: str, receiver_email: str, cipher_type: str,
+                                cipher_params: dict, sender_name: str = "HoloCrypt",
+                                website_url: str = "https://holocrypt-ewmtjmjwtyue4v8bkc2uik.streamlit.app",
+                                pdf_password: str = None, receiver_phone: str = None,
+                                password_hint: str = None) -> dict:
+    """
+    encode_and_send for the event loop.
+    
+    Cipher, QR code and PDF run in worker threads; the email and the SMS go
+    out concurrently on the shared async HTTP client.
+    """
+    try:
+        with metrics.labels(cipher_type, len(original_message)):
+            encrypted_text, puzzle_message, qr_image = await asyncio.to_thread(
+                _encode_for_delivery, original_message, cipher_type, cipher_params, website_url)
+            
+            deliveries = [send_email_with_resend_async(
+                receiver_email=receiver_email,
+                puzzle_message=puzzle_message,
+                qr_image=qr_image,
+                cipher_type=cipher_type,
+                cipher_params=cipher_params,
+                cipher_text=encrypted_text,
+                sender_name=sender_name,
+                website_url=website_url,
+                pdf_password=pdf_password
+            )]
+            if receiver_phone and pdf_password:
+                deliveries.append(send_password_hint_sms_async(
+                    receiver_phone=receiver_phone,
+                    password_hint=password_hint or f"Your PDF password is: {pdf_password}",
+                    sender_name=sender_name
+                ))
+            
+            email_result, *sms_result = await asyncio.gather(*deliveries)
+            return _delivery_result(encrypted_text, email_result, sms_result[0] if sms_result else None)
+    
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f'Encoding failed: {str(e)}'
+        }
+
+
+# --- Process Warm-up ---
+
+def warm_up():
+    """
+    Loads the lazily-initialised dependencies (NLTK word list, QR encoder,
+    ReportLab fonts, PDF encryption, cipher engine thresholds) once, so a
+    pre-forking server pays for them in the master process instead of on
+    every worker's first request.
+    """
+    try:
+        words.words()
+    except LookupError:
+        pass  # Corpus unavailable offline; puzzles fall back to shuffling
+    word_set.default_word_set()  # Builds the mapped word set once, before workers fork
+    cipher_engines.load_or_calibrate()  # Engine thresholds for this machine, measured once and cached on disk
+    
+    qr_image = generate_qr_with_redirect("http://localhost", "warm up", "caesar", {"shift": 3})
+    create_qr_pdf(qr_image, "warm up", "caesar", {"shift": 3},
+                  "warmup@localhost", "HoloCrypt", pdf_password="warm-up")
+
 
 # --- Example Usage ---
 
@@ -0,0 +1,235 @@
+"""
+HoloCrypt IPFS Cache
+Content-addressed local disk cache in front of the IPFS gateway
+
+Objects are stored under their CID, so a file can never go stale: it is
+verified against its CID when fetched and again whenever it is read back
+(a cheap sha256 pass compared to a gateway round trip). Hits are served
+from an mmap of the cached file. The directory is capped at a byte budget
+and evicted least-recently-used first, using file mtimes as the recency
+record so every worker process shares one cache.
+
+Concurrent requests for the same CID inside a process share one download.
+"""
+
+import mmap
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from io import BytesIO
+
+import requests
+
+from ipfs_cid import parse_cid, verify_cid
+
+DEFAULT_GATEWAY = 'https://gateway.pinata.cloud/ipfs/'
+
+# Only sha2-256 CIDs over dag-pb / raw blocks can be recomputed locally
+_VERIFIABLE_CODECS = (0x70, 0x55)
+
+
+class IPFSCache:
+    """
+    Args:
+        directory: Where cached objects live
+        max_bytes: Size cap for the directory; least recently used objects go first
+        gateway: Gateway base URL, the CID is appended to it
+        timeout: Overall seconds allowed for one fetch (connect + download)
+        verify: Check content against its CID on fetch and on every read
+        session: Optional requests.Session to share connection pools with
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None, gateway: str = None,
+                 timeout: float = None, verify: bool = True, session: requests.Session = None):
+        self.directory = directory or os.getenv('IPFS_CACHE_DIR', os.path.join('.holocrypt', 'ipfs'))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('IPFS_CACHE_MAX_BYTES', 256 << 20))
+        self.gateway = gateway or os.getenv('IPFS_GATEWAY_URL', DEFAULT_GATEWAY)
+        if not self.gateway.endswith('/'):
+            self.gateway += '/'
+        self.timeout = timeout if timeout is not None else float(os.getenv('IPFS_FETCH_TIMEOUT', 30))
+        self.verify = verify
+        self.session = session or requests.Session()
+        self.hits = self.misses = 0
+
+        self._inflight = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    # --- Disk ---
+
+    def _path(self, cid: str) -> str:
+        # parse_cid rejects anything that is not a CID, so names can't escape the directory
+        parse_cid(cid)
+        return os.path.join(self.directory, cid)
+
+    def _map(self, path: str):
+        """Read-only mmap of a cached file (a BytesIO for empty objects, which can't be mapped)."""
+        with open(path, 'rb') as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return BytesIO(b'')
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _verifiable(self, cid: str) -> bool:
+        _, codec, multihash = parse_cid(cid)
+        return codec in _VERIFIABLE_CODECS and multihash[:2] == b'\x12\x20'
+
+    def _lookup(self, cid: str):
+        """Mapped cached object, or None on a miss or a corrupt entry."""
+        path = self._path(cid)
+        try:
+            mapped = self._map(path)
+        except FileNotFoundError:
+            return None
+
+        if self.verify and not verify_cid(cid, mapped):
+            mapped.close()
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)  # Bump recency for LRU eviction
+        except OSError:
+            pass
+        return mapped
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self, keep: str = None):
+        """Delete least recently used objects until the directory fits in max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.startswith('.'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+
+    # --- Network ---
+
+    def _download(self, cid: str) -> str:
+        """Stream ``cid`` from the gateway into a temp file; returns its path."""
+        deadline = time.monotonic() + self.timeout
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.fetch-')
+        try:
+            with os.fdopen(fd, 'wb') as out, \
+                    self.session.get(self.gateway + cid, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                written = 0
+                for chunk in response.iter_content(64 * 1024):
+                    written += len(chunk)
+                    if written > self.max_bytes:
+                        raise ValueError(f"IPFS object {cid} is larger than the cache ({self.max_bytes} bytes)")
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Fetching {cid} took longer than {self.timeout}s")
+                    out.write(chunk)
+            return tmp_path
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+    def _fetch(self, cid: str):
+        tmp_path = self._download(cid)
+        try:
+            mapped = self._map(tmp_path)
+            if not self._verifiable(cid):
+                # Can't prove the bytes belong to this CID, so serve them without caching
+                return mapped
+            if self.verify and not verify_cid(cid, mapped):
+                mapped.close()
+                raise ValueError(f"Gateway returned content that does not match CID {cid}")
+            path = self._path(cid)
+            os.replace(tmp_path, path)
+            tmp_path = None
+            self._evict(keep=path)
+            return mapped
+        finally:
+            if tmp_path:
+                self._remove(tmp_path)
+
+    # --- Public API ---
+
+    def open(self, cid: str):
+        """
+        File-like, read-only view of an IPFS object (an mmap for cached objects).
+
+        Raises:
+            ValueError: Invalid CID, oversized object, or content not matching the CID
+            TimeoutError: The gateway did not deliver within ``timeout``
+            requests.RequestException: Gateway errors
+        """
+        cid = cid.strip()
+        mapped = self._lookup(cid)
+        if mapped is not None:
+            self.hits += 1
+            return mapped
+
+        with self._lock:
+            future = self._inflight.get(cid)
+            leader = future is None
+            if leader:
+                future = self._inflight[cid] = Future()
+
+        if not leader:
+            future.result(timeout=self.timeout)
+            # The leader's copy is now on disk, unless it was uncacheable
+            mapped = self._lookup(cid)
+            return mapped if mapped is not None else self.open(cid)
+
+        self.misses += 1
+        try:
+            mapped = self._fetch(cid)
+            future.set_result(True)
+            return mapped
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(cid, None)
+
+    def read(self, cid: str) -> bytes:
+        """The whole object as bytes."""
+        mapped = self.open(cid)
+        try:
+            return mapped[:] if isinstance(mapped, mmap.mmap) else mapped.getvalue()
+        finally:
+            mapped.close()
+
+    def stats(self) -> dict:
+        size = count = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith('.'):
+                    size += entry.stat().st_size
+                    count += 1
+        return {'objects': count, 'bytes': size, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> IPFSCache:
+    """Process-wide cache configured from the environment."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = IPFSCache(verify=os.getenv('IPFS_CACHE_VERIFY', 'true').lower() == 'true')
+        return _default_cache
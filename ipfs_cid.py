@@ -0,0 +1,200 @@
+"""
+HoloCrypt IPFS CIDs
+Computes the CID `ipfs add` (and Pinata) assigns to a file, without a node
+
+Supports the default importer settings: 256 KiB fixed-size chunks, balanced
+DAG with up to 174 links per node, and either
+  - CIDv0 (Qm...): dag-pb leaves, or
+  - CIDv1 (bafy.../bafk...): raw leaves under a dag-pb root.
+"""
+
+import base64
+import hashlib
+
+CHUNK_SIZE = 256 * 1024
+MAX_LINKS = 174
+
+_CODEC_DAG_PB = 0x70
+_CODEC_RAW = 0x55
+_SHA2_256 = 0x12
+_BASE58_ALPHABET = b'123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+# --- Encodings ---
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _read_varint(data: bytes, offset: int = 0):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _bytes_field(number: int, data: bytes) -> bytes:
+    return _varint(number << 3 | 2) + _varint(len(data)) + data
+
+
+def _varint_field(number: int, value: int) -> bytes:
+    return _varint(number << 3) + _varint(value)
+
+
+def base58_encode(data: bytes) -> str:
+    n = int.from_bytes(data, 'big')
+    out = bytearray()
+    while n:
+        n, rem = divmod(n, 58)
+        out.append(_BASE58_ALPHABET[rem])
+    pad = len(data) - len(data.lstrip(b'\0'))
+    return (b'1' * pad + bytes(reversed(out))).decode('ascii')
+
+
+def base58_decode(text: str) -> bytes:
+    n = 0
+    for char in text.encode('ascii'):
+        n = n * 58 + _BASE58_ALPHABET.index(char)
+    pad = len(text) - len(text.lstrip('1'))
+    body = n.to_bytes((n.bit_length() + 7) // 8, 'big') if n else b''
+    return b'\0' * pad + body
+
+
+def _multihash(block: bytes) -> bytes:
+    return bytes((_SHA2_256, 32)) + hashlib.sha256(block).digest()
+
+
+# --- CID parsing ---
+
+def parse_cid(cid: str):
+    """
+    Splits a CID string into (version, codec, multihash bytes).
+
+    Raises:
+        ValueError: For malformed CIDs or multibases other than base58btc/base32
+    """
+    try:
+        if cid.startswith('Qm') and len(cid) == 46:
+            return 0, _CODEC_DAG_PB, base58_decode(cid)
+        if cid.startswith('b'):
+            raw = base64.b32decode(cid[1:].upper() + '=' * (-len(cid[1:]) % 8))
+        elif cid.startswith('z'):
+            raw = base58_decode(cid[1:])
+        else:
+            raise ValueError(f"Unsupported multibase prefix in CID: {cid[:1]!r}")
+        version, offset = _read_varint(raw)
+        codec, offset = _read_varint(raw, offset)
+        if version != 1:
+            raise ValueError(f"Unsupported CID version {version}")
+        return version, codec, raw[offset:]
+    except (IndexError, ValueError, base64.binascii.Error) as e:
+        raise ValueError(f"Invalid CID {cid!r}: {e}")
+
+
+def _cid_bytes(version: int, codec: int, multihash: bytes) -> bytes:
+    if version == 0:
+        return multihash
+    return _varint(1) + _varint(codec) + multihash
+
+
+def format_cid(version: int, codec: int, multihash: bytes) -> str:
+    if version == 0:
+        return base58_encode(multihash)
+    return 'b' + base64.b32encode(_cid_bytes(1, codec, multihash)).decode('ascii').lower().rstrip('=')
+
+
+# --- UnixFS DAG ---
+
+def _unixfs_file(data: bytes, filesize: int, blocksizes=()) -> bytes:
+    out = _varint_field(1, 2)  # Type = File
+    if data:
+        out += _bytes_field(2, data)
+    out += _varint_field(3, filesize)
+    for size in blocksizes:
+        out += _varint_field(4, size)
+    return out
+
+
+def _pb_node(links, unixfs: bytes) -> bytes:
+    # dag-pb canonical order: Links (field 2) before Data (field 1)
+    out = b''.join(
+        _bytes_field(2, _bytes_field(1, link_cid) + _bytes_field(2, b'') + _varint_field(3, tsize))
+        for link_cid, tsize in links
+    )
+    return out + _bytes_field(1, unixfs)
+
+
+class _Builder:
+    """Replays the importer's balanced layout over a chunk iterator."""
+
+    def __init__(self, chunks, version: int):
+        self.chunks = chunks
+        self.version = version
+        self.pending = next(chunks, None)
+
+    def done(self) -> bool:
+        return self.pending is None
+
+    def _emit(self, block: bytes, codec: int):
+        return _cid_bytes(self.version, codec, _multihash(block)), len(block)
+
+    def leaf(self):
+        """Returns (cid bytes, cumulative size, file bytes) of the next leaf."""
+        chunk, self.pending = self.pending or b'', next(self.chunks, None)
+        if self.version == 1:
+            cid, size = self._emit(chunk, _CODEC_RAW)
+        else:
+            cid, size = self._emit(_pb_node((), _unixfs_file(chunk, len(chunk))), _CODEC_DAG_PB)
+        return cid, size, len(chunk)
+
+    def fill(self, first, depth: int):
+        children = [first] if first else []
+        while len(children) < MAX_LINKS and not self.done():
+            children.append(self.leaf() if depth == 1 else self.fill(None, depth - 1))
+        filesize = sum(child[2] for child in children)
+        block = _pb_node([(cid, tsize) for cid, tsize, _ in children],
+                         _unixfs_file(b'', filesize, [child[2] for child in children]))
+        cid, size = self._emit(block, _CODEC_DAG_PB)
+        return cid, size + sum(child[1] for child in children), filesize
+
+
+def _iter_chunks(data) -> iter:
+    view = memoryview(data)
+    for start in range(0, len(view), CHUNK_SIZE):
+        yield bytes(view[start:start + CHUNK_SIZE])
+
+
+def compute_cid(data, version: int = 0) -> str:
+    """
+    CID that `ipfs add` with default settings would assign to ``data``.
+
+    Args:
+        data: File contents (bytes, bytearray, memoryview, mmap)
+        version: 0 for Qm... CIDs, 1 for base32 CIDv1 with raw leaves
+    """
+    builder = _Builder(_iter_chunks(data), version)
+    root = builder.leaf()
+    depth = 1
+    while not builder.done():
+        root = builder.fill(root, depth)
+        depth += 1
+    return format_cid(version, _CODEC_RAW if version == 1 and depth == 1 else _CODEC_DAG_PB,
+                      root[0][-34:])
+
+
+def verify_cid(cid: str, data) -> bool:
+    """True if ``data`` hashes to ``cid`` under the default importer layout."""
+    version, codec, multihash = parse_cid(cid)
+    return compute_cid(data, version) == format_cid(version, codec, multihash)
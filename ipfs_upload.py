@@ -0,0 +1,200 @@
+"""
+HoloCrypt IPFS Uploads
+Streaming multipart uploads and batch pinning through Pinata
+
+Files are sent straight from disk (or from an existing buffer) with a fixed
+Content-Length, so an upload never holds a second copy of the file in
+memory. Before uploading, the CID is computed locally and, if Pinata already
+has it pinned, the upload is skipped.
+"""
+
+import mimetypes
+import mmap
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ipfs_cid import compute_cid
+
+DEFAULT_API_URL = 'https://api.pinata.cloud'
+
+
+class MultipartFile:
+    """
+    Single-file multipart/form-data body that reads the file while it is sent.
+
+    It has a length, so requests sends Content-Length rather than chunking.
+    """
+
+    def __init__(self, fileobj, size: int, filename: str, field: str = 'file', content_type: str = None):
+        boundary = uuid.uuid4().hex
+        content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        filename = filename.replace('"', '%22').replace('\r', '').replace('\n', '')
+        head = (f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n').encode('utf-8')
+        tail = f'\r\n--{boundary}--\r\n'.encode('ascii')
+
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        self._parts = [BytesIO(head), fileobj, BytesIO(tail)]
+        self._length = len(head) + size + len(tail)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        out = bytearray()
+        while self._parts and (size is None or size < 0 or len(out) < size):
+            chunk = self._parts[0].read(-1 if size is None or size < 0 else size - len(out))
+            if chunk:
+                out += chunk
+            else:
+                self._parts.pop(0)
+        return bytes(out)
+
+
+class _BufferReader:
+    """Minimal file-like reader over a buffer, without BytesIO's copy."""
+
+    def __init__(self, view: memoryview):
+        self._view = view.cast('B') if view.ndim != 1 or view.itemsize != 1 else view
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        chunk = bytes(self._view[self._pos:end])
+        self._pos = end
+        return chunk
+
+
+class _Source:
+    """Opens bytes-like objects or file paths as (fileobj, size, CID-able view)."""
+
+    def __init__(self, source, filename: str = None):
+        self.source = source
+        self.is_path = isinstance(source, (str, os.PathLike))
+        self.filename = filename or (os.path.basename(source) if self.is_path else 'holocrypt_upload.bin')
+        self._file = self._map = None
+
+    def __enter__(self):
+        if not self.is_path:
+            view = memoryview(self.source)
+            self.size = view.nbytes
+            self.fileobj = _BufferReader(view)
+            self.view = view
+            return self
+
+        self._file = open(self.source, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.fileobj = self._file
+        if self.size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = self._map if self._map is not None else b''
+        return self
+
+    def __exit__(self, *exc):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+
+
+class PinataClient:
+    """
+    Pinata pinning API over one pooled HTTP session.
+
+    Args:
+        jwt: Pinata JWT (defaults to PINATA_JWT)
+        api_url: API base URL (defaults to PINATA_API_URL or Pinata's)
+        pool_size: Keep-alive connections kept per host
+        timeout: Seconds allowed for connect and for each read
+    """
+
+    def __init__(self, jwt: str = None, api_url: str = None, pool_size: int = 8, timeout: float = 60):
+        jwt = jwt or os.getenv('PINATA_JWT')
+        if not jwt:
+            raise ValueError("PINATA_JWT not found in environment variables")
+
+        self.api_url = (api_url or os.getenv('PINATA_API_URL', DEFAULT_API_URL)).rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Authorization'] = f'Bearer {jwt}'
+
+    def is_pinned(self, cid: str) -> bool:
+        response = self.session.get(f'{self.api_url}/data/pinList',
+                                    params={'hashContains': cid, 'status': 'pinned', 'pageLimit': 1},
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        return any(row.get('ipfs_pin_hash') == cid for row in response.json().get('rows', []))
+
+    def pin_file(self, fileobj, size: int, filename: str, content_type: str = None) -> str:
+        """Streams one file to pinFileToIPFS and returns its CID."""
+        body = MultipartFile(fileobj, size, filename, content_type=content_type)
+        response = self.session.post(f'{self.api_url}/pinning/pinFileToIPFS', data=body,
+                                     headers={'Content-Type': body.content_type}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['IpfsHash']
+
+    def upload(self, source, filename: str = None, skip_pinned: bool = False,
+               content_type: str = None) -> dict:
+        """
+        Uploads a bytes-like object or a file path.
+
+        Args:
+            source: bytes, bytearray, memoryview, or a path to stream from disk
+            filename: Name sent to Pinata (defaults to the file's basename)
+            skip_pinned: Compute the CID locally and skip the upload if already pinned
+            content_type: MIME type (guessed from the filename by default)
+
+        Returns:
+            dict with 'cid' and 'uploaded' (False when the pin already existed)
+        """
+        with _Source(source, filename) as src:
+            if skip_pinned:
+                cid = compute_cid(src.view)
+                if self.is_pinned(cid):
+                    return {'cid': cid, 'uploaded': False}
+            cid = self.pin_file(src.fileobj, src.size, src.filename, content_type)
+            return {'cid': cid, 'uploaded': True}
+
+    def upload_many(self, sources: list, max_workers: int = 4, skip_pinned: bool = True) -> list:
+        """
+        Uploads many sources concurrently, at most ``max_workers`` at a time.
+
+        Args:
+            sources: Items accepted by upload(), or (source, filename) tuples
+
+        Returns:
+            One dict per source, in order: {'success': True, 'cid', 'uploaded'}
+            or {'success': False, 'error'}
+        """
+        def upload_one(item):
+            source, filename = item if isinstance(item, tuple) else (item, None)
+            try:
+                return {'success': True, **self.upload(source, filename, skip_pinned=skip_pinned)}
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='ipfs-upload') as pool:
+            return list(pool.map(upload_one, sources))
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> PinataClient:
+    """Process-wide client configured from the environment."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = PinataClient()
+        return _default_client
@@ -0,0 +1,233 @@
+"""
+HoloCrypt Metrics
+Lightweight stage timers, histograms and counters exposed in Prometheus text format
+"""
+
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Seconds; covers sub-millisecond ciphers up to slow provider round trips
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+KNOWN_CIPHERS = {'caesar', 'vigenere', 'atbash', 'substitution', 'rail_fence', 'permutation', 'chain'}
+SIZE_CLASSES = ((1024, 'lt_1k'), (16 * 1024, 'lt_16k'), (256 * 1024, 'lt_256k'))
+
+# Labels shared by every stage of the current request/workflow
+_context_labels = contextvars.ContextVar('holocrypt_metric_labels', default=('none', 'none'))
+
+
+def size_class(n: int) -> str:
+    """Bucket a byte/char count into a low-cardinality label."""
+    for limit, label in SIZE_CLASSES:
+        if n < limit:
+            return label
+    return 'ge_256k'
+
+
+def cipher_label(cipher_type) -> str:
+    """Known cipher names pass through; anything else collapses to 'other'."""
+    if not cipher_type:
+        return 'none'
+    cipher_type = str(cipher_type).lower()
+    return cipher_type if cipher_type in KNOWN_CIPHERS else 'other'
+
+
+def _format_labels(names, values, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labelvalues, value in self._values.items():
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labelvalues)} {value}')
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram with labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count)
+                        for labels, (counts, total, count) in self._series.items()]
+        for labelvalues, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else repr(float(bound))
+                bucket_labels = _format_labels(self.labelnames, labelvalues, f'le="{le}"')
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+REGISTRY = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+STAGE_SECONDS = register(Histogram(
+    'holocrypt_stage_duration_seconds',
+    'Time spent in each HoloCrypt pipeline stage',
+    ('stage', 'cipher', 'size', 'outcome')
+))
+HTTP_SECONDS = register(Histogram(
+    'holocrypt_http_request_duration_seconds',
+    'API request latency',
+    ('endpoint', 'method', 'status', 'cipher', 'size')
+))
+HTTP_REQUEST_BYTES = register(Counter(
+    'holocrypt_http_request_bytes_total',
+    'API request body bytes received',
+    ('endpoint',)
+))
+HTTP_RESPONSE_BYTES = register(Counter(
+    'holocrypt_http_response_bytes_total',
+    'API response body bytes sent (after compression)',
+    ('endpoint',)
+))
+
+
+class labels:
+    """
+    Context manager setting the cipher/size labels for every stage inside it.
+
+        with metrics.labels(cipher_type, len(message)):
+            ...
+    """
+
+    __slots__ = ('values', '_token')
+
+    def __init__(self, cipher_type, size: int):
+        self.values = (cipher_label(cipher_type), size_class(size))
+
+    def __enter__(self):
+        self._token = _context_labels.set(self.values)
+        return self
+
+    def __exit__(self, *exc):
+        _context_labels.reset(self._token)
+        return False
+
+
+class stage:
+    """
+    Times a block as a pipeline stage.
+
+        with metrics.stage('pdf_build'):
+            ...
+
+    Exceptions mark the observation as an error; set ``outcome`` on the
+    yielded object for failures reported without raising.
+    """
+
+    __slots__ = ('name', 'outcome', '_start')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.outcome = 'success'
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.outcome = 'error'
+        cipher, size = _context_labels.get()
+        STAGE_SECONDS.observe(time.perf_counter() - self._start, self.name, cipher, size, self.outcome)
+        return False
+
+
+def timed(name: str):
+    """Decorator form of :class:`stage`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_all() -> str:
+    """Every registered metric in Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Time every /api/ request. Metrics are per worker process."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('_metrics_start', None)
+        if start is None or not request.path.startswith('/api/'):
+            return response
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        body = request.get_json(silent=True) if request.is_json else None
+        observe_request(time.perf_counter() - start, endpoint, request.method, response.status_code,
+                        body, request.content_length or 0, response.content_length or 0)
+        return response
+
+
+def observe_request(seconds: float, endpoint: str, method: str, status: int, body,
+                    request_bytes: int, response_bytes: int):
+    """Records one API request; ``body`` is the parsed JSON body, if any."""
+    cipher = cipher_label(body.get('cipher_type')) if isinstance(body, dict) else 'none'
+    HTTP_SECONDS.observe(seconds, endpoint, method, str(status), cipher, size_class(request_bytes))
+    HTTP_REQUEST_BYTES.inc(endpoint, amount=request_bytes)
+    HTTP_RESPONSE_BYTES.inc(endpoint, amount=response_bytes)
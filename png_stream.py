@@ -0,0 +1,333 @@
+"""
+HoloCrypt PNG Streams
+Band-at-a-time PNG reading and writing, so large images never sit in memory whole
+
+PIL decodes a PNG into one buffer holding the full image. PNGReader walks
+the chunks itself, inflates the IDAT stream incrementally and yields the
+image as bands of rows, converted to 8-bit RGB exactly as
+Image.convert('RGB') would. PNGWriter takes RGB bands, filters them and
+deflates them into IDAT chunks as they arrive. Memory is a few band-sized
+buffers plus zlib's window, whatever the image size.
+
+Unfiltering is sequential along each row (Average and Paeth depend on the
+reconstructed left neighbour), so it runs in PIL's C PNG decoder: each band
+is handed to it as a small stored (uncompressed) zlib stream, prefixed with
+the previous reconstructed row so the first row's Up/Average/Paeth filters
+see their prior. Filtering for the writer is vectorized: all five filter
+types are computed for a band and each row keeps the one with the smallest
+sum of absolute values (the libpng heuristic).
+
+Supported: every colour type at 8 bits, grayscale and palette at 1/2/4
+bits, 16-bit grayscale (with or without alpha). Interlaced and 16-bit
+colour images raise ValueError.
+"""
+
+import os
+import struct
+import tempfile
+import zlib
+
+import numpy as np
+from PIL import Image
+
+SIGNATURE = b'\x89PNG\r\n\x1a\n'
+BAND_BYTES = 1 << 20  # Default band: about this many bytes of RGB pixels
+IDAT_SIZE = 1 << 18  # Compressed bytes per IDAT chunk written
+FILTER_BYTES = 1 << 16  # Scanline bytes filtered per step (the filter temporaries are ~25x this)
+MAX_CHUNK = 1 << 28  # Longest chunk accepted while reading
+
+_IHDR = struct.Struct('>IIBBBBB')
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}  # colour type -> samples per pixel
+# 8-bit PIL mode with the same bytes per pixel, so PIL unfilters raw scanlines unchanged
+_RAW_MODES = {1: 'L', 2: 'LA', 3: 'RGB', 4: 'RGBA'}
+
+
+def band_rows(width: int, band_bytes: int = BAND_BYTES) -> int:
+    """Rows per band for an image ``width`` pixels wide."""
+    return max(1, band_bytes // (3 * max(width, 1)))
+
+
+# --- Reading ---
+
+class PNGReader:
+    """
+    Streams a PNG as bands of RGB rows.
+
+    Args:
+        source: Path or binary file object positioned at the PNG signature
+    """
+
+    def __init__(self, source):
+        self._owned = isinstance(source, (str, bytes, os.PathLike))
+        self._file = open(source, 'rb') if self._owned else source
+        try:
+            self._read_header()
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self._file.read(size)
+        if len(data) != size:
+            raise ValueError("Truncated PNG")
+        return data
+
+    def _read_chunk(self) -> tuple:
+        length, kind = struct.unpack('>I4s', self._read_exact(8))
+        if length > MAX_CHUNK:
+            raise ValueError("PNG chunk too large")
+        data = self._read_exact(length)
+        if struct.unpack('>I', self._read_exact(4))[0] != zlib.crc32(kind + data):
+            raise ValueError(f"Corrupt PNG chunk {kind.decode('latin-1')!r}")
+        return kind, data
+
+    def _read_header(self):
+        if self._read_exact(8) != SIGNATURE:
+            raise ValueError("Not a PNG file")
+        kind, data = self._read_chunk()
+        if kind != b'IHDR' or len(data) != _IHDR.size:
+            raise ValueError("PNG must start with IHDR")
+        self.width, self.height, self.bit_depth, self.color_type, _, _, interlace = _IHDR.unpack(data)
+        if interlace:
+            raise ValueError("Interlaced PNGs can't be streamed by rows")
+        if self.color_type not in _CHANNELS or self.width == 0 or self.height == 0:
+            raise ValueError("Unsupported PNG colour type or size")
+        channels = _CHANNELS[self.color_type]
+        if self.bit_depth == 16 and self.color_type in (2, 6):
+            raise ValueError("16-bit colour PNGs are not supported for streaming")
+        if self.bit_depth not in (1, 2, 4, 8, 16) or (self.bit_depth < 8 and self.color_type not in (0, 3)):
+            raise ValueError("Invalid PNG bit depth")
+
+        self.bytes_per_pixel = max(1, channels * self.bit_depth // 8)
+        self.stride = (self.width * channels * self.bit_depth + 7) // 8
+        self.palette = None
+
+        # Ancillary chunks before the image data don't change the RGB pixels
+        while True:
+            kind, data = self._read_chunk()
+            if kind == b'PLTE':
+                palette = np.zeros((256, 3), dtype=np.uint8)  # Out-of-range indices read as black, as in PIL
+                entries = np.frombuffer(data[:768 - 768 % 3], dtype=np.uint8).reshape(-1, 3)
+                palette[:len(entries)] = entries
+                self.palette = palette
+            elif kind == b'IDAT':
+                self._first_idat = data
+                break
+            elif kind == b'IEND':
+                raise ValueError("PNG has no image data")
+        if self.color_type == 3 and self.palette is None:
+            raise ValueError("Palette PNG without PLTE")
+
+    def _idat(self):
+        """IDAT payloads in order (they must be consecutive)."""
+        yield self._first_idat
+        while True:
+            kind, data = self._read_chunk()
+            if kind != b'IDAT':
+                return
+            yield data
+
+    def _filtered_bands(self, rows: int):
+        """Filtered scanlines (filter byte + stride), ``rows`` at a time."""
+        line = self.stride + 1
+        inflater = zlib.decompressobj()
+        chunks = self._idat()
+        pending = b''
+        buffer = bytearray()
+        remaining = self.height
+        while remaining:
+            needed = min(rows, remaining) * line
+            while len(buffer) < needed:
+                if not pending:
+                    pending = next(chunks, None)
+                    if pending is None:
+                        raise ValueError("Truncated PNG image data")
+                # Never inflate more than the band needs: a small file can't expand unboundedly
+                buffer += inflater.decompress(pending, needed - len(buffer))
+                pending = inflater.unconsumed_tail
+                if inflater.eof and len(buffer) < needed:
+                    raise ValueError("Truncated PNG image data")
+            yield bytes(buffer[:needed])
+            del buffer[:needed]
+            remaining -= needed // line
+
+    def _unfilter(self, previous: bytes, band: bytes, count: int) -> np.ndarray:
+        # Previous reconstructed row (filter None) + the band, as a stored zlib stream for PIL's decoder
+        stream = zlib.compress(b'\x00' + previous + band, 0)
+        mode = _RAW_MODES[self.bytes_per_pixel]
+        size = (self.stride // self.bytes_per_pixel, count + 1)
+        raw = np.asarray(Image.frombytes(mode, size, stream, 'zip', mode))
+        return raw.reshape(count + 1, self.stride)[1:]
+
+    def _unpack(self, raw: np.ndarray) -> np.ndarray:
+        """Sample values of sub-byte rows (1/2/4 bits), one uint8 per pixel."""
+        bits = self.bit_depth
+        unpacked = np.unpackbits(raw, axis=1)[:, :self.width * bits].reshape(len(raw), self.width, bits)
+        weights = (1 << np.arange(bits - 1, -1, -1)).astype(np.uint8)
+        return (unpacked * weights).sum(axis=2, dtype=np.uint8)
+
+    def _to_rgb(self, raw: np.ndarray) -> np.ndarray:
+        count, width, ct = len(raw), self.width, self.color_type
+        if self.bit_depth < 8:
+            values = self._unpack(raw)
+            if ct == 3:
+                return self.palette[values]
+            return np.repeat((values * (255 // ((1 << self.bit_depth) - 1)))[..., None], 3, axis=2)
+        if self.bit_depth == 16:
+            samples = raw.reshape(count, width, -1, 2)
+            if ct == 0:
+                gray = np.minimum(samples[..., 0, 0].astype(np.uint16) << 8 | samples[..., 0, 1], 255)
+                return np.repeat(gray.astype(np.uint8)[..., None], 3, axis=2)
+            return np.repeat(samples[..., 0, 0][..., None], 3, axis=2)  # gray + alpha: high byte of gray
+        pixels = raw.reshape(count, width, -1)
+        if ct == 2:
+            return pixels.copy()
+        if ct == 6:
+            return np.ascontiguousarray(pixels[..., :3])
+        if ct == 3:
+            return self.palette[pixels[..., 0]]
+        return np.repeat(pixels[..., :1], 3, axis=2)  # gray, gray + alpha
+
+    def bands(self, rows: int = None):
+        """
+        Yields the image as writable uint8 arrays of shape (band rows, width, 3), top to bottom.
+
+        Args:
+            rows: Rows per band (default: band_rows(width))
+        """
+        rows = rows or band_rows(self.width)
+        previous = bytes(self.stride)
+        for band in self._filtered_bands(rows):
+            count = len(band) // (self.stride + 1)
+            raw = self._unfilter(previous, band, count)
+            previous = raw[-1].tobytes()
+            yield self._to_rgb(raw)
+
+
+# --- Writing ---
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def _paeth(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    p = a + b - c
+    pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+    return np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+
+
+def filter_rows(rows: np.ndarray, previous: np.ndarray, bpp: int) -> np.ndarray:
+    """
+    Filters scanlines for IDAT, choosing each row's filter adaptively.
+
+    Args:
+        rows: (n, stride) uint8 raw scanlines
+        previous: (stride,) raw scanline above the first row (zeros at the top)
+        bpp: Bytes per pixel
+
+    Returns:
+        (n, stride + 1) uint8: filter type byte + filtered scanline per row
+    """
+    x = rows.astype(np.int16)
+    b = np.vstack([previous.astype(np.int16)[None], x[:-1]])
+    a = np.zeros_like(x)
+    a[:, bpp:] = x[:, :-bpp]
+    c = np.zeros_like(x)
+    c[:, bpp:] = b[:, :-bpp]
+
+    candidates = np.stack([x, x - a, x - b, x - (a + b) // 2, x - _paeth(a, b, c)]).astype(np.uint8)
+    scores = np.abs(candidates.view(np.int8).astype(np.int16)).sum(axis=2, dtype=np.int64)
+    choice = scores.argmin(axis=0)
+
+    out = np.empty((len(rows), rows.shape[1] + 1), dtype=np.uint8)
+    out[:, 0] = choice
+    out[:, 1:] = candidates[choice, np.arange(len(rows))]
+    return out
+
+
+class PNGWriter:
+    """
+    Writes an 8-bit RGB PNG from bands of rows.
+
+    A path destination is written to a temporary file and renamed into
+    place on close(), so a failed write never leaves a partial image.
+
+    Args:
+        destination: Path or binary file object
+        width, height: Image size
+        compress_level: zlib level (PIL's default is 6)
+    """
+
+    def __init__(self, destination, width: int, height: int, compress_level: int = 6):
+        self.width, self.height = width, height
+        self.rows_written = 0
+        self._path = destination if isinstance(destination, (str, bytes, os.PathLike)) else None
+        if self._path is not None:
+            fd, self._tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self._path)), prefix='.png-')
+            self._file = os.fdopen(fd, 'wb')
+        else:
+            self._file = destination
+        self._deflater = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+        self._previous = np.zeros(3 * width, dtype=np.uint8)
+        self._file.write(SIGNATURE + _chunk(b'IHDR', _IHDR.pack(width, height, 8, 2, 0, 0, 0)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _flush_idat(self, final: bool = False):
+        while len(self._pending) >= IDAT_SIZE or (final and self._pending):
+            self._file.write(_chunk(b'IDAT', bytes(self._pending[:IDAT_SIZE])))
+            del self._pending[:IDAT_SIZE]
+
+    def write(self, band: np.ndarray):
+        """Appends rows: a (rows, width, 3) uint8 array."""
+        if band.ndim != 3 or band.shape[1:] != (self.width, 3):
+            raise ValueError(f"Expected rows of shape (n, {self.width}, 3)")
+        if self.rows_written + len(band) > self.height:
+            raise ValueError("More rows than the image height")
+        raw = band.reshape(len(band), -1)
+        step = max(1, FILTER_BYTES // raw.shape[1])
+        for top in range(0, len(raw), step):
+            self._pending += self._deflater.compress(filter_rows(raw[top:top + step], self._previous, 3))
+            self._previous = raw[min(top + step, len(raw)) - 1]
+        self._previous = self._previous.copy()
+        self.rows_written += len(band)
+        self._flush_idat()
+
+    def close(self):
+        """Finishes the image; every row must have been written."""
+        if self.rows_written != self.height:
+            self.abort()
+            raise ValueError(f"Wrote {self.rows_written} of {self.height} rows")
+        self._pending += self._deflater.flush()
+        self._flush_idat(final=True)
+        self._file.write(_chunk(b'IEND', b''))
+        if self._path is not None:
+            self._file.close()
+            os.replace(self._tmp_path, self._path)
+
+    def abort(self):
+        """Discards a path destination's partial output."""
+        if self._path is not None and not self._file.closed:
+            self._file.close()
+            try:
+                os.remove(self._tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,246 @@
+"""
+HoloCrypt Request Profiling
+Opt-in per-request cProfile / stack-sampling with an admin endpoint for recent profiles
+
+Disabled unless PROFILING_ENABLED=true; when disabled nothing is installed,
+so requests pay no cost at all. When enabled, a request is profiled if it
+sends "X-HoloCrypt-Profile: <PROFILE_TOKEN>" or is picked by
+PROFILE_SAMPLE_RATE (0.0 - 1.0).
+"""
+
+import collections
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+
+from flask import Blueprint, abort, current_app, jsonify, request, Response
+
+PROFILE_HEADER = 'HTTP_X_HOLOCRYPT_PROFILE'
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='holocrypt-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format, ready for flamegraph.pl / speedscope."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+
+class ProfileStore:
+    """Keeps the most recent profiles in memory and their raw files on disk."""
+
+    def __init__(self, directory: str, keep: int = 50):
+        self.directory = directory
+        self.profiles = collections.OrderedDict()
+        self.keep = keep
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, record: dict):
+        with self._lock:
+            self.profiles[record['id']] = record
+            while len(self.profiles) > self.keep:
+                _, old = self.profiles.popitem(last=False)
+                for path in old['files'].values():
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def recent(self) -> list:
+        with self._lock:
+            return list(reversed(self.profiles.values()))
+
+    def get(self, profile_id: str):
+        with self._lock:
+            return self.profiles.get(profile_id)
+
+
+class ProfilingMiddleware:
+    """WSGI middleware that profiles selected requests end to end."""
+
+    def __init__(self, wsgi_app, store: ProfileStore, mode: str = 'cprofile',
+                 sample_rate: float = 0.0, token: str = None, top_n: int = 30):
+        self.wsgi_app = wsgi_app
+        self.store = store
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.token = token
+        self.top_n = top_n
+        # Only one profiler may be active per process; others run unprofiled
+        self._busy = threading.Lock()
+
+    def _selected(self, environ) -> bool:
+        header = environ.get(PROFILE_HEADER)
+        if header is not None and self.token and header == self.token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, environ, start_response):
+        if not self._selected(environ) or not self._busy.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+
+        try:
+            status_holder = []
+
+            def capture_status(status, headers, exc_info=None):
+                status_holder.append(status)
+                return start_response(status, headers, exc_info)
+
+            profiler = sampler = None
+            if self.mode == 'sample':
+                sampler = StackSampler(threading.get_ident())
+                sampler.start()
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+
+            started = time.perf_counter()
+            try:
+                # Drain the body inside the profile so lazy generation is included
+                iterable = self.wsgi_app(environ, capture_status)
+                try:
+                    body = list(iterable)
+                finally:
+                    if hasattr(iterable, 'close'):
+                        iterable.close()
+            finally:
+                duration = time.perf_counter() - started
+                if profiler is not None:
+                    profiler.disable()
+                if sampler is not None:
+                    sampler.stop()
+
+            self._record(environ, status_holder, duration, profiler, sampler)
+            return body
+        finally:
+            self._busy.release()
+
+    def _record(self, environ, status_holder, duration, profiler, sampler):
+        profile_id = uuid.uuid4().hex[:12]
+        record = {
+            'id': profile_id,
+            'method': environ.get('REQUEST_METHOD'),
+            'path': environ.get('PATH_INFO'),
+            'status': status_holder[0] if status_holder else None,
+            'duration_ms': round(duration * 1000, 2),
+            'timestamp': time.time(),
+            'mode': self.mode,
+            'files': {},
+        }
+
+        if profiler is not None:
+            prof_path = os.path.join(self.store.directory, f'{profile_id}.prof')
+            profiler.dump_stats(prof_path)
+            record['files']['prof'] = prof_path
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(self.top_n)
+            record['top'] = text.getvalue()
+
+        if sampler is not None:
+            collapsed = sampler.collapsed()
+            collapsed_path = os.path.join(self.store.directory, f'{profile_id}.collapsed')
+            with open(collapsed_path, 'w', encoding='utf-8') as fh:
+                fh.write(collapsed)
+            record['files']['collapsed'] = collapsed_path
+            record['samples'] = sum(sampler.counts.values())
+            record['top'] = ''.join(itertools.islice(io.StringIO(collapsed), self.top_n))
+
+        self.store.add(record)
+
+
+admin = Blueprint('holocrypt_profiling', __name__)
+
+
+def _require_token():
+    token = current_app.config['PROFILE_TOKEN']
+    if not token or request.headers.get('Authorization') != f'Bearer {token}':
+        abort(403)
+
+
+@admin.route('/api/v1/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Recent profiles, newest first (without the stats bodies)."""
+    _require_token()
+    store = current_app.extensions['holocrypt_profiles']
+    profiles = [{key: value for key, value in record.items() if key not in ('top', 'files')}
+                for record in store.recent()]
+    return jsonify({'success': True, 'profiles': profiles, 'total': len(profiles)})
+
+
+@admin.route('/api/v1/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """
+    One profile. ?format=text returns the top-N stats, ?format=collapsed the
+    flamegraph stack file, ?format=prof the raw pstats dump.
+    """
+    _require_token()
+    record = current_app.extensions['holocrypt_profiles'].get(profile_id)
+    if record is None:
+        abort(404)
+
+    fmt = request.args.get('format', 'json')
+    if fmt == 'text':
+        return Response(record.get('top', ''), mimetype='text/plain')
+    if fmt in record['files']:
+        with open(record['files'][fmt], 'rb') as fh:
+            mimetype = 'text/plain' if fmt == 'collapsed' else 'application/octet-stream'
+            return Response(fh.read(), mimetype=mimetype)
+    if fmt != 'json':
+        abort(404)
+    return jsonify({'success': True, 'profile': {key: value for key, value in record.items() if key != 'files'}})
+
+
+def init_app(app):
+    """Install the profiler if PROFILING_ENABLED; otherwise do nothing."""
+    app.config.setdefault('PROFILING_ENABLED', os.getenv('PROFILING_ENABLED', 'false').lower() == 'true')
+    if not app.config['PROFILING_ENABLED']:
+        return
+
+    app.config.setdefault('PROFILE_TOKEN', os.getenv('PROFILE_TOKEN'))
+    app.config.setdefault('PROFILE_SAMPLE_RATE', float(os.getenv('PROFILE_SAMPLE_RATE', 0)))
+    app.config.setdefault('PROFILE_MODE', os.getenv('PROFILE_MODE', 'cprofile'))  # or 'sample'
+    app.config.setdefault('PROFILE_DIR', os.getenv('PROFILE_DIR', os.path.join('.holocrypt', 'profiles')))
+    app.config.setdefault('PROFILE_KEEP', int(os.getenv('PROFILE_KEEP', 50)))
+
+    store = ProfileStore(app.config['PROFILE_DIR'], keep=app.config['PROFILE_KEEP'])
+    app.extensions['holocrypt_profiles'] = store
+    app.wsgi_app = ProfilingMiddleware(
+        app.wsgi_app, store,
+        mode=app.config['PROFILE_MODE'],
+        sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+        token=app.config['PROFILE_TOKEN']
+    )
+    app.register_blueprint(admin)
@@ -0,0 +1,232 @@
+"""
+HoloCrypt QR Payload
+Compact, versioned binary payload for QR redirect URLs
+
+The legacy redirect URL carried the ciphertext and a JSON dump of the cipher
+params, each base64-encoded separately (``?data=...&cipher=...&params=...``).
+The compact payload is a single query value:
+
+    header   1 byte: format version (3 bits), compressed flag, cipher code (4 bits)
+    params   packed per cipher: zigzag varints for ints, length-prefixed UTF-8
+             for strings; unknown ciphers or extra params fall back to JSON
+    body     UTF-8 ciphertext, raw DEFLATE-compressed when that is shorter
+
+encoded once, as base45 (``?z=``, RFC 9285) or unpadded base64url (``?p=``).
+Base45 stays in the QR alphanumeric mode (5.5 bits per character against 8
+in byte mode), so it gives the smaller code; its space, '%' and '+' are
+percent-escaped using only alphanumeric-mode characters.
+"""
+
+import base64
+import json
+import zlib
+
+FORMAT_VERSION = 1
+MAX_TEXT_BYTES = 1 << 20  # decompression limit; a QR code holds under 3 KB
+
+BASE45_KEY = 'z'
+BASE64_KEY = 'p'
+ENCODINGS = {'base45': BASE45_KEY, 'base64url': BASE64_KEY}
+
+_COMPRESSED = 0x10
+_GENERIC = 0  # cipher code for anything not in CIPHERS: type and params as strings
+
+# cipher code, (param name, kind) in packing order
+CIPHERS = {
+    'caesar': (1, (('shift', int),)),
+    'vigenere': (2, (('keyword', str),)),
+    'atbash': (3, ()),
+    'substitution': (4, (('substitution_key', str),)),
+    'rail_fence': (5, (('rails', int),)),
+}
+_CIPHER_NAMES = {code: name for name, (code, _) in CIPHERS.items()}
+
+
+# --- Base45 (RFC 9285) ---
+
+BASE45_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+_BASE45_VALUES = {c: i for i, c in enumerate(BASE45_ALPHABET)}
+# Characters a query string can't carry literally, escaped with alphanumeric-mode characters
+_BASE45_URL_ESCAPES = str.maketrans({' ': '%20', '%': '%25', '+': '%2B'})
+
+
+def base45_encode(data: bytes) -> str:
+    chars = []
+    for i in range(0, len(data) - 1, 2):
+        n = data[i] * 256 + data[i + 1]
+        n, c = divmod(n, 45)
+        e, d = divmod(n, 45)
+        chars += (BASE45_ALPHABET[c], BASE45_ALPHABET[d], BASE45_ALPHABET[e])
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        chars += (BASE45_ALPHABET[c], BASE45_ALPHABET[d])
+    return ''.join(chars)
+
+
+def base45_decode(text: str) -> bytes:
+    try:
+        values = [_BASE45_VALUES[c] for c in text]
+    except KeyError as e:
+        raise ValueError(f"Invalid base45 character {e.args[0]!r}")
+    if len(values) % 3 == 1:
+        raise ValueError("Invalid base45 length")
+
+    out = bytearray()
+    for i in range(0, len(values), 3):
+        group = values[i:i + 3]
+        n = sum(v * 45 ** k for k, v in enumerate(group))
+        if len(group) == 3:
+            if n > 0xFFFF:
+                raise ValueError("Invalid base45 group")
+            out += n.to_bytes(2, 'big')
+        else:
+            if n > 0xFF:
+                raise ValueError("Invalid base45 group")
+            out.append(n)
+    return bytes(out)
+
+
+# --- Packing ---
+
+def _write_varint(out: bytearray, value: int):
+    if not -(1 << 63) <= value < (1 << 63):
+        raise ValueError("Integer parameter out of range")
+    value = (value << 1) ^ (value >> 63)  # zigzag: small negatives stay short
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> tuple:
+    value = shift = 0
+    while True:
+        if offset >= len(data) or shift > 63:
+            raise ValueError("Truncated integer")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return (value >> 1) ^ -(value & 1), offset
+
+
+def _write_string(out: bytearray, value: str):
+    encoded = value.encode('utf-8')
+    _write_varint(out, len(encoded))
+    out += encoded
+
+
+def _read_string(data: bytes, offset: int) -> tuple:
+    length, offset = _read_varint(data, offset)
+    if length < 0 or offset + length > len(data):
+        raise ValueError("Truncated string")
+    return data[offset:offset + length].decode('utf-8'), offset + length
+
+
+def _packable(cipher_type: str, cipher_params: dict):
+    """The CIPHERS entry if the params match its fields exactly, else None."""
+    entry = CIPHERS.get(cipher_type)
+    if entry is None or set(cipher_params) != {name for name, _ in entry[1]}:
+        return None
+    # bool is an int subclass but would not round-trip
+    if any(type(cipher_params[name]) is not kind for name, kind in entry[1]):
+        return None
+    return entry
+
+
+def pack_payload(encrypted_data: str, cipher_type: str, cipher_params: dict) -> bytes:
+    """Binary payload for a ciphertext and its cipher."""
+    cipher_params = cipher_params or {}
+    out = bytearray(1)
+    entry = _packable(cipher_type, cipher_params)
+    if entry is None:
+        code = _GENERIC
+        _write_string(out, cipher_type)
+        _write_string(out, json.dumps(cipher_params, separators=(',', ':')))
+    else:
+        code, fields = entry
+        for name, kind in fields:
+            (_write_varint if kind is int else _write_string)(out, cipher_params[name])
+
+    body = encrypted_data.encode('utf-8')
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    compressed = compressor.compress(body) + compressor.flush()
+    flags = 0
+    if len(compressed) < len(body):
+        body, flags = compressed, _COMPRESSED
+
+    out[0] = FORMAT_VERSION << 5 | flags | code
+    return bytes(out + body)
+
+
+def unpack_payload(payload: bytes) -> dict:
+    """Inverse of pack_payload: dict with encrypted_data, cipher_type, cipher_params."""
+    if not payload:
+        raise ValueError("Empty payload")
+    header = payload[0]
+    if header >> 5 != FORMAT_VERSION:
+        raise ValueError(f"Unsupported payload version {header >> 5}")
+
+    code, offset = header & 0x0F, 1
+    if code == _GENERIC:
+        cipher_type, offset = _read_string(payload, offset)
+        raw_params, offset = _read_string(payload, offset)
+        cipher_params = json.loads(raw_params)
+    elif code in _CIPHER_NAMES:
+        cipher_type = _CIPHER_NAMES[code]
+        cipher_params = {}
+        for name, kind in CIPHERS[cipher_type][1]:
+            cipher_params[name], offset = (_read_varint if kind is int else _read_string)(payload, offset)
+    else:
+        raise ValueError(f"Unknown cipher code {code}")
+
+    body = payload[offset:]
+    if header & _COMPRESSED:
+        decompressor = zlib.decompressobj(-15)
+        body = decompressor.decompress(body, MAX_TEXT_BYTES)
+        if decompressor.unconsumed_tail:
+            raise ValueError("Ciphertext exceeds the payload size limit")
+        if not decompressor.eof or decompressor.unused_data:
+            raise ValueError("Corrupt compressed ciphertext")
+    return {
+        'encrypted_data': body.decode('utf-8'),
+        'cipher_type': cipher_type,
+        'cipher_params': cipher_params
+    }
+
+
+# --- Query strings ---
+
+def encode_query(encrypted_data: str, cipher_type: str, cipher_params: dict,
+                 encoding: str = 'base45') -> str:
+    """
+    Query string ("z=..." or "p=...") carrying the compact payload.
+
+    Args:
+        encoding: 'base45' (smallest QR) or 'base64url'
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding {encoding!r}; expected one of {sorted(ENCODINGS)}")
+    payload = pack_payload(encrypted_data, cipher_type, cipher_params)
+    if encoding == 'base45':
+        value = base45_encode(payload).translate(_BASE45_URL_ESCAPES)
+    else:
+        value = base64.urlsafe_b64encode(payload).rstrip(b'=').decode('ascii')
+    return f"{ENCODINGS[encoding]}={value}"
+
+
+def decode_query(params: dict):
+    """
+    Decodes the compact payload from parsed query params (parse_qs output).
+
+    Returns:
+        Same dict as unpack_payload, or None if the query has no compact payload
+    """
+    if BASE45_KEY in params:
+        return unpack_payload(base45_decode(params[BASE45_KEY][0]))
+    if BASE64_KEY in params:
+        value = params[BASE64_KEY][0]
+        return unpack_payload(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+    return None
+
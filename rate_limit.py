@@ -0,0 +1,301 @@
+"""
+HoloCrypt Rate Limiting
+Per-client token buckets and cost-weighted admission control for expensive endpoints
+"""
+
+import functools
+import hashlib
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, jsonify, request
+
+# Atomic token bucket for Redis-compatible servers (Redis, Valkey, KeyDB, ...)
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local retry = 0
+if tokens >= cost then
+    tokens = math.min(burst, tokens - cost)
+else
+    retry = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry)
+"""
+
+
+class MemoryBackend:
+    """
+    Token buckets in a dict; limits apply per worker process.
+
+    Past MAX_BUCKETS the least recently used bucket is dropped. Buckets idle
+    that long have refilled, so dropping them changes nothing for their client.
+    """
+
+    MAX_BUCKETS = 100_000
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        """
+        Takes ``cost`` tokens from the bucket (a negative cost refunds them).
+
+        Returns:
+            0 if allowed, otherwise seconds until enough tokens are available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.pop(key, (burst, now))  # Re-inserted below as most recent
+            tokens = min(burst, tokens + (now - ts) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (min(burst, tokens - cost), now)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (cost - tokens) / rate
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+
+class RedisBackend:
+    """Token buckets in a Redis-compatible server; limits are shared by all workers."""
+
+    def __init__(self, url: str):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self._script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        try:
+            return float(self._script(keys=[f'holocrypt:rl:{key}'], args=[rate, burst, cost, time.time()]))
+        except Exception as e:
+            print(f"⚠️ Rate limit backend unavailable, allowing request: {e}")
+            return 0.0
+
+
+class AdmissionController:
+    """
+    Bounds the total cost of requests in flight across worker processes.
+
+    Requests that would push the in-flight cost over ``capacity`` are rejected
+    at once instead of queueing behind slow ones until they time out.
+
+    The counter lives in shared memory. When it is created before the
+    workers fork (gunicorn's preload_app), every worker shares one budget,
+    so sync workers stuck on expensive requests make the next ones 429
+    quickly and drain the accept backlog. Each worker's share sits in its
+    own slot; the master hands a dead worker's share back (reap()).
+
+    Args:
+        capacity: In-flight cost allowed across all processes sharing the controller
+    """
+
+    SLOTS = 256  # Worker processes tracked at once; more share an untracked slot
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self._lock = multiprocessing.Lock()
+        self._total = multiprocessing.RawValue('d', 0.0)
+        self._pids = multiprocessing.RawArray('i', self.SLOTS)
+        self._costs = multiprocessing.RawArray('d', self.SLOTS)
+        self._slot = None
+        self._slot_pid = None
+
+    @property
+    def in_flight(self) -> float:
+        return self._total.value
+
+    def _own_slot(self):
+        """This process's slot index, claimed on first use (call with the lock held)."""
+        pid = os.getpid()
+        if self._slot_pid != pid:
+            self._slot, self._slot_pid = None, pid
+            for index in range(self.SLOTS):
+                if self._pids[index] in (0, pid):
+                    self._pids[index] = pid
+                    self._slot = index
+                    break
+        return self._slot
+
+    def try_acquire(self, cost: float) -> bool:
+        with self._lock:
+            # A request costlier than the whole budget may still run when nothing else is
+            if self._total.value and self._total.value + cost > self.capacity:
+                return False
+            self._total.value += cost
+            slot = self._own_slot()
+            if slot is not None:
+                self._costs[slot] += cost
+            return True
+
+    def release(self, cost: float):
+        with self._lock:
+            self._total.value = max(0.0, self._total.value - cost)
+            slot = self._own_slot()
+            if slot is not None:
+                self._costs[slot] = max(0.0, self._costs[slot] - cost)
+
+    def reap(self, pid: int):
+        """Returns the in-flight cost of a process that died mid-request (gunicorn child_exit)."""
+        with self._lock:
+            for index in range(self.SLOTS):
+                if self._pids[index] == pid:
+                    self._total.value = max(0.0, self._total.value - self._costs[index])
+                    self._pids[index] = 0
+                    self._costs[index] = 0.0
+
+
+class RateLimiter:
+    """
+    Flask extension combining three checks, cheapest first:
+
+    1. a token bucket per client per endpoint (``rate``/``burst``),
+    2. a token bucket per client shared by all limited endpoints, drained by
+       each endpoint's ``cost`` (``RATE_LIMIT_CLIENT_RATE``/``_BURST``),
+    3. admission control on the in-flight cost (``ADMISSION_CAPACITY``),
+       shared by every worker forked after init_app (see AdmissionController).
+
+    Failing any of them returns 429 with a Retry-After header, and tokens
+    taken by the checks before it are refunded. Clients are
+    told apart by API key only for keys listed in ``RATE_LIMIT_API_KEYS``
+    (comma-separated); anything else is limited by remote address.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.api_keys = frozenset()
+        self.admission = None
+        self.client_rate = 0.0
+        self.client_burst = 0.0
+
+    def init_app(self, app):
+        app.config.setdefault('RATE_LIMIT_ENABLED', os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('RATE_LIMIT_REDIS_URL', os.getenv('RATE_LIMIT_REDIS_URL'))
+        app.config.setdefault('RATE_LIMIT_CLIENT_RATE', float(os.getenv('RATE_LIMIT_CLIENT_RATE', 20)))
+        app.config.setdefault('RATE_LIMIT_CLIENT_BURST', float(os.getenv('RATE_LIMIT_CLIENT_BURST', 100)))
+        app.config.setdefault('ADMISSION_CAPACITY', float(os.getenv('ADMISSION_CAPACITY', 40)))
+        app.config.setdefault('RATE_LIMIT_API_KEYS', os.getenv('RATE_LIMIT_API_KEYS', ''))
+
+        if app.config['RATE_LIMIT_REDIS_URL']:
+            self.backend = RedisBackend(app.config['RATE_LIMIT_REDIS_URL'])
+        else:
+            self.backend = MemoryBackend()
+        self.admission = AdmissionController(app.config['ADMISSION_CAPACITY'])
+        self.client_rate = app.config['RATE_LIMIT_CLIENT_RATE']
+        self.client_burst = app.config['RATE_LIMIT_CLIENT_BURST']
+        self.api_keys = frozenset(_key_digest(key.strip())
+                                  for key in app.config['RATE_LIMIT_API_KEYS'].split(',') if key.strip())
+        app.extensions['holocrypt_limiter'] = self
+
+
+def _key_digest(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+def client_identity(limiter: RateLimiter, api_key: str, remote_addr: str) -> str:
+    """
+    Bucket identity for a request.
+
+    The API key counts only if it is one of the configured keys, so a client
+    inventing a new key per request doesn't get a fresh bucket each time.
+    """
+    if api_key:
+        digest = _key_digest(api_key)
+        if digest in limiter.api_keys:
+            return f'key:{digest[:16]}'
+    return f'ip:{remote_addr}'
+
+
+def client_id() -> str:
+    """client_identity() of the current Flask request."""
+    return client_identity(current_app.extensions['holocrypt_limiter'],
+                           request.headers.get('X-API-Key'), request.remote_addr)
+
+
+def take_tokens(limiter: RateLimiter, client: str, endpoint: str, rate: float, burst: float, cost: float) -> tuple:
+    """
+    The token bucket checks of rate_limited(), without admission control.
+
+    Tokens are only kept when both buckets allow the request.
+
+    Returns:
+        (0, None) if allowed, else (seconds to wait, reason)
+    """
+    retry_after = limiter.backend.take(f'{client}:{endpoint}', rate, burst)
+    if retry_after:
+        return retry_after, 'endpoint limit reached'
+
+    retry_after = limiter.backend.take(client, limiter.client_rate, limiter.client_burst, cost)
+    if retry_after:
+        limiter.backend.take(f'{client}:{endpoint}', rate, burst, -1)
+        return retry_after, 'client budget exhausted'
+    return 0, None
+
+
+def refund_tokens(limiter: RateLimiter, client: str, endpoint: str, rate: float, burst: float, cost: float):
+    """Gives back what take_tokens() took, for a request a later check rejected."""
+    limiter.backend.take(f'{client}:{endpoint}', rate, burst, -1)
+    limiter.backend.take(client, limiter.client_rate, limiter.client_burst, -cost)
+
+
+def too_many_requests_body(retry_after: float, reason: str) -> dict:
+    return {
+        'success': False,
+        'error': f'Too many requests: {reason}. Retry in {retry_after:.1f}s'
+    }
+
+
+def _too_many_requests(retry_after: float, reason: str):
+    response = jsonify(too_many_requests_body(retry_after, reason))
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def rate_limited(rate: float, burst: float, cost: float = 1):
+    """
+    Decorator for expensive endpoints.
+
+    Args:
+        rate: Sustained requests per second allowed per client on this endpoint
+        burst: Requests a client may make back-to-back before ``rate`` applies
+        cost: Relative cost of one request, charged against the client's
+            shared bucket and the process's admission budget
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+                return view(*args, **kwargs)
+
+            limiter = current_app.extensions['holocrypt_limiter']
+            client = client_id()
+            retry_after, reason = take_tokens(limiter, client, request.endpoint, rate, burst, cost)
+            if retry_after:
+                return _too_many_requests(retry_after, reason)
+
+            if not limiter.admission.try_acquire(cost):
+                refund_tokens(limiter, client, request.endpoint, rate, burst, cost)
+                return _too_many_requests(1, 'server busy')
+            try:
+                return view(*args, **kwargs)
+            finally:
+                limiter.admission.release(cost)
+        wrapper.rate_limit = (rate, burst, cost)  # Read by asgi.py for its native routes
+        return wrapper
+    return decorator
@@ -0,0 +1,191 @@
+"""
+HoloCrypt Static Assets
+Serves the Vite build in static/dist from an index built once at startup
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import Response, abort, current_app, request, send_file
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Vite emits content-hashed names such as assets/index-4f9c1a2b.js into its
+# assetsDir; files copied from public/ keep their names and may change in place
+HASHED_ASSETS_DIR = 'assets/'
+HASHED_NAME = re.compile(r'-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml',
+                      'application/xml', 'application/wasm')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+MAX_MEMORY_FILE = 2 * 1024 * 1024   # Larger files are streamed from disk
+MIN_COMPRESS_SIZE = 1024            # Not worth a Content-Encoding below this
+
+
+class StaticAsset:
+    """One file from the build, with its validators and encoded variants."""
+
+    __slots__ = ('path', 'mimetype', 'etag', 'cache_control', 'body', 'variants')
+
+    def __init__(self, path: str, mimetype: str, etag: str, cache_control: str, body: bytes = None):
+        self.path = path
+        self.mimetype = mimetype
+        self.etag = etag
+        self.cache_control = cache_control
+        self.body = body        # None means "too large, stream from path"
+        self.variants = {}      # content-encoding -> bytes
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _load_asset(full_path: str, rel_path: str) -> StaticAsset:
+    mimetype = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+    if rel_path.startswith(HASHED_ASSETS_DIR) and HASHED_NAME.search(rel_path):
+        cache_control = IMMUTABLE_CACHE
+    else:
+        cache_control = REVALIDATE_CACHE
+
+    size = os.path.getsize(full_path)
+    digest = hashlib.sha256()
+    body = None
+    with open(full_path, 'rb') as fh:
+        if size <= MAX_MEMORY_FILE:
+            body = fh.read()
+            digest.update(body)
+        else:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+    asset = StaticAsset(full_path, mimetype, digest.hexdigest()[:32], cache_control, body)
+
+    if body is None or size < MIN_COMPRESS_SIZE or not mimetype.startswith(COMPRESSIBLE_TYPES):
+        return asset
+
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        # Prefer variants produced by the build; otherwise compress once here
+        if os.path.isfile(full_path + suffix):
+            with open(full_path + suffix, 'rb') as fh:
+                encoded = fh.read()
+        elif encoding == 'br' and brotli is None:
+            continue
+        else:
+            encoded = _compress(body, encoding)
+        if len(encoded) < size:
+            asset.variants[encoding] = encoded
+    return asset
+
+
+def _accepted_encodings() -> list:
+    """Encodings the client accepts, highest q-value first; ties prefer br over gzip."""
+    accepted = request.accept_encodings
+    ranked = sorted(('br', 'gzip'), key=lambda encoding: -accepted.quality(encoding))
+    return [encoding for encoding in ranked if accepted.quality(encoding) > 0]
+
+
+class StaticIndex:
+    """
+    In-memory index of the React build.
+
+    The directory is walked once; each file's bytes, content-hash ETag and
+    gzip/brotli variants are kept in memory, so requests never touch the
+    filesystem. Hashed Vite assets under assets/ are served as immutable; everything else
+    (including the SPA fallback index.html) must revalidate via its ETag.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root
+        self.assets = {}
+        self.fallback = None
+        self._mtime = None
+
+    def init_app(self, app):
+        if self.root is None:
+            self.root = os.path.join(app.root_path, 'static', 'dist')
+        self.scan()
+        app.extensions['holocrypt_static'] = self
+
+    def scan(self):
+        """(Re)build the index from disk."""
+        assets = {}
+        if os.path.isdir(self.root):
+            for directory, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    if filename.endswith(('.gz', '.br')):
+                        continue  # Picked up as variants of their source file
+                    full_path = os.path.join(directory, filename)
+                    rel_path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                    assets[rel_path] = _load_asset(full_path, rel_path)
+            self._mtime = os.stat(self.root).st_mtime_ns
+        self.assets = assets
+        self.fallback = assets.get('index.html')
+
+    def _refresh_if_rebuilt(self):
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.scan()
+
+    def lookup(self, path: str):
+        if current_app.debug:
+            self._refresh_if_rebuilt()
+        return self.assets.get(path)
+
+    def respond(self, asset: StaticAsset) -> Response:
+        """Build the response for an asset, honouring If-None-Match and Accept-Encoding."""
+        encoding = None
+        for candidate in _accepted_encodings():
+            if candidate in asset.variants:
+                encoding = candidate
+                break
+        etag = f'{asset.etag}-{encoding}' if encoding else asset.etag
+
+        if asset.body is None:
+            response = send_file(asset.path, mimetype=asset.mimetype, etag=etag, conditional=True)
+        elif request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+        else:
+            body = asset.variants[encoding] if encoding else asset.body
+            response = Response(body, mimetype=asset.mimetype)
+            response.set_etag(etag)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+        response.headers['Cache-Control'] = asset.cache_control
+        if asset.variants:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    def serve(self, path: str) -> Response:
+        """Serve a file from the build, falling back to index.html for client-side routes."""
+        asset = self.lookup(path)
+        if asset is None:
+            asset = self.fallback
+        if asset is None:
+            abort(404)
+        return self.respond(asset)
+
+    def serve_exact(self, path: str) -> Response:
+        """Serve a file from the build, 404 if it is not part of it."""
+        asset = self.lookup(path)
+        if asset is None:
+            abort(404)
+        return self.respond(asset)
+
+
+def static_index() -> StaticIndex:
+    """The index registered on the current app."""
+    return current_app.extensions['holocrypt_static']
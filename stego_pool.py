@@ -0,0 +1,221 @@
+"""
+HoloCrypt Stego Pool
+Batch LSB embed / extract over a process pool, with pixels passed through shared memory
+
+Embedding and extraction are CPU-bound (pixel bit planes plus PNG encoding),
+so a batch is fanned out over worker processes. Pickling every decoded image
+to a worker and back would copy each pixel buffer twice through a pipe;
+instead the request process decodes the batch once into a single
+multiprocessing.shared_memory block (image i at its own offset). Each task
+carries only the block name, its offset and size, and the image's payload.
+The worker attaches to the block, embeds into (or reads from) its slice in
+place and returns a small result: the PNG of an embedded image, or the
+extracted bytes.
+
+Results come back in input order. An image that fails (not an image, too
+small, wrong access code) yields its error without failing the batch.
+
+Environment: STEGO_POOL_WORKERS (default min(4, CPUs)), STEGO_MAX_BATCH
+(images per batch, default 256), STEGO_MAX_BATCH_PIXELS (decoded RGB pixels
+per batch, default 64M).
+"""
+
+import atexit
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+from io import BytesIO
+from multiprocessing import shared_memory
+
+import numpy as np
+from PIL import Image
+
+from holocrypt_enhanced import hide_data_in_pixels, extract_data_from_pixels
+
+MAX_BATCH = int(os.getenv('STEGO_MAX_BATCH', 256))
+MAX_BATCH_PIXELS = int(os.getenv('STEGO_MAX_BATCH_PIXELS', 64 << 20))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# --- Pool ---
+
+def _context():
+    # A forkserver forks workers from a clean, single-threaded process that
+    # imported this module once, rather than from a threaded server worker
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Process-wide executor, started on first use (after the server forks its workers)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.getenv('STEGO_POOL_WORKERS', min(4, os.cpu_count() or 1)))
+            _pool = concurrent.futures.ProcessPoolExecutor(max(workers, 1), mp_context=_context())
+        return _pool
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown)
+
+
+# --- Workers ---
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # The parent owns the block
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)  # Python < 3.13
+
+
+def _run(func, name: str, offset: int, size: int, *args) -> tuple:
+    """(True, result) or (False, error message) for func(pixels, *args) on a slice of the block."""
+    block = _attach(name)
+    try:
+        pixels = np.ndarray((size,), dtype=np.uint8, buffer=block.buf, offset=offset)
+        try:
+            return True, func(pixels, *args)
+        except Exception as e:
+            return False, str(e) or type(e).__name__
+        finally:
+            del pixels  # Views must be gone before the block closes
+    finally:
+        block.close()
+
+
+def _embed_png(pixels: np.ndarray, width: int, height: int, encrypted_data: bytes, access_code_hash: str) -> bytes:
+    hide_data_in_pixels(pixels, encrypted_data, access_code_hash)
+    out = BytesIO()
+    Image.frombuffer('RGB', (width, height), pixels, 'raw', 'RGB', 0, 1).save(out, 'PNG')
+    return out.getvalue()
+
+
+def _embed_task(task: tuple) -> tuple:
+    name, offset, width, height, encrypted_data, access_code_hash = task
+    return _run(_embed_png, name, offset, width * height * 3, width, height, encrypted_data, access_code_hash)
+
+
+def _extract_task(task: tuple) -> tuple:
+    name, offset, size, access_code = task
+    return _run(extract_data_from_pixels, name, offset, size, access_code)
+
+
+# --- Batches ---
+
+def _open(source) -> Image.Image:
+    """Lazily opened image from a PIL image, file object or bytes (pixels not decoded yet)."""
+    if isinstance(source, Image.Image):
+        return source
+    return Image.open(BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def _rgb_bytes(image: Image.Image) -> bytes:
+    return (image if image.mode == 'RGB' else image.convert('RGB')).tobytes()
+
+
+def _run_batch(images: list, task_for, worker) -> list:
+    """
+    Decodes ``images`` into one shared block, runs worker(task_for(i, name, offset, image))
+    for each on the pool, and returns per-image result dicts in order.
+    """
+    if len(images) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} images per batch")
+
+    opened = []
+    for source in images:
+        try:
+            opened.append(_open(source))
+        except Exception:
+            opened.append(ValueError("Not a readable image"))
+    # Checked from the headers, before anything is decoded
+    sizes = [image.width * image.height * 3 if isinstance(image, Image.Image) else 0 for image in opened]
+    if sum(sizes) > MAX_BATCH_PIXELS * 3:
+        raise ValueError(f"Batch too large: at most {MAX_BATCH_PIXELS} pixels in total")
+
+    block = shared_memory.SharedMemory(create=True, size=max(sum(sizes), 1))
+    try:
+        futures = []
+        offset = 0
+        for index, (image, size) in enumerate(zip(opened, sizes)):
+            if isinstance(image, Image.Image):
+                try:
+                    block.buf[offset:offset + size] = _rgb_bytes(image)
+                except Exception:
+                    image = ValueError("Not a readable image")  # Truncated or corrupt pixel data
+            if isinstance(image, Exception):
+                futures.append(image)
+                continue
+            futures.append(pool().submit(worker, task_for(index, block.name, offset, image)))
+            offset += size
+
+        results = []
+        for future in futures:
+            if isinstance(future, Exception):
+                results.append({'success': False, 'error': str(future)})
+                continue
+            try:
+                ok, value = future.result()
+            except concurrent.futures.process.BrokenProcessPool:
+                shutdown()  # Start a fresh pool for the next batch
+                raise
+            results.append({'success': True, 'result': value} if ok else {'success': False, 'error': value})
+        return results
+    finally:
+        block.close()
+        block.unlink()
+
+
+def embed_batch(images: list, payloads: list, access_code_hashes: list) -> list:
+    """
+    hide_data_in_image for every image, in parallel.
+
+    Args:
+        images: PIL images, file objects or PNG/JPEG bytes
+        payloads: Bytes to hide, one per image
+        access_code_hashes: generate_access_code_hash() output, one per image
+
+    Returns:
+        One dict per image, in order: {"success": True, "result": PNG bytes}
+        or {"success": False, "error": message}
+
+    Raises:
+        ValueError: The batch exceeds MAX_BATCH images or MAX_BATCH_PIXELS
+    """
+    if not len(images) == len(payloads) == len(access_code_hashes):
+        raise ValueError("Need one payload and one access code per image")
+
+    def task_for(index, name, offset, image):
+        return (name, offset, image.width, image.height, payloads[index], access_code_hashes[index])
+
+    return _run_batch(images, task_for, _embed_task)
+
+
+def extract_batch(images: list, access_codes: list) -> list:
+    """
+    extract_data_from_image for every image, in parallel.
+
+    Returns:
+        One dict per image, in order: {"success": True, "result": hidden bytes}
+        or {"success": False, "error": message}
+    """
+    if len(images) != len(access_codes):
+        raise ValueError("Need one access code per image")
+
+    def task_for(index, name, offset, image):
+        return (name, offset, image.width * image.height * 3, access_codes[index])
+
+    return _run_batch(images, task_for, _extract_task)
@@ -0,0 +1,33 @@
+-- HoloCrypt credit balances (CreditSystem in holocrypt_enhanced.py)
+--
+-- Balances change only through these functions, each a single statement, so
+-- concurrent workers never overwrite each other's updates.
+--
+--   supabase db push            (or paste into the SQL editor)
+
+create table if not exists users (
+    user_id text primary key,
+    credits integer not null default 0
+);
+
+-- Ledger flushes: add a net delta (negative for spending), creating the row
+-- if needed, and return the new balance
+create or replace function add_credits(p_user_id text, p_delta integer)
+returns integer
+language sql
+as $$
+    insert into users (user_id, credits) values (p_user_id, p_delta)
+    on conflict (user_id) do update set credits = users.credits + excluded.credits
+    returning credits;
+$$;
+
+-- Strict deductions (CREDIT_STRICT=true): spend only if the stored balance
+-- covers it; returns the new balance, or null when it doesn't
+create or replace function spend_credits(p_user_id text, p_amount integer)
+returns integer
+language sql
+as $$
+    update users set credits = credits - p_amount
+    where user_id = p_user_id and credits >= p_amount
+    returning credits;
+$$;
@@ -0,0 +1,179 @@
+"""
+HoloCrypt Word Set
+Compact, memory-mapped English word set for scoring candidate plaintexts
+
+The NLTK words corpus (236k words) is reduced to a sorted array of 64-bit
+word hashes, written to disk once and then mapped read-only by every worker,
+so all processes share the same ~1.9 MB of page cache instead of each
+holding ~15 MB of Python strings. Lookups are binary searches
+(numpy.searchsorted) over the mapped array, batched per text.
+
+With 64-bit hashes, a false positive needs a collision in a 2^64 space
+(about 1 in 10^14 per lookup), which is negligible for scoring.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+MAGIC = b'HCW1'
+_HEADER = struct.Struct('<4sI8x')  # magic, word count, padding to 16 bytes
+_WORD_RE = re.compile(r'[A-Za-z]+')
+
+DEFAULT_PATH = os.path.join('.holocrypt', 'words.bin')
+
+
+def word_hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.lower().encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def build_word_set(word_list, path: str) -> int:
+    """
+    Writes the word set file for ``word_list`` atomically.
+
+    Returns:
+        Number of distinct words stored
+    """
+    hashes = word_hashes(word_list)
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.words-')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(_HEADER.pack(MAGIC, len(hashes)))
+            fh.write(hashes.tobytes())
+        # Workers racing to build produce identical files, so last rename wins safely
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(hashes)
+
+
+def corpus_words() -> list:
+    """
+    The NLTK words corpus, falling back to the system dictionary.
+
+    Raises:
+        LookupError: Neither source is installed
+    """
+    try:
+        from nltk.corpus import words
+        return words.words()
+    except LookupError:
+        for path in ('/usr/share/dict/words', '/usr/dict/words'):
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8', errors='ignore') as fh:
+                    return [line.strip() for line in fh if line.strip()]
+        raise LookupError("No word list available: install the NLTK 'words' corpus")
+
+
+def word_hashes(word_list) -> np.ndarray:
+    """Sorted, distinct hashes of ``word_list``: the body of a word set file."""
+    return np.unique(np.fromiter((word_hash(w) for w in word_list), dtype='<u8'))
+
+
+class WordSet:
+    """Read-only view over a word set file; the hash array is the mmap itself."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, count = _HEADER.unpack_from(self._map)
+            if magic != MAGIC:
+                raise ValueError("bad magic")
+            self.hashes = np.frombuffer(self._map, dtype='<u8', count=count, offset=_HEADER.size)
+        except (ValueError, struct.error) as e:
+            self._map.close()
+            raise ValueError(f"{path} is not a valid HoloCrypt word set: {e}") from None
+
+    @classmethod
+    def in_memory(cls, word_list) -> 'WordSet':
+        """A word set held in this process only, for when the file can't be written or read."""
+        word_set = cls.__new__(cls)
+        word_set.path = None
+        word_set._map = None
+        word_set.hashes = word_hashes(word_list)
+        return word_set
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def __contains__(self, word: str) -> bool:
+        value = word_hash(word)
+        index = int(np.searchsorted(self.hashes, value))
+        return index < len(self.hashes) and int(self.hashes[index]) == value
+
+    def contains_many(self, word_list) -> np.ndarray:
+        """Boolean array: which of ``word_list`` are English words."""
+        values = np.fromiter((word_hash(w) for w in word_list), dtype='<u8')
+        if not len(self.hashes):
+            return np.zeros(len(values), dtype=bool)
+        index = np.searchsorted(self.hashes, values).clip(max=len(self.hashes) - 1)
+        return self.hashes[index] == values
+
+    def english_score(self, text: str) -> float:
+        """
+        Share of the text's letters that belong to dictionary words (0.0 - 1.0).
+
+        Weighted by word length, so stray one- and two-letter hits in gibberish
+        count for little.
+        """
+        tokens = _WORD_RE.findall(text)
+        if not tokens:
+            return 0.0
+        lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+        return float(lengths[self.contains_many(tokens)].sum() / lengths.sum())
+
+
+_default = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+def default_word_set():
+    """
+    The process-wide word set, built from the corpus on first use.
+
+    Returns None when no word list is installed, so callers can degrade. If
+    the file can't be built or mapped (read-only or corrupt WORD_SET_PATH),
+    the set is held in this process's memory instead.
+    """
+    global _default, _default_loaded
+    with _default_lock:
+        if not _default_loaded:
+            path = os.getenv('WORD_SET_PATH', DEFAULT_PATH)
+            try:
+                if not os.path.exists(path):
+                    build_word_set(corpus_words(), path)
+                _default = WordSet(path)
+            except LookupError:
+                _default = None
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Word set file unavailable, using an in-memory set: {e}")
+                try:
+                    _default = WordSet.in_memory(corpus_words())
+                except LookupError:
+                    _default = None
+            _default_loaded = True
+        return _default
+
+
+def english_score(text: str):
+    """
+    Share of ``text``'s letters that form dictionary words, or None if no
+    word list is installed.
+    """
+    word_set = default_word_set()
+    return word_set.english_score(text) if word_set is not None else None
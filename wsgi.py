@@ -0,0 +1,7 @@
+"""
+WSGI entry point for production serving
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import app  # Reuse app.py's instance rather than building (and indexing static/dist) twice